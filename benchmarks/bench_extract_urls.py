@@ -0,0 +1,164 @@
+"""
+Micro-benchmark of Utils.extract_urls against the original implementation.
+
+Checks that both extractors find the same URLs on a newsletter corpus and reports their
+throughput in MB/s. The corpus is a directory of text/markdown dumps of newsletters
+(e.g. pymupdf4llm output), a synthetic corpus built from output/output.json is used
+when none is given.
+
+    python benchmarks/bench_extract_urls.py [--corpus DIR] [--size-mb 4] [--repeat 5]
+"""
+import os
+import re
+import sys
+import json
+import time
+import string
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import Utils
+
+OUTPUT_JSON_FILE = os.path.join(os.path.dirname(__file__), '..', 'output', 'output.json')
+
+
+def legacy_extract_urls(text):
+    """
+    Extracts clean URLs from text while filtering out common PDF artifacts and invalid URL parts.
+
+    Utils.extract_urls of the baseline tree, copied verbatim.
+    """
+    # More comprehensive URL pattern
+    url_pattern = r'https?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+    
+    # Find all matches
+    urls = re.findall(url_pattern, text)
+    
+    # Clean up URLs
+    cleaned_urls = []
+    for url in urls:
+        # Remove common PDF artifacts and invalid URL endings
+        url = re.sub(r'\).*$', '', url)  # Remove everything after closing parenthesis
+        url = re.sub(r'\].*$', '', url)  # Remove everything after closing bracket
+        url = re.sub(r'["\'\]].*$', '', url)  # Remove quotes and anything after
+        url = url.split('external-destination=')[0]  # Remove PDF metadata
+        
+        # Basic URL validation
+        if all(char in string.printable for char in url):  # Check for valid characters
+            if not any(x in url for x in ['[', ']', ')', '(', '"', "'"]):  # No brackets or quotes
+                cleaned_urls.append(url.strip())
+    
+    # Remove duplicates while preserving order
+    return list(dict.fromkeys(cleaned_urls))
+
+
+def load_corpus(corpus_dir):
+    documents = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(('.txt', '.md')):
+            with open(os.path.join(corpus_dir, name), 'r', encoding='utf-8') as file:
+                documents.append(file.read())
+    return documents
+
+
+def url_variants(url):
+    """
+    Spellings of a URL that normalize to the same page: the extractors must keep them apart
+    """
+    scheme, rest = url.split('://', 1)
+    host         = rest.split('/', 1)[0]
+    other_host   = host[4:] if host.startswith('www.') else f"www.{host}"
+    return [
+        url,
+        f"{url}?utm_source=newsletter&utm_medium=email",
+        f"{url}/",
+        f"http://{rest}",
+        url.replace(host, other_host, 1),
+        f"{url}#comments",
+    ]
+
+
+def synthetic_corpus(size_mb, seed=7):
+    """
+    Newsletter-like markdown: article prose with markdown links, bare URLs, safelinks
+    and the PDF artifacts extract_urls has to clean up. Some articles are linked again
+    further down, with the tracking, scheme, www and trailing slash variants of their URL.
+    """
+    random.seed(seed)
+    with open(OUTPUT_JSON_FILE, 'r', encoding='utf-8') as file:
+        prose = [record['page_content'] for record in json.load(file)]
+    hosts = ['www.reuters.com', 'www.thehindu.com', 'apnews.com', 'www.scmp.com', 'www.bbc.co.uk']
+    parts, size, linked = [], 0, []
+    while size < size_mb * 1024 * 1024:
+        if linked and random.random() < 0.3:
+            url = random.choice(url_variants(random.choice(linked)))
+        else:
+            url = f"https://{random.choice(hosts)}/news/{random.randint(1, 10 ** 6)}/article-{random.randint(1, 999)}"
+            linked.append(url)
+        link = random.choice([
+            f"[{url}]({url})",
+            f"({url})",
+            f"{url}?utm_source=newsletter&utm_medium=email" if '?' not in url else url,
+            f"<{url}>",
+            f"{url}external-destination=true",
+            f"https://nam02.safelinks.protection.outlook.com/?url={url.replace(':', '%3A').replace('/', '%2F')}&data=05",
+            f'"{url}"',
+        ])
+        paragraph = random.choice(prose)[:random.randint(200, 2000)]
+        parts.append(f"{paragraph}\n{link}\n\n")
+        size += len(parts[-1])
+    return ["".join(parts)]
+
+
+def measure(extract, documents, repeat):
+    total_bytes = sum(len(document.encode('utf-8')) for document in documents)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for document in documents:
+            extract(document)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return total_bytes / best / (1024 * 1024), best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of .txt/.md newsletter dumps")
+    parser.add_argument("--size-mb", type=float, default=4, help="Size of the synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    documents = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.size_mb)
+    utils     = Utils(logging.getLogger(__name__))
+
+    # Raw outputs of both extractors, redirect unwrapping aside
+    mismatches = 0
+    for index, document in enumerate(documents):
+        legacy  = legacy_extract_urls(document)
+        current = utils.extract_urls(document, unwrap_redirects=False)
+        if legacy != current:
+            mismatches += 1
+            print(f"Document {index}: {len(legacy)} legacy URLs, {len(current)} current URLs")
+            for url in [url for url in legacy if url not in current][:5]:
+                print(f"  legacy only:  {url}")
+            for url in [url for url in current if url not in legacy][:5]:
+                print(f"  current only: {url}")
+    print(f"Documents: {len(documents)}, output mismatches: {mismatches}")
+
+    legacy_mbps, legacy_time   = measure(legacy_extract_urls, documents, args.repeat)
+    current_mbps, current_time = measure(lambda document: utils.extract_urls(document, unwrap_redirects=False), documents, args.repeat)
+    unwrap_mbps, unwrap_time   = measure(utils.extract_urls, documents, args.repeat)
+    print(f"{'extractor':<22}{'best time (s)':>16}{'throughput (MB/s)':>20}")
+    print(f"{'legacy':<22}{legacy_time:>16.3f}{legacy_mbps:>20.1f}")
+    print(f"{'single-pass':<22}{current_time:>16.3f}{current_mbps:>20.1f}")
+    print(f"{'single-pass + unwrap':<22}{unwrap_time:>16.3f}{unwrap_mbps:>20.1f}")
+    print(f"Speed-up: {legacy_time / current_time:.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark of the HTML extraction back ends (selectolax, lxml, BeautifulSoup).
+
+Parses every HTML fixture with each installed back end and reports the parse time and
+the peak Python memory (tracemalloc, which does not see the C allocations of lxml and
+selectolax) per back end, plus how much their extracted texts differ.
+
+No recorded article pages are committed: benchmarks/fixtures/html does not exist in the
+repository, so by default every page is synthesized from the article texts of
+output/output.json (see synthetic_pages) and the results describe that markup only, not
+real publisher pages. Point --fixtures at a directory of saved *.html pages to measure
+real ones; the output says which kind of pages were used.
+
+    python benchmarks/bench_html_extract.py [--fixtures DIR] [--pages 50] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tracemalloc
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from html_extractor import HtmlExtractor, available_backends
+
+FIXTURES_DIR     = os.path.join(os.path.dirname(__file__), 'fixtures', 'html')
+OUTPUT_JSON_FILE = os.path.join(os.path.dirname(__file__), '..', 'output', 'output.json')
+
+
+def load_fixtures(fixtures_dir):
+    pages = []
+    if not os.path.isdir(fixtures_dir):
+        return pages
+    for name in sorted(os.listdir(fixtures_dir)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(fixtures_dir, name), 'r', encoding='utf-8', errors='replace') as file:
+                pages.append(file.read())
+    return pages
+
+
+def synthetic_pages(count, seed=7):
+    """
+    News-site-like pages: head with metadata, scripts and styles, navigation, the article
+    body split in paragraphs, related links and a footer
+    """
+    random.seed(seed)
+    with open(OUTPUT_JSON_FILE, 'r', encoding='utf-8') as file:
+        records = json.load(file)
+    script = "<script>" + "window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}" * 40 + "</script>"
+    style  = "<style>" + ".nav a{color:#333;padding:4px 8px}.article p{line-height:1.6}" * 40 + "</style>"
+    nav    = "<nav><ul>" + "".join(f"<li><a href='/section/{i}'>Section {i}</a></li>" for i in range(40)) + "</ul></nav>"
+    pages  = []
+    for _ in range(count):
+        record     = random.choice(records)
+        words      = (record.get('page_content') or '').split()
+        paragraphs = "".join(f"<p>{' '.join(words[i:i + 60])}</p>" for i in range(0, len(words), 60))
+        related    = "".join(f"<li><a href='/news/{random.randint(1, 10 ** 6)}'>Related story {i}</a></li>" for i in range(20))
+        pages.append(
+            "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>"
+            f"<title>{record.get('page_title') or 'Article'}</title>"
+            "<meta name='description' content='Article description'>"
+            "<meta property='og:site_name' content='News'>"
+            f"{style}{script}</head><body>{nav}"
+            "<div class='cookie-banner'>We use cookies to improve your experience. Accept all</div>"
+            f"<main><article><h1>{record.get('page_title') or 'Article'}</h1>{paragraphs}</article>"
+            f"<aside><ul>{related}</ul></aside></main>{script}"
+            "<footer>Copyright News. All rights reserved.</footer></body></html>"
+        )
+    return pages
+
+
+def measure(extractor, pages, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            extractor.extract(html)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    for html in pages:
+        extractor.extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of saved .html pages, synthetic pages when empty or missing")
+    parser.add_argument("--pages", type=int, default=50, help="Number of synthetic pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    pages  = load_fixtures(args.fixtures)
+    source = f"recorded pages from {args.fixtures}" if pages else "synthetic pages, no recorded fixtures"
+    pages  = pages or synthetic_pages(args.pages)
+    logger = logging.getLogger(__name__)
+    total  = sum(len(html.encode('utf-8')) for html in pages)
+    print(f"Pages: {len(pages)} {source}, {total / (1024 * 1024):.1f} MB of HTML")
+
+    backends   = available_backends()
+    extractors = {backend: HtmlExtractor(logger, backend=backend) for backend in backends}
+    texts      = {backend: [extractor.extract(html).text for html in pages] for backend, extractor in extractors.items()}
+    # Texts are compared with the BeautifulSoup fallback (the last back end)
+    reference  = texts[backends[-1]]
+    print(f"{'back end':<12}{'best time (s)':>16}{'ms/page':>10}{'peak (MB)':>12}{'text similarity':>18}")
+    for backend, extractor in extractors.items():
+        best, peak = measure(extractor, pages, args.repeat)
+        similarity = sum(SequenceMatcher(None, text, other).quick_ratio() for text, other in zip(texts[backend], reference)) / len(pages)
+        print(f"{backend:<12}{best:>16.3f}{best * 1000 / len(pages):>10.2f}{peak / (1024 * 1024):>12.1f}{similarity:>18.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+End-to-end benchmark of the article pipeline against local stand-ins.
+
+Runs Utils.get_features (ArticleScrapper -> LLM -> DataPreprocessor) and the ResultStore
+upsert for every article, with the publishers replaced by a local HTTP server and the
+provider replaced by a fake OpenAI/Gemini-compatible endpoint, both with configurable
+latency. Nothing leaves the machine and no API key is needed, so runs are repeatable and
+comparable.
+
+The publisher server serves the saved pages of --fixtures. None are committed, so by
+default it serves the synthetic pages of bench_html_extract.synthetic_pages and the fetch
+and parse figures describe that markup, not real publisher pages. The saved results
+record which kind of pages were used ("fixtures"), runs on different pages are not
+compared.
+
+Reports per-stage p50/p95 latency (fetch, llm, parse, store), articles/min and peak
+memory (tracemalloc for Python allocations, ru_maxrss for the process), saves the
+results to benchmarks/results/ and compares them with the previous run of the same
+configuration, flagging regressions.
+
+    python benchmarks/bench_pipeline.py [--articles 50] [--concurrency 8] [--provider openai]
+        [--page-latency 0.05] [--llm-latency 0.5] [--fixtures DIR] [--threshold 0.1]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from llm import LLM
+from utils import Utils, DataPreprocessor
+from http_client import HttpClient
+from result_store import ResultStore
+from rate_limiter import RateLimiter, DEFAULT_LIMITS
+from scrapper import ArticleScrapper, FetchStrategyMemory, STRATEGY_REQUESTS
+
+from local_servers import PublisherServer, FakeLLMServer
+from bench_html_extract import FIXTURES_DIR, load_fixtures, synthetic_pages
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, the process peak is then not reported
+    resource = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+STAGES      = ('fetch', 'llm', 'parse', 'store', 'total')
+# Provider model names, the fake endpoint answers any of them
+MODELS      = {'openai': 'gpt-4o-mini', 'gemini': 'gemini-1.5-flash'}
+
+
+class StageTimer:
+    """
+    Wall time of every call of the wrapped methods, grouped by stage
+    """
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+
+    def wrap(self, owner, method_name, stage):
+        method = getattr(owner, method_name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+
+        setattr(owner, method_name, timed)
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def build_pipeline(logger, args, publisher, llm_server, timer):
+    # requests only, the local publisher serves plain HTML so the (lazy) browser pool is never used
+    strategy_memory = FetchStrategyMemory()
+    strategy_memory.record(urlparse(publisher.url).netloc.lower(), STRATEGY_REQUESTS)
+    http_client     = HttpClient(logger, max_connections=args.concurrency, max_per_host=args.concurrency, retries=0)
+    scrapper        = ArticleScrapper(logger, strategy_memory=strategy_memory,
+                                      http_client=http_client, page_cache=None)
+    base_url        = f"{llm_server.url}/v1" if args.provider == 'openai' else llm_server.url
+    # Provider default budgets, kept in this process: the shared buckets of real runs are not touched
+    limits          = DEFAULT_LIMITS[args.provider]
+    rate_limiter    = RateLimiter(logger, f"{args.provider}:benchmark", rpm=limits['rpm'], tpm=limits['tpm'])
+    llm             = LLM(logger, args.provider, MODELS[args.provider], "local-benchmark-key",
+                          response_cache=None, base_url=base_url, rate_limiter=rate_limiter)
+    utils           = Utils(logger)
+
+    timer.wrap(scrapper, 'extract_web_content', 'fetch')
+    timer.wrap(llm, 'run_llm', 'llm')
+    timer.wrap(utils, 'postprocess_features', 'parse')
+    return scrapper, llm, utils
+
+
+def run(args):
+    logger = logging.getLogger(__name__)
+    pages  = load_fixtures(args.fixtures) or synthetic_pages(args.articles)
+    pages  = (pages * (args.articles // len(pages) + 1))[:args.articles]
+    timer  = StageTimer()
+
+    with PublisherServer(pages, latency=args.page_latency) as publisher, \
+         FakeLLMServer(latency=args.llm_latency, per_1k_tokens=args.llm_per_1k_tokens) as llm_server, \
+         tempfile.TemporaryDirectory() as tmp_dir:
+        scrapper, llm, utils = build_pipeline(logger, args, publisher, llm_server, timer)
+        data_preprocessor    = DataPreprocessor(logger)
+        result_store         = ResultStore(logger, db_path=os.path.join(tmp_dir, 'bench.sqlite3'))
+        selected_date        = datetime.now()
+
+        def process(url):
+            start = time.perf_counter()
+            # The store is not passed to get_features, every article goes through every stage
+            article_details = utils.get_features(scrapper, llm, data_preprocessor, selected_date, url)
+            stored          = time.perf_counter()
+            result_store.upsert(article_details)
+            timer.add('store', time.perf_counter() - stored)
+            timer.add('total', time.perf_counter() - start)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(process, publisher.article_urls()))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        usage = llm_server.usage()
+
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    max_rss = None
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+    return {
+        'config': {
+            'articles': args.articles,
+            'concurrency': args.concurrency,
+            'provider': args.provider,
+            'page_latency': args.page_latency,
+            'llm_latency': args.llm_latency,
+            'llm_per_1k_tokens': args.llm_per_1k_tokens,
+            'fixtures': bool(load_fixtures(args.fixtures)),
+        },
+        'run_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'elapsed_s': elapsed,
+        'articles_per_min': len(pages) * 60 / elapsed if elapsed else None,
+        'stages': {
+            stage: {
+                'count': len(samples),
+                'p50_ms': percentile(samples, 0.5) * 1000 if samples else None,
+                'p95_ms': percentile(samples, 0.95) * 1000 if samples else None,
+            }
+            for stage, samples in timer.samples.items()
+        },
+        'tracemalloc_peak_mb': peak / (1024 * 1024),
+        'max_rss_mb': max_rss / (1024 * 1024) if max_rss else None,
+        'llm_usage': usage,
+    }
+
+
+def previous_result(results_dir, config):
+    """
+    Latest saved run with the same configuration
+    """
+    if not os.path.isdir(results_dir):
+        return None
+    for name in sorted(os.listdir(results_dir), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(results_dir, name), 'r', encoding='utf-8') as file:
+            result = json.load(file)
+        if result.get('config') == config:
+            return result
+    return None
+
+
+def save_result(results_dir, result):
+    os.makedirs(results_dir, exist_ok=True)
+    name = f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path = os.path.join(results_dir, name)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=2)
+    return path
+
+
+def report(result, previous, threshold):
+    """
+    Print the run and its change against the previous one. Returns the regressions,
+    latencies or memory that grew (or throughput that dropped) by more than the threshold.
+    """
+    def change(current, before, higher_is_worse=True):
+        if current is None or not before:
+            return "", False
+        ratio = (current - before) / before
+        worse = ratio > threshold if higher_is_worse else ratio < -threshold
+        return f"{ratio:+.0%}{' !' if worse else ''}", worse
+
+    regressions = []
+    print(f"Pages: {'recorded fixtures' if result['config']['fixtures'] else 'synthetic, no recorded fixtures'}")
+    print(f"{'stage':<8}{'count':>7}{'p50 (ms)':>12}{'p95 (ms)':>12}{'vs prev p50':>14}{'vs prev p95':>14}")
+    for stage, stats in result['stages'].items():
+        before = (previous or {}).get('stages', {}).get(stage, {})
+        p50_change, p50_worse = change(stats['p50_ms'], before.get('p50_ms'))
+        p95_change, p95_worse = change(stats['p95_ms'], before.get('p95_ms'))
+        regressions += [f"{stage} p50"] * p50_worse + [f"{stage} p95"] * p95_worse
+        p50 = f"{stats['p50_ms']:.1f}" if stats['p50_ms'] is not None else "-"
+        p95 = f"{stats['p95_ms']:.1f}" if stats['p95_ms'] is not None else "-"
+        print(f"{stage:<8}{stats['count']:>7}{p50:>12}{p95:>12}{p50_change:>14}{p95_change:>14}")
+
+    throughput_change, worse = change(result['articles_per_min'], (previous or {}).get('articles_per_min'), higher_is_worse=False)
+    regressions += ["articles/min"] * worse
+    print(f"\nArticles/min: {result['articles_per_min']:.1f} {throughput_change}")
+    peak_change, worse = change(result['tracemalloc_peak_mb'], (previous or {}).get('tracemalloc_peak_mb'))
+    regressions += ["peak memory"] * worse
+    max_rss = f"{result['max_rss_mb']:.0f} MB" if result['max_rss_mb'] else "n/a"
+    print(f"Peak memory: {result['tracemalloc_peak_mb']:.1f} MB traced {peak_change}, {max_rss} max RSS")
+    usage = result['llm_usage']
+    print(f"LLM requests: {usage['requests']}, {usage['prompt_tokens']} prompt / {usage['completion_tokens']} completion tokens")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--provider", choices=sorted(MODELS), default="openai")
+    parser.add_argument("--page-latency", type=float, default=0.05, help="Seconds the publisher takes per page")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds the provider takes per request")
+    parser.add_argument("--llm-per-1k-tokens", type=float, default=0.05, help="Extra provider seconds per 1k prompt tokens")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of recorded .html pages, synthetic pages when empty or missing")
+    parser.add_argument("--results", default=RESULTS_DIR, help="Directory of saved runs")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as a regression")
+    parser.add_argument("--no-save", action="store_true", help="Do not save this run")
+    args = parser.parse_args(argv)
+
+    result   = run(args)
+    previous = previous_result(args.results, result['config'])
+    if previous:
+        print(f"Compared with the run of {previous['run_at']}")
+    regressions = report(result, previous, args.threshold)
+    if not args.no_save:
+        print(f"Saved to {save_result(args.results, result)}")
+    if regressions:
+        print(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+"""
+Local stand-ins for the benchmark harness and the tests: a publisher serving recorded
+article HTML and a fake OpenAI/Gemini-compatible LLM endpoint (synchronous and Batch
+APIs), both with configurable latency.
+"""
+import re
+import json
+import time
+import uuid
+import random
+import threading
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned extraction, the parsing stage sees a realistic response
+FAKE_FEATURES = {
+    "article_date": "12 March 2024",
+    "country": "Kenya",
+    "region": "Africa",
+    "project_title": "Nairobi Expressway",
+    "sector": "Economic",
+    "china_key_leaders_groups": "China Road and Bridge Corporation",
+    "country_key_leaders_groups": "Kenya National Highways Authority",
+    "date": "March 2024",
+    "from": "China",
+    "recipient": "Kenya",
+    "amount": "USD 668 million",
+}
+BATCH_ARTICLE_PATTERN = re.compile(r'### ARTICLE (\S+)\n')
+CHARS_PER_TOKEN       = 4
+
+
+class LocalServer:
+    """
+    ThreadingHTTPServer on an ephemeral localhost port, served from a daemon thread
+    """
+    def __init__(self, handler_class):
+        self.httpd  = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _sleep(latency, jitter):
+    if latency > 0:
+        time.sleep(max(0.0, random.gauss(latency, latency * jitter)))
+
+
+class PublisherServer(LocalServer):
+    """
+    Serves pages[i] at /article/<i> after `latency` seconds (+- jitter)
+    """
+    def __init__(self, pages, latency=0.05, jitter=0.2):
+        self.pages   = pages
+        self.latency = latency
+        self.jitter  = jitter
+        super().__init__(_PublisherHandler)
+
+    def article_urls(self):
+        return [f"{self.url}/article/{index}" for index in range(len(self.pages))]
+
+
+class _PublisherHandler(_QuietHandler):
+    def do_GET(self):
+        server = self.server.owner
+        match  = re.fullmatch(r'/article/(\d+)', self.path)
+        if not match or int(match.group(1)) >= len(server.pages):
+            self._send(404, "not found", "text/plain")
+            return
+        _sleep(server.latency, server.jitter)
+        self._send(200, server.pages[int(match.group(1))], "text/html; charset=utf-8")
+
+
+class FakeLLMServer(LocalServer):
+    """
+    OpenAI (/v1/chat/completions) and Gemini (/v1beta/models/<model>:generateContent)
+    compatible endpoint. Every request waits `latency` seconds plus `per_1k_tokens`
+    seconds per thousand prompt tokens, and its token usage is accounted.
+
+    The Batch APIs are served too: OpenAI files and batches (/v1/files, /v1/batches) and
+    Gemini batchGenerateContent with its batches/<id> operation, both listable. A batch is
+    reported as in progress for its first `batch_pending_polls` status polls, then completed.
+    """
+    def __init__(self, latency=0.5, per_1k_tokens=0.05, jitter=0.2, batch_pending_polls=1):
+        self.latency             = latency
+        self.per_1k_tokens       = per_1k_tokens
+        self.jitter              = jitter
+        self.batch_pending_polls = batch_pending_polls
+        self.requests            = 0
+        self.prompt_tokens       = 0
+        self.completion_tokens   = 0
+        # file id -> (filename, content), batch id -> batch state
+        self.files               = {}
+        self.batches             = {}
+        self._lock               = threading.Lock()
+        super().__init__(_FakeLLMHandler)
+
+    def usage(self):
+        with self._lock:
+            return {'requests': self.requests, 'prompt_tokens': self.prompt_tokens, 'completion_tokens': self.completion_tokens}
+
+    def answer(self, prompt):
+        """
+        Canned answer of a prompt, with its token usage accounted: one object, or an
+        array for batched prompts
+        """
+        article_ids = BATCH_ARTICLE_PATTERN.findall(prompt)
+        if article_ids:
+            answer = json.dumps([{"id": article_id, **FAKE_FEATURES} for article_id in article_ids])
+        else:
+            answer = json.dumps(FAKE_FEATURES)
+        prompt_tokens     = len(prompt) // CHARS_PER_TOKEN + 1
+        completion_tokens = len(answer) // CHARS_PER_TOKEN + 1
+        with self._lock:
+            self.requests          += 1
+            self.prompt_tokens     += prompt_tokens
+            self.completion_tokens += completion_tokens
+        return answer, prompt_tokens, completion_tokens
+
+    def complete(self, prompt):
+        """
+        Answer of a synchronous request, after the configured latency
+        """
+        answer, prompt_tokens, completion_tokens = self.answer(prompt)
+        _sleep(self.latency + self.per_1k_tokens * prompt_tokens / 1000, self.jitter)
+        return answer, prompt_tokens, completion_tokens
+
+    def batch_prompts(self):
+        """
+        Prompts of every submitted batch, in submission order: [(custom_id, prompt)]
+        """
+        with self._lock:
+            return [item for batch in self.batches.values() for item in batch['prompts']]
+
+    def create_batch(self, prompts, id_prefix="batch_", **fields):
+        batch_id = f"{id_prefix}{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.batches[batch_id] = {'prompts': prompts, 'polls': 0, 'output': None, 'created_at': int(time.time()), **fields}
+        return batch_id
+
+    def poll_batch(self, batch_id):
+        """
+        Batch state after one more status poll, its answers ({custom_id: text}) are set
+        once it completed. None for an unknown batch.
+        """
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+            batch['polls'] += 1
+            if batch['polls'] <= self.batch_pending_polls or batch['output'] is not None:
+                return batch
+        # Batches are not latency bound, the answers are computed right away
+        output = {custom_id: self.answer(prompt)[0] for custom_id, prompt in batch['prompts']}
+        with self._lock:
+            batch['output'] = output
+        return batch
+
+
+def _multipart_file(content_type, body):
+    """
+    (filename, content) of the file part of a multipart/form-data upload
+    """
+    message = BytesParser(policy=policy.default).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body)
+    for part in message.iter_parts():
+        if part.get_filename():
+            return part.get_filename(), part.get_payload(decode=True).decode('utf-8')
+    return None, ""
+
+
+class _FakeLLMHandler(_QuietHandler):
+    def _send_json(self, body, status=200):
+        self._send(status, json.dumps(body), "application/json")
+
+    def _not_found(self, path):
+        self._send_json({"error": {"message": f"Unknown path {path}"}}, status=404)
+
+    def do_POST(self):
+        server = self.server.owner
+        raw    = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path   = self.path.split('?')[0]
+        if path.endswith("/files"):
+            self._send_json(self._create_file(server, raw))
+            return
+        payload = json.loads(raw or b"{}")
+        if path.endswith("/chat/completions"):
+            prompt = "".join(message.get("content") or "" for message in payload.get("messages", []))
+            answer, prompt_tokens, completion_tokens = server.complete(prompt)
+            body = {
+                "id": "chatcmpl-local",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }
+        elif path.endswith(":generateContent"):
+            prompt = "".join(part.get("text") or "" for content in payload.get("contents", []) for part in content.get("parts", []))
+            answer, prompt_tokens, completion_tokens = server.complete(prompt)
+            body = {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": answer}]}, "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens,
+                                  "totalTokenCount": prompt_tokens + completion_tokens},
+            }
+        elif path.endswith("/batches"):
+            body = self._create_openai_batch(server, payload)
+        elif path.endswith(":batchGenerateContent"):
+            body = self._create_gemini_batch(server, payload)
+        else:
+            self._not_found(path)
+            return
+        self._send_json(body)
+
+    def do_GET(self):
+        server = self.server.owner
+        path   = self.path.split('?')[0]
+        match  = re.fullmatch(r'/v1/files/([\w-]+)/content', path)
+        if match and match.group(1) in server.files:
+            self._send(200, server.files[match.group(1)][1], "application/octet-stream")
+            return
+        if path == '/v1/batches':
+            self._send_json(self._openai_batch_list(server))
+            return
+        if path == '/v1beta/batches':
+            self._send_json({"operations": [self._gemini_operation(server, batch_id) for batch_id in self._batch_ids(server, "gemini")]})
+            return
+        match = re.fullmatch(r'/v1/batches/([\w-]+)', path)
+        if match and server.poll_batch(match.group(1)) is not None:
+            self._send_json(self._openai_batch(server, match.group(1)))
+            return
+        match = re.fullmatch(r'/v1beta/(batches/[\w-]+)', path)
+        if match and server.poll_batch(match.group(1)) is not None:
+            self._send_json(self._gemini_operation(server, match.group(1)))
+            return
+        self._not_found(path)
+
+    def _batch_ids(self, server, provider):
+        # Listed newest first, like the providers do
+        with server._lock:
+            return [batch_id for batch_id, batch in reversed(list(server.batches.items())) if batch.get('provider') == provider]
+
+    # OpenAI Batch API: an uploaded JSONL input file, the answers as a JSONL output file
+
+    def _create_file(self, server, raw):
+        filename, content = _multipart_file(self.headers.get("Content-Type"), raw)
+        file_id           = f"file-{uuid.uuid4().hex[:12]}"
+        with server._lock:
+            server.files[file_id] = (filename, content)
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": "batch", "status": "processed"}
+
+    def _create_openai_batch(self, server, payload):
+        _, content = server.files.get(payload.get("input_file_id"), (None, ""))
+        prompts    = []
+        for line in content.splitlines():
+            if line.strip():
+                request = json.loads(line)
+                prompts.append((request["custom_id"], "".join(message.get("content") or "" for message in request["body"]["messages"])))
+        batch_id = server.create_batch(prompts, provider="openai", endpoint=payload.get("endpoint"),
+                                       input_file_id=payload.get("input_file_id"), metadata=payload.get("metadata"))
+        return self._openai_batch(server, batch_id)
+
+    def _openai_batch(self, server, batch_id):
+        batch          = server.batches[batch_id]
+        output_file_id = None
+        if batch['output'] is not None:
+            output_file_id = f"file-output-{batch_id}"
+            lines          = [json.dumps({
+                "id": f"batch_req_{index}",
+                "custom_id": custom_id,
+                "response": {"status_code": 200, "body": {
+                    "id": f"chatcmpl-{index}",
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                }},
+                "error": None,
+            }) for index, (custom_id, answer) in enumerate(batch['output'].items())]
+            with server._lock:
+                server.files[output_file_id] = (f"{batch_id}_output.jsonl", "\n".join(lines) + "\n")
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": batch.get('endpoint'),
+            "input_file_id": batch.get('input_file_id'),
+            "completion_window": "24h",
+            "created_at": batch['created_at'],
+            "status": "completed" if output_file_id else "in_progress",
+            "output_file_id": output_file_id,
+            "metadata": batch.get('metadata'),
+        }
+
+    def _openai_batch_list(self, server):
+        batches = [self._openai_batch(server, batch_id) for batch_id in self._batch_ids(server, "openai")]
+        return {"object": "list", "data": batches, "has_more": False,
+                "first_id": batches[0]["id"] if batches else None, "last_id": batches[-1]["id"] if batches else None}
+
+    # Gemini Batch Mode: inlined requests, a long running batches/<id> operation
+
+    def _create_gemini_batch(self, server, payload):
+        requests = ((payload.get("batch") or {}).get("input_config") or {}).get("requests", {}).get("requests", [])
+        prompts  = [
+            ((request.get("metadata") or {}).get("key"),
+             "".join(part.get("text") or "" for content in request["request"].get("contents", []) for part in content.get("parts", [])))
+            for request in requests
+        ]
+        batch_id = server.create_batch(prompts, id_prefix="batches/", provider="gemini",
+                                       display_name=(payload.get("batch") or {}).get("display_name"))
+        return {"name": batch_id, "metadata": {"name": batch_id, "displayName": server.batches[batch_id]['display_name'],
+                                               "state": "BATCH_STATE_PENDING"}}
+
+    def _gemini_operation(self, server, batch_id):
+        batch    = server.batches[batch_id]
+        metadata = {"name": batch_id, "displayName": batch.get('display_name')}
+        if batch['output'] is None:
+            return {"name": batch_id, "metadata": {**metadata, "state": "BATCH_STATE_RUNNING"}, "done": False}
+        inlined = [
+            {"response": {"candidates": [{"content": {"role": "model", "parts": [{"text": answer}]}, "finishReason": "STOP"}]},
+             "metadata": {"key": custom_id}}
+            for custom_id, answer in batch['output'].items()
+        ]
+        return {
+            "name": batch_id,
+            "metadata": {**metadata, "state": "BATCH_STATE_SUCCEEDED"},
+            "done": True,
+            "response": {"inlinedResponses": {"inlinedResponses": inlined}},
+        }
@@ -0,0 +1,507 @@
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+import requests
+from datetime import date, datetime
+from langchain.docstore.document import Document
+
+from utils import DataPreprocessor, Utils, DATE_OUTPUT_FORMAT
+
+DEFAULT_JOBS_DIR = os.path.join(os.path.dirname(__file__), '..', 'output', 'batch_jobs')
+
+# Job states
+JOB_CREATED    = "created"
+# Saved before the batch is sent, a job found in this state on restart may already be billed
+JOB_SUBMITTING = "submitting"
+JOB_SUBMITTED  = "submitted"
+JOB_COMPLETED  = "completed"
+JOB_MERGED     = "merged"
+JOB_FAILED     = "failed"
+
+# Provider batches created this many seconds before a submission are not looked at by find
+FIND_CLOCK_SKEW = 300
+
+# custom_id of the request of one chunk of a long article
+CHUNK_ID_FORMAT = "{custom_id}-chunk-{index}"
+
+
+class OpenAIBatchBackend:
+    """
+    OpenAI Batch API: a JSONL input file of chat completion requests
+    """
+    TERMINAL_ERRORS = ("failed", "expired", "cancelled")
+
+    def __init__(self, logger, llm_processor, base_url=None):
+        from openai import OpenAI
+        self.logger        = logger
+        self.llm_processor = llm_processor
+        self.client        = OpenAI(api_key=llm_processor.LLM_MODEL_API_KEY, base_url=base_url)
+
+    def build_input(self, prompts):
+        lines = []
+        for custom_id, prompt in prompts.items():
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.llm_processor.LLM_MODEL,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "response_format": {"type": "json_object"},
+                },
+            }))
+        return "\n".join(lines) + "\n"
+
+    def submit(self, job_id, prompts):
+        input_file = self.client.files.create(
+            file=(f"{job_id}.jsonl", io.BytesIO(self.build_input(prompts).encode('utf-8'))),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            metadata={"job_id": job_id},
+        )
+        return batch.id
+
+    def find(self, job_id, since):
+        """
+        ID of the provider batch already created for a job (tagged with its job_id in the
+        batch metadata), None when there is none
+
+        Args:
+            job_id (str): Job ID
+            since (float): Timestamp the submission started at, older batches are not listed
+        """
+        # Batches are listed newest first
+        for batch in self.client.batches.list(limit=100):
+            if (batch.metadata or {}).get("job_id") == job_id:
+                return batch.id
+            if batch.created_at < since - FIND_CLOCK_SKEW:
+                return None
+        return None
+
+    def poll(self, provider_batch_id):
+        """
+        Returns:
+            tuple: (state, responses) where state is one of submitted/completed/failed and
+                   responses maps custom_id -> raw LLM text once completed
+        """
+        batch = self.client.batches.retrieve(provider_batch_id)
+        if batch.status in self.TERMINAL_ERRORS:
+            return JOB_FAILED, {}
+        if batch.status != "completed":
+            return JOB_SUBMITTED, {}
+        responses = {}
+        if batch.output_file_id:
+            content = self.client.files.content(batch.output_file_id).text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                try:
+                    body = item["response"]["body"]
+                    responses[item["custom_id"]] = body["choices"][0]["message"]["content"]
+                except (KeyError, IndexError, TypeError):
+                    self.logger.error(f"Batch job: No completion for request {item.get('custom_id')}: {item.get('error')}")
+        return JOB_COMPLETED, responses
+
+
+class GeminiBatchBackend:
+    """
+    Gemini Batch Mode (REST batchGenerateContent with inlined requests)
+    """
+    DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+    SUCCEEDED        = ("BATCH_STATE_SUCCEEDED", "JOB_STATE_SUCCEEDED")
+    TERMINAL_ERRORS  = ("BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED",
+                        "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED")
+
+    def __init__(self, logger, llm_processor, base_url=None):
+        self.logger        = logger
+        self.llm_processor = llm_processor
+        self.base_url      = (base_url or self.DEFAULT_BASE_URL).rstrip('/')
+        self.session       = requests.Session()
+        self.session.headers.update({"x-goog-api-key": llm_processor.LLM_MODEL_API_KEY})
+
+    def build_input(self, prompts):
+        return [
+            {
+                "request": {
+                    "contents": [{"parts": [{"text": prompt}]}],
+                    "generationConfig": {"responseMimeType": "application/json"},
+                },
+                "metadata": {"key": custom_id},
+            }
+            for custom_id, prompt in prompts.items()
+        ]
+
+    def submit(self, job_id, prompts):
+        model    = self.llm_processor.LLM_MODEL
+        model    = model if model.startswith("models/") else f"models/{model}"
+        response = self.session.post(
+            f"{self.base_url}/v1beta/{model}:batchGenerateContent",
+            json={"batch": {
+                "display_name": job_id,
+                "input_config": {"requests": {"requests": self.build_input(prompts)}},
+            }},
+            timeout=(10, 120),
+        )
+        response.raise_for_status()
+        return response.json()["name"]
+
+    def find(self, job_id, since):
+        """
+        Name of the batch already created for a job (its display name is the job_id), None
+        when there is none
+        """
+        params = {"pageSize": 100}
+        while True:
+            response = self.session.get(f"{self.base_url}/v1beta/batches", params=params, timeout=(10, 120))
+            response.raise_for_status()
+            page = response.json()
+            for operation in page.get("operations", []):
+                if (operation.get("metadata") or {}).get("displayName") == job_id:
+                    return operation["name"]
+            if not page.get("nextPageToken"):
+                return None
+            params["pageToken"] = page["nextPageToken"]
+
+    def poll(self, provider_batch_id):
+        response = self.session.get(f"{self.base_url}/v1beta/{provider_batch_id}", timeout=(10, 120))
+        response.raise_for_status()
+        operation = response.json()
+        state     = (operation.get("metadata") or {}).get("state") or operation.get("state")
+        if state in self.TERMINAL_ERRORS or operation.get("error"):
+            return JOB_FAILED, {}
+        if not operation.get("done") and state not in self.SUCCEEDED:
+            return JOB_SUBMITTED, {}
+        output    = (operation.get("response") or {}).get("inlinedResponses") or {}
+        inlined   = output.get("inlinedResponses", []) if isinstance(output, dict) else output
+        responses = {}
+        for item in inlined:
+            custom_id = (item.get("metadata") or {}).get("key")
+            try:
+                responses[custom_id] = item["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            except (KeyError, IndexError, TypeError):
+                self.logger.error(f"Batch job: No completion for request {custom_id}: {item.get('error')}")
+        return JOB_COMPLETED, responses
+
+
+BACKENDS = {
+    "openai": OpenAIBatchBackend,
+    "gemini": GeminiBatchBackend,
+}
+
+
+class BatchJobRunner:
+    """
+    Offline extraction through the provider Batch APIs.
+
+    Pending (already scraped) articles are turned into a provider batch input, submitted,
+    polled until completion and merged back into the output.json record format produced
+    by Utils.get_features. The job state is persisted as one JSON file per job after
+    every step, so a restarted process resumes where it stopped. A job is saved as
+    submitting before its batch is sent: when the process stopped before the provider batch
+    ID was saved, the batch is looked up on the provider instead of being paid for twice.
+    """
+    def __init__(self, logger, llm_processor, data_preprocessor, jobs_dir=None, base_url=None, poll_interval=60):
+        """
+        Args:
+            logger: Application logger
+            llm_processor (LLM): Provides the provider, model, API key and prompt
+            data_preprocessor (DataPreprocessor): Parses the responses and standardizes dates
+            jobs_dir (str): Directory holding the job state files
+            base_url (str): Provider endpoint override, e.g. a local stand-in
+            poll_interval (int): Seconds between two status polls
+        """
+        self.logger            = logger
+        self.llm_processor     = llm_processor
+        self.data_preprocessor = data_preprocessor
+        self.jobs_dir          = jobs_dir or DEFAULT_JOBS_DIR
+        self.poll_interval     = poll_interval
+        self.utils             = Utils(logger)
+        provider               = llm_processor.SELECTED_LLM.lower()
+        if provider not in BACKENDS:
+            raise ValueError(f"Batch jobs are not supported for {llm_processor.SELECTED_LLM}")
+        self.backend           = BACKENDS[provider](logger, llm_processor, base_url=base_url)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def load(self, job_id):
+        with open(self._path(job_id), 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def save(self, job):
+        job['updated_at'] = datetime.now().isoformat()
+        tmp_path = f"{self._path(job['job_id'])}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(job, file, indent=4)
+        os.replace(tmp_path, self._path(job['job_id']))
+
+    def list_jobs(self):
+        return sorted(name[:-len('.json')] for name in os.listdir(self.jobs_dir) if name.endswith('.json'))
+
+    def normalize_received_date(self, received_date):
+        """
+        ISO date (YYYY-MM-DD) of the received date of an article, None when it cannot be
+        parsed. Dates are checked before anything is uploaded, so a malformed one never
+        fails the merge of a batch that was already paid for.
+        """
+        if isinstance(received_date, datetime):
+            return received_date.date().isoformat()
+        if isinstance(received_date, date):
+            return received_date.isoformat()
+        if not isinstance(received_date, str) or not received_date.strip():
+            return None
+        try:
+            return date.fromisoformat(received_date.strip()).isoformat()
+        except ValueError:
+            pass
+        standardized = self.data_preprocessor.standardize_date(received_date)
+        try:
+            return datetime.strptime(standardized, DATE_OUTPUT_FORMAT).date().isoformat()
+        except (TypeError, ValueError):
+            return None
+
+    def _with_valid_dates(self, articles):
+        """
+        Articles with their received date normalized to ISO, the ones without a valid
+        date are left out
+        """
+        valid = {}
+        for custom_id, article in articles.items():
+            received_date = self.normalize_received_date(article.get('received_date'))
+            if received_date is None:
+                self.logger.error(f"Batch job: Skipping {article.get('article_url')}, invalid received date {article.get('received_date')!r}.")
+                continue
+            valid[custom_id] = {**article, 'received_date': received_date}
+        return valid
+
+    def create_job(self, articles):
+        """
+        Create and persist a job for already scraped articles
+
+        Args:
+            articles (list): Dicts with article_url, received_date (ISO date, or any format
+                             DataPreprocessor.standardize_date reads), page_source,
+                             page_title and page_content
+
+        Returns:
+            str: Job ID
+        """
+        job_id   = f"batch-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        articles = self._with_valid_dates({f"article-{index}": article for index, article in enumerate(articles)})
+        job      = {
+            'job_id': job_id,
+            'provider': self.llm_processor.SELECTED_LLM.lower(),
+            'model': self.llm_processor.LLM_MODEL,
+            'status': JOB_CREATED,
+            'provider_batch_id': None,
+            'created_at': datetime.now().isoformat(),
+            'articles': articles,
+            'responses': {},
+        }
+        self.save(job)
+        self.logger.info(f"Batch job {job_id} created for {len(articles)} articles.")
+        return job_id
+
+    def submit(self, job):
+        # Jobs persisted before the dates were validated at creation are checked again
+        job['articles'] = self._with_valid_dates(job['articles'])
+        prompts         = {}
+        for custom_id, article in job['articles'].items():
+            # Same content reduction as the synchronous path; long articles get one request
+            # per chunk, reduced in collect like the map-reduce of LLM.run_llm
+            chunks = self.llm_processor.content_reducer.reduce(article['page_content']) or [article['page_content']]
+            if len(chunks) == 1:
+                article['chunk_ids'] = [custom_id]
+            else:
+                article['chunk_ids'] = [CHUNK_ID_FORMAT.format(custom_id=custom_id, index=index) for index in range(len(chunks))]
+            for chunk_id, chunk in zip(article['chunk_ids'], chunks):
+                prompts[chunk_id] = self.llm_processor.build_prompt(chunk)
+        job['status']            = JOB_SUBMITTING
+        job['submitting_at']     = time.time()
+        self.save(job)
+        job['provider_batch_id'] = self.backend.submit(job['job_id'], prompts)
+        job['status']            = JOB_SUBMITTED
+        self.save(job)
+        self.logger.info(f"Batch job {job['job_id']} submitted as {job['provider_batch_id']} "
+                         f"({len(prompts)} requests for {len(job['articles'])} articles).")
+
+    def resume_submission(self, job):
+        """
+        Finish the submission of a job interrupted while it was sent: attach the provider
+        batch when it was created, submit the job otherwise
+        """
+        provider_batch_id = self.backend.find(job['job_id'], job.get('submitting_at') or 0)
+        if provider_batch_id is None:
+            self.logger.info(f"Batch job {job['job_id']}: No provider batch was created, submitting it again.")
+            self.submit(job)
+            return
+        job['provider_batch_id'] = provider_batch_id
+        job['status']            = JOB_SUBMITTED
+        self.save(job)
+        self.logger.info(f"Batch job {job['job_id']}: Resumed the provider batch {provider_batch_id}.")
+
+    def poll(self, job):
+        state, responses = self.backend.poll(job['provider_batch_id'])
+        if state != JOB_SUBMITTED:
+            job['status']    = state
+            job['responses'] = responses
+            self.save(job)
+            self.logger.info(f"Batch job {job['job_id']} is {state} with {len(responses)} responses.")
+        return state
+
+    def _reduce_chunks(self, chunk_responses):
+        """
+        Response of an article from the responses of its chunks, merged field by field
+        like the synchronous map-reduce
+        """
+        if len(chunk_responses) == 1:
+            return chunk_responses[0]
+        return self.llm_processor.merge_features(
+            [self.data_preprocessor.clean_and_parse_features(response) for response in chunk_responses]
+        )
+
+    def collect(self, job):
+        """
+        Merge the responses into output.json records
+
+        Returns:
+            list: Article records, in the format produced by Utils.get_features
+        """
+        articles, responses = [], []
+        for custom_id, article in job['articles'].items():
+            chunk_ids       = article.get('chunk_ids') or [custom_id]
+            chunk_responses = [job['responses'][chunk_id] for chunk_id in chunk_ids if job['responses'].get(chunk_id) is not None]
+            if not chunk_responses:
+                self.logger.error(f"Batch job {job['job_id']}: No response for {article['article_url']}.")
+                continue
+            if len(chunk_responses) < len(chunk_ids):
+                self.logger.error(f"Batch job {job['job_id']}: {len(chunk_ids) - len(chunk_responses)} of {len(chunk_ids)} "
+                                  f"chunks have no response for {article['article_url']}.")
+            articles.append(article)
+            responses.append(self._reduce_chunks(chunk_responses))
+
+        # Dates of the whole job are standardized as one column
+        records = []
+        for article, features in zip(articles, self.utils.postprocess_many_features(self.data_preprocessor, responses)):
+            page_document = Document(
+                page_content=article['page_content'],
+                metadata={'source': article.get('page_source'), 'title': article.get('page_title')}
+            )
+            records.append(self.utils.build_article_details(
+                date.fromisoformat(article['received_date']), article['article_url'], page_document, features
+            ))
+        return records
+
+    def run(self, job_id, wait=True):
+        """
+        Drive a job from its persisted state up to completion (resumable)
+
+        Returns:
+            list: Article records once the job completed, None while it is still running
+        """
+        job = self.load(job_id)
+        if job['status'] == JOB_CREATED:
+            self.submit(job)
+        elif job['status'] == JOB_SUBMITTING:
+            self.resume_submission(job)
+        while job['status'] == JOB_SUBMITTED:
+            if self.poll(job) == JOB_SUBMITTED:
+                if not wait:
+                    return None
+                time.sleep(self.poll_interval)
+        if job['status'] == JOB_FAILED:
+            self.logger.error(f"Batch job {job_id} failed on the provider side.")
+            return []
+        return self.collect(job)
+
+    def merge_into(self, job_id, records, result_store, output_json_file=None):
+        """
+        Append the records of a completed job to the result store, only once per job
+        """
+        job = self.load(job_id)
+        if job['status'] == JOB_MERGED:
+            self.logger.info(f"Batch job {job_id} was already merged.")
+            return 0
+        for record in records:
+            result_store.upsert(record)
+        if output_json_file:
+            result_store.export_json(output_json_file)
+        job['status'] = JOB_MERGED
+        self.save(job)
+        return len(records)
+
+
+def main(argv=None):
+    from llm import LLM
+    from scrapper import ArticleScrapper
+    from result_store import ResultStore
+
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s       - %(message)s [%(filename)s:%(lineno)d]',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Offline article extraction through the provider Batch APIs")
+    parser.add_argument("command", choices=["create", "run", "list"])
+    parser.add_argument("--input", help="CSV with article_url and received_date columns (create)")
+    parser.add_argument("--job-id", help="Job to run or resume (run)")
+    parser.add_argument("--llm", default=os.getenv("BATCH_LLM", "OpenAI"))
+    parser.add_argument("--model", default=os.getenv("BATCH_LLM_MODEL"))
+    parser.add_argument("--api-key", default=os.getenv("BATCH_LLM_API_KEY"))
+    parser.add_argument("--base-url", default=os.getenv("BATCH_LLM_BASE_URL"))
+    parser.add_argument("--no-wait", action="store_true", help="Poll once instead of waiting for completion")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), '..', 'output', 'output.json'))
+    args = parser.parse_args(argv)
+
+    llm_processor = LLM(logger, args.llm, args.model, args.api_key)
+    runner        = BatchJobRunner(logger, llm_processor, DataPreprocessor(logger), base_url=args.base_url)
+
+    if args.command == "list":
+        for job_id in runner.list_jobs():
+            print(job_id, runner.load(job_id)['status'])
+        return 0
+
+    if args.command == "create":
+        import csv
+        article_scrapper = ArticleScrapper(logger)
+        articles         = []
+        with open(args.input, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                document = article_scrapper.extract_web_content(row['article_url'])
+                if not document:
+                    logger.error(f"Skipping {row['article_url']}, no content could be extracted.")
+                    continue
+                articles.append({
+                    'article_url': row['article_url'],
+                    'received_date': row['received_date'],
+                    'page_source': document.metadata.get('source'),
+                    'page_title': document.metadata.get('title'),
+                    'page_content': document.page_content,
+                })
+        print(runner.create_job(articles))
+        return 0
+
+    records = runner.run(args.job_id, wait=not args.no_wait)
+    if records is None:
+        print(f"{args.job_id} is still running")
+        return 0
+    result_store = ResultStore(logger, legacy_json_file=args.output)
+    print(f"{runner.merge_into(args.job_id, records, result_store, output_json_file=args.output)} records merged into {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import os
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from utils import normalize_url
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'cache')
+
+
+class PageCache:
+    """
+    Persistent, content-addressed cache of scraped pages.
+
+    Each page is stored as one gzipped JSON file named after the hash of its normalized
+    URL. An entry keeps the raw HTML, the cleaned text produced by extract_content_*,
+    the page title and the HTTP validators (ETag/Last-Modified) of the response.
+    Entries younger than `ttl` are served without any network access, older entries
+    are revalidated with a conditional request and entries older than `max_age` are
+    evicted.
+    """
+    def __init__(self, logger, cache_dir=None, ttl=30 * 24 * 3600, max_age=90 * 24 * 3600):
+        """
+        Args:
+            logger: Application logger
+            cache_dir (str): Directory holding the cache files
+            ttl (int): Seconds an entry is served without revalidation
+            max_age (int): Seconds after which an entry is evicted
+        """
+        self.logger    = logger
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'pages')
+        self.ttl       = ttl
+        self.max_age   = max_age
+        self._lock     = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.evict_expired()
+        self.logger.info(f"PageCache instance initialized at {self.cache_dir}.")
+
+    def _path(self, url):
+        key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def _read(self, path):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"PageCache: Dropping unreadable entry {path}: {e}")
+            self._remove(path)
+            return None
+
+    def _write(self, path, entry):
+        # Write to a temporary file first so a crash never leaves a truncated entry, named after
+        # the process and the thread since several workers can share the cache directory
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, url):
+        """
+        Get the cache entry of a URL, fresh or stale
+
+        Returns:
+            dict: The cache entry, None when the URL is not cached or the entry was evicted
+        """
+        path  = self._path(url)
+        entry = self._read(path)
+        if entry is None:
+            return None
+        if time.time() - entry.get('fetched_at', 0) > self.max_age:
+            self._remove(path)
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry.get('fetched_at', 0) <= self.ttl
+
+    def validators(self, entry):
+        """
+        Conditional request headers to revalidate a stale entry
+        """
+        headers = {}
+        if entry and entry.get('html'):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, html, text, title=None, etag=None, last_modified=None, strategy=None):
+        """
+        Store a scraped page
+        """
+        entry = {
+            'url': url,
+            'normalized_url': normalize_url(url),
+            'fetched_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'strategy': strategy,
+            'title': title,
+            'html': html,
+            'text': text,
+        }
+        try:
+            self._write(self._path(url), entry)
+        except Exception as e:
+            self.logger.error(f"PageCache: Error writing entry for {url}: {e}", exc_info=True)
+
+    def touch(self, url, entry):
+        """
+        Mark an entry as fresh again after a 304 Not Modified response
+        """
+        entry['fetched_at'] = time.time()
+        try:
+            self._write(self._path(url), entry)
+        except Exception as e:
+            self.logger.error(f"PageCache: Error refreshing entry for {url}: {e}", exc_info=True)
+
+    def seed_from_records(self, records):
+        """
+        Import the page content already stored in output.json records as text-only entries
+
+        Args:
+            records (iterable): Processed article records
+
+        Returns:
+            int: Number of imported entries
+        """
+        imported = 0
+        for record in records:
+            url  = record.get('article_url')
+            text = record.get('page_content')
+            if not url or not text or os.path.exists(self._path(url)):
+                continue
+            self.put(url, None, text, title=record.get('page_title'), strategy='import')
+            imported += 1
+        if imported:
+            self.logger.info(f"PageCache: Imported {imported} pages from the processed articles.")
+        return imported
+
+    def evict_expired(self):
+        """
+        Remove the entries older than max_age
+        """
+        with self._lock:
+            now     = time.time()
+            evicted = 0
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    age = now - os.path.getmtime(path)
+                    # Leftover temporary files of interrupted writes are dropped as well
+                    if age > self.max_age or (name.endswith('.tmp') and age > 3600):
+                        self._remove(path)
+                        evicted += 1
+                except FileNotFoundError:
+                    continue
+            if evicted:
+                self.logger.info(f"PageCache: Evicted {evicted} expired entries.")
+            return evicted
+
+
+class LLMResponseCache:
+    """
+    Persistent memoization layer in front of LLM.run_llm.
+
+    Responses are keyed on a hash of the page content, the provider, the model name and
+    the prompt template version, and kept in a SQLite table bounded to `max_entries`
+    with least recently used eviction.
+    """
+    def __init__(self, logger, cache_dir=None, max_entries=5000):
+        """
+        Args:
+            logger: Application logger
+            cache_dir (str): Directory holding the cache database
+            max_entries (int): Maximum number of cached responses
+        """
+        self.logger      = logger
+        self.max_entries = max(1, int(max_entries))
+        self.hits        = 0
+        self.misses      = 0
+        self._lock       = threading.Lock()
+        cache_dir        = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path     = os.path.join(cache_dir, 'llm_responses.sqlite3')
+        self._conn       = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT,
+                    model TEXT,
+                    prompt_version TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used)")
+        self.logger.info(f"LLMResponseCache instance initialized at {self.db_path}.")
+
+    @staticmethod
+    def make_key(content, provider, model, prompt_version):
+        digest = hashlib.sha256()
+        for part in (provider.lower(), model, str(prompt_version), content):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached response and mark it as recently used
+
+        Returns:
+            str: The cached LLM response, None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response, provider, model, prompt_version):
+        """
+        Store an LLM response, evicting the least recently used entries beyond max_entries
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider.lower(), model, str(prompt_version), response, now, now)
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'size': size}
@@ -0,0 +1,179 @@
+import re
+
+try:
+    import tiktoken
+except ImportError:  # Optional, a character based estimate is used without it
+    tiktoken = None
+
+# Input token budget for the article content, matched on the longest model name prefix
+MODEL_TOKEN_BUDGETS = {
+    'gpt-3.5-turbo': 12000,
+    'gpt-4': 6000,
+    'gpt-4-turbo': 24000,
+    'gpt-4o': 24000,
+    'gpt-4.1': 24000,
+    'o1': 24000,
+    'o3': 24000,
+    'gemini': 24000,
+}
+DEFAULT_TOKEN_BUDGET = 6000
+
+# Sentences matching any of these are cookie banners, menus, share widgets and footers (© is
+# not a word character, so it stays out of the \b group)
+BOILERPLATE_PATTERN = re.compile(
+    r"\b(?:cookies?|privacy policy|terms of (?:use|service)|all rights reserved|subscribe|newsletter|"
+    r"sign (?:in|up)|log ?in|create an account|share (?:on|this)|follow us|advertisement|"
+    r"enable javascript|accept all|manage (?:preferences|consent)|skip to (?:main )?content|"
+    r"related (?:articles|stories)|read more|click here|download the app|copyright)|©",
+    re.IGNORECASE
+)
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[^a-z])')
+WORD_PATTERN           = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)?")
+
+# Sentences longer than this without any punctuation are link lists (menus, tag clouds)
+MAX_UNPUNCTUATED_WORDS = 40
+# Bodies shorter than this are probably a fragment of the article
+MIN_BODY_LENGTH        = 400
+CHARS_PER_TOKEN        = 4
+
+
+class ContentReducer:
+    """
+    Pre-LLM content reduction.
+
+    The scraped page text still contains cookie banners, menus and footers. The main
+    article body is found by scoring every sentence on its text density (positive for
+    prose, negative for boilerplate and link lists) and keeping the contiguous run of
+    sentences with the highest total score. The body is then split into chunks that
+    fit the token budget of the model.
+    """
+    def __init__(self, logger, llm_model=None, token_budget=None):
+        """
+        Args:
+            logger: Application logger
+            llm_model (str): Model name, used to pick the token budget and tokenizer
+            token_budget (int): Overrides the per-model token budget
+        """
+        self.logger       = logger
+        self.llm_model    = llm_model or ''
+        self.token_budget = token_budget or self.model_token_budget(self.llm_model)
+        self._encoding    = self._load_encoding(self.llm_model)
+
+    @staticmethod
+    def model_token_budget(llm_model):
+        llm_model = (llm_model or '').lower()
+        prefixes  = [prefix for prefix in MODEL_TOKEN_BUDGETS if llm_model.startswith(prefix)]
+        if not prefixes:
+            return DEFAULT_TOKEN_BUDGET
+        return MODEL_TOKEN_BUDGETS[max(prefixes, key=len)]
+
+    def _load_encoding(self, llm_model):
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(llm_model)
+        except Exception:
+            return tiktoken.get_encoding("cl100k_base")
+
+    def estimate_tokens(self, text):
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // CHARS_PER_TOKEN + 1
+
+    def split_sentences(self, text):
+        return [sentence.strip() for sentence in SENTENCE_SPLIT_PATTERN.split(text) if sentence.strip()]
+
+    def score_sentence(self, sentence):
+        """
+        Text density score of a sentence: its word count for prose, minus its word count
+        for boilerplate and link lists
+        """
+        words = WORD_PATTERN.findall(sentence)
+        if not words:
+            return -1
+        if BOILERPLATE_PATTERN.search(sentence):
+            return -len(words)
+        # Menus are long runs of capitalized links without any sentence punctuation
+        capitalized = sum(1 for word in words if word[0].isupper()) / len(words)
+        if len(words) > MAX_UNPUNCTUATED_WORDS and not re.search(r'[.!?,;:]', sentence):
+            return -len(words)
+        if len(words) > 8 and capitalized > 0.8:
+            return -len(words)
+        return len(words)
+
+    def extract_main_body(self, text):
+        """
+        Keep the contiguous run of sentences with the highest text density score
+
+        Args:
+            text (str): Scraped page text
+
+        Returns:
+            str: Main article body
+        """
+        sentences = self.split_sentences(text or '')
+        if not sentences:
+            return ''
+        # Maximum sum subarray over the sentence scores
+        best_score, best_start, best_end = float('-inf'), 0, 0
+        run_score, run_start = 0, 0
+        for index, sentence in enumerate(sentences):
+            if run_score <= 0:
+                run_score, run_start = 0, index
+            run_score += self.score_sentence(sentence)
+            if run_score > best_score:
+                best_score, best_start, best_end = run_score, run_start, index + 1
+        if best_score <= 0:
+            # Nothing looks like prose, better send everything than nothing
+            return ' '.join(sentences)
+        body = ' '.join(sentences[best_start:best_end])
+        if len(body) < MIN_BODY_LENGTH:
+            # Too short to be the whole article: only drop the boilerplate sentences
+            return ' '.join(sentence for sentence in sentences if self.score_sentence(sentence) > 0)
+        return body
+
+    def chunk(self, text, token_budget=None):
+        """
+        Split text at sentence boundaries into chunks that fit the token budget
+        """
+        token_budget = token_budget or self.token_budget
+        if self.estimate_tokens(text) <= token_budget:
+            return [text]
+        chunks, current, current_tokens = [], [], 0
+        for sentence in self.split_sentences(text):
+            sentence_tokens = self.estimate_tokens(sentence)
+            # Sentences longer than the budget are hard split
+            while sentence_tokens > token_budget:
+                cut = len(sentence) * token_budget // sentence_tokens
+                if current:
+                    chunks.append(' '.join(current))
+                    current, current_tokens = [], 0
+                chunks.append(sentence[:cut])
+                sentence        = sentence[cut:]
+                sentence_tokens = self.estimate_tokens(sentence)
+            if current and current_tokens + sentence_tokens > token_budget:
+                chunks.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += sentence_tokens
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    def reduce(self, text):
+        """
+        Main article body split into chunks that fit the token budget
+
+        Args:
+            text (str): Scraped page text
+
+        Returns:
+            list: One or more chunks of the main article body
+        """
+        body   = self.extract_main_body(text)
+        chunks = self.chunk(body)
+        self.logger.info(
+            f"Content reduced from {self.estimate_tokens(text or '')} to {self.estimate_tokens(body)} tokens "
+            f"in {len(chunks)} chunk(s) (budget {self.token_budget})."
+        )
+        return chunks
@@ -0,0 +1,192 @@
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+from page_readiness import BLOCKED_URL_PATTERNS
+from metrics import get_metrics
+
+# Content settings that keep images and media from being downloaded at all (2 = block)
+BLOCKED_CONTENT_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+
+# The chromedriver binary is resolved once per process and shared by every pool
+_driver_path      = None
+_driver_path_lock = threading.Lock()
+
+
+def resolve_driver_path(logger):
+    """
+    Resolve (download if needed) the chromedriver binary once and cache its path
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+            logger.info(f"Chrome driver resolved at {_driver_path}.")
+    return _driver_path
+
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver       = driver
+        self.pages_served = 0
+
+
+class DriverPool:
+    """
+    Pool of warm headless Chrome instances shared across articles and Streamlit reruns.
+
+    Browsers are borrowed for one page and given back afterwards. A browser is recycled
+    once it has served `max_pages` pages, when it fails a health check or when the page
+    load raised an error.
+    """
+    def __init__(self, logger, size=4, max_pages=50, borrow_timeout=120, metrics=None):
+        """
+        Args:
+            logger: Application logger
+            size (int): Maximum number of live browsers
+            max_pages (int): Pages served by a browser before it is recycled
+            borrow_timeout (int): Seconds to wait for a free browser
+            metrics (Metrics): Registry of the browser startup and borrow timings
+        """
+        self.logger         = logger
+        self.size           = max(1, int(size))
+        self.max_pages      = max(1, int(max_pages))
+        self.borrow_timeout = borrow_timeout
+        self._idle          = queue.LifoQueue()
+        self._live          = 0
+        self._lock          = threading.Lock()
+        self._closed        = False
+        self.metrics        = metrics or get_metrics()
+        atexit.register(self.close)
+        self.logger.info(f"DriverPool instance initialized with {self.size} browsers.")
+
+    def _create_driver(self):
+        # Setup Chrome options
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")  # Run in background
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+        chrome_options.add_experimental_option("prefs", BLOCKED_CONTENT_PREFS)
+        # Return after DOMContentLoaded, the scrapper waits for the article body itself
+        chrome_options.page_load_strategy = "eager"
+        # Setup the webdriver
+        driver = webdriver.Chrome(
+            service=Service(resolve_driver_path(self.logger)),
+            options=chrome_options
+        )
+        try:
+            # Fonts and media are not covered by the content settings
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)})
+        except Exception:
+            self.logger.warning("Could not block fonts and media through the DevTools protocol.", exc_info=True)
+        self.logger.info("CHROME DRIVER IS READY.")
+        return PooledDriver(driver)
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            self.logger.warning("Error closing chrome driver.", exc_info=True)
+        with self._lock:
+            self._live -= 1
+
+    def _is_healthy(self, pooled):
+        try:
+            # Any round trip to the browser fails once the session has crashed
+            pooled.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """
+        Borrow a browser from the pool, starting a new one if the pool is not full yet
+        """
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._live < self.size
+                    if can_create:
+                        self._live += 1
+                if can_create:
+                    try:
+                        with self.metrics.span("chrome_startup"):
+                            return self._create_driver()
+                    except Exception:
+                        with self._lock:
+                            self._live -= 1
+                        raise
+                try:
+                    pooled = self._idle.get(timeout=self.borrow_timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No chrome driver became available within {self.borrow_timeout} seconds.")
+            if self._is_healthy(pooled):
+                return pooled
+            self.logger.warning("Discarding unhealthy chrome driver.")
+            self._quit(pooled)
+
+    def release(self, pooled, broken=False):
+        """
+        Give a browser back to the pool, recycling it when it is worn out or broken
+        """
+        pooled.pages_served += 1
+        if self._closed or broken or pooled.pages_served >= self.max_pages:
+            self.logger.info(f"Recycling chrome driver after {pooled.pages_served} pages.")
+            self._quit(pooled)
+            return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a browser for the duration of a `with` block
+        """
+        with self.metrics.span("browser_acquire"):
+            pooled = self.acquire()
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(pooled)
+        self.logger.info("Chrome driver pool closed successfully.")
+
+
+_default_pool      = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool(logger):
+    """
+    Process wide pool used by scrappers that are not given one explicitly
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool(logger)
+    return _default_pool
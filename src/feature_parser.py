@@ -0,0 +1,226 @@
+import re
+import json
+import threading
+from ast import literal_eval
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard json decoder is used without it
+    orjson = None
+
+# The 11 fields extracted from every article, all plain strings
+FEATURE_FIELDS = (
+    'article_date', 'country', 'region', 'project_title', 'sector',
+    'china_key_leaders_groups', 'country_key_leaders_groups',
+    'date', 'from', 'recipient', 'amount',
+)
+# Misspelled keys seen in model output
+FIELD_ALIASES = {
+    'artical_date': 'article_date',
+    'dimpfel_classifiation': 'dimpfel_classification',
+}
+
+CODE_FENCE_PATTERN     = re.compile(r'```(?:json|JSON)?')
+TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+PYTHON_LITERALS        = re.compile(r'\b(True|False|None)\b')
+PYTHON_LITERAL_VALUES  = {'True': 'true', 'False': 'false', 'None': 'null'}
+SMART_QUOTES           = str.maketrans({'“': '"', '”': '"'})
+KEY_PATTERN            = re.compile(r'[^a-z0-9]+')
+
+# Parse outcomes counted per model
+PARSED   = "parsed"
+REPAIRED = "repaired"
+FAILED   = "failed"
+
+_parse_stats      = {}
+_parse_stats_lock = threading.Lock()
+
+
+class FeatureParseError(ValueError):
+    pass
+
+
+def count_parse(model, outcome):
+    with _parse_stats_lock:
+        stats = _parse_stats.setdefault(model or 'unknown', {PARSED: 0, REPAIRED: 0, FAILED: 0})
+        stats[outcome] += 1
+
+
+def parse_stats():
+    """
+    Parse outcomes per model: {model: {"parsed": n, "repaired": n, "failed": n}}
+    """
+    with _parse_stats_lock:
+        return {model: dict(stats) for model, stats in _parse_stats.items()}
+
+
+def _decode(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _json_span(text):
+    # The outermost object or array, models sometimes add a sentence around it
+    starts = [index for index in (text.find('{'), text.find('[')) if index != -1]
+    if not starts:
+        return text
+    start = min(starts)
+    end   = text.rfind('}' if text[start] == '{' else ']')
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _repair_unquoted(segment):
+    # Python literals and trailing commas, only ever outside of strings
+    segment = PYTHON_LITERALS.sub(lambda match: PYTHON_LITERAL_VALUES[match.group(1)], segment)
+    return TRAILING_COMMA_PATTERN.sub(r'\1', segment)
+
+
+def _repair_tokens(text):
+    """
+    Turn single quoted strings into JSON strings, leaving apostrophes inside double
+    quoted strings alone, and repair the text between strings: Python literals and
+    trailing commas. String values are kept as is ("None of the above" stays).
+    """
+    output, unquoted, quote, index = [], [], None, 0
+    while index < len(text):
+        char = text[index]
+        if quote is None:
+            if char in ('"', "'"):
+                quote = char
+                output.append(_repair_unquoted(''.join(unquoted)))
+                output.append('"')
+                unquoted = []
+            else:
+                unquoted.append(char)
+        elif char == '\\' and index + 1 < len(text):
+            following = text[index + 1]
+            # \' is not a JSON escape
+            output.append("'" if following == "'" else char + following)
+            index += 1
+        elif char == quote:
+            quote = None
+            output.append('"')
+        elif char == '"':
+            output.append('\\"')
+        else:
+            output.append(char)
+        index += 1
+    output.append(_repair_unquoted(''.join(unquoted)))
+    return ''.join(output)
+
+
+def repair_json(text):
+    """
+    Local repairs of the usual model output defects: code fences, surrounding text,
+    smart quotes, single quotes, Python literals and trailing commas
+    """
+    text = CODE_FENCE_PATTERN.sub('', text).translate(SMART_QUOTES)
+    text = _json_span(text.strip())
+    return _repair_tokens(text)
+
+
+def _loads(text):
+    try:
+        return _decode(text), PARSED
+    except (TypeError, ValueError):
+        pass
+    try:
+        return _decode(repair_json(text)), REPAIRED
+    except (TypeError, ValueError):
+        pass
+    try:
+        # Python dict reprs with nested quotes the repair could not fix
+        return literal_eval(CODE_FENCE_PATTERN.sub('', text).strip()), REPAIRED
+    except (TypeError, ValueError, SyntaxError, MemoryError, RecursionError):
+        raise FeatureParseError(f"Model output is not valid JSON: {text[:100]!r}")
+
+
+def loads(text, model=None):
+    """
+    Decode model output as JSON, repairing it locally when it is not valid as is
+
+    Args:
+        text (str): Raw model output
+        model (str): Model that produced it, for the parse counters
+
+    Returns:
+        The decoded JSON value
+
+    Raises:
+        FeatureParseError: When the output cannot be repaired locally
+    """
+    try:
+        value, outcome = _loads(text)
+    except FeatureParseError:
+        count_parse(model, FAILED)
+        raise
+    count_parse(model, outcome)
+    return value
+
+
+def coerce_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (list, tuple)):
+        return ', '.join(coerce_value(item) for item in value if coerce_value(item))
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def normalize_key(key):
+    key = KEY_PATTERN.sub('_', str(key).strip().lower()).strip('_')
+    return FIELD_ALIASES.get(key, key)
+
+
+def validate_features(data):
+    """
+    Validate and coerce decoded model output against the 11-field schema: keys are
+    normalized ("Article Date" -> article_date), missing fields are empty strings and
+    every value is a string. Extra fields are kept, coerced the same way.
+
+    Raises:
+        FeatureParseError: When the output is not an object holding any schema field
+    """
+    if isinstance(data, list) and len(data) == 1:
+        data = data[0]
+    if not isinstance(data, dict):
+        raise FeatureParseError(f"Model output is a {type(data).__name__}, not an object")
+    features = {normalize_key(key): coerce_value(value) for key, value in data.items()}
+    if not any(field in features for field in FEATURE_FIELDS):
+        raise FeatureParseError(f"Model output has none of the expected fields: {sorted(features)[:5]}")
+    # Schema fields first, in schema order
+    return {**{field: features.pop(field, '') for field in FEATURE_FIELDS}, **features}
+
+
+def parse_features(response, model=None):
+    """
+    Strict parsing of an extraction response into the 11-field schema
+
+    Args:
+        response (str or dict): Raw model output, or an already decoded object
+        model (str): Model that produced it, for the parse counters
+
+    Returns:
+        dict: Validated features
+
+    Raises:
+        FeatureParseError: When the output cannot be repaired locally
+    """
+    if isinstance(response, dict):
+        return validate_features(response)
+    try:
+        if not isinstance(response, str) or not response.strip():
+            raise FeatureParseError("Empty model output")
+        value, outcome = _loads(response)
+        features       = validate_features(value)
+    except FeatureParseError:
+        count_parse(model, FAILED)
+        raise
+    count_parse(model, outcome)
+    return features
@@ -0,0 +1,174 @@
+import re
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # Optional, fastest back end
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+    import lxml.etree
+except ImportError:  # Optional, fast back end
+    lxml = None
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # Pure Python fallback
+    BeautifulSoup = None
+
+BACKEND_SELECTOLAX = "selectolax"
+BACKEND_LXML       = "lxml"
+BACKEND_BS4        = "bs4"
+# Preferred first
+BACKENDS = (BACKEND_SELECTOLAX, BACKEND_LXML, BACKEND_BS4)
+
+# Tags that never hold article text
+PRUNED_TAGS = ("script", "style", "head", "title", "meta", "nav", "noscript", "template", "svg", "iframe")
+# Main content containers, most specific first
+MAIN_CONTENT_SELECTORS = ("article", "main", "[role=main]")
+# A main content container holding less text than this is a teaser, the whole body is used
+MIN_MAIN_CONTENT_LENGTH = 500
+
+# <meta> name/property -> metadata key, first match wins
+META_FIELDS = {
+    'description': 'description',
+    'og:description': 'description',
+    'author': 'author',
+    'article:author': 'author',
+    'article:published_time': 'published_time',
+    'date': 'published_time',
+    'pubdate': 'published_time',
+    'og:site_name': 'site_name',
+    'og:url': 'canonical_url',
+    'og:title': 'og_title',
+}
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def available_backends():
+    installed = {
+        BACKEND_SELECTOLAX: SelectolaxParser is not None,
+        BACKEND_LXML: lxml is not None,
+        BACKEND_BS4: BeautifulSoup is not None,
+    }
+    return [backend for backend in BACKENDS if installed[backend]]
+
+
+def clean_text(text):
+    return WHITESPACE_PATTERN.sub(' ', text or '').strip()
+
+
+class ExtractedPage:
+    def __init__(self, text, title=None, metadata=None):
+        self.text     = text
+        self.title    = title
+        self.metadata = metadata or {}
+
+
+class HtmlExtractor:
+    """
+    HTML to article text extraction shared by the requests and Selenium scrapers.
+
+    The page is parsed once with the fastest installed back end (selectolax, then lxml,
+    then BeautifulSoup with html.parser). The title and <meta> metadata are read before
+    the non-content tags are pruned, then the text of the main content container
+    (<article>, <main>) is kept, or the whole body when there is none.
+    """
+    def __init__(self, logger, backend=None):
+        """
+        Args:
+            logger: Application logger
+            backend (str): Forces a back end ("selectolax", "lxml" or "bs4")
+        """
+        self.logger  = logger
+        backends     = available_backends()
+        if not backends:
+            raise ImportError("No HTML parser installed, install selectolax, lxml or beautifulsoup4")
+        if backend is not None and backend not in backends:
+            raise ValueError(f"HTML back end '{backend}' is not installed, available: {', '.join(backends)}")
+        self.backend = backend or backends[0]
+
+    def extract(self, html):
+        """
+        Parse a page and extract its article text, title and metadata
+
+        Args:
+            html (str): Page HTML
+
+        Returns:
+            ExtractedPage: Text, title and metadata of the page
+        """
+        if not html or not html.strip():
+            return ExtractedPage('')
+        if self.backend == BACKEND_SELECTOLAX:
+            title, meta, body_text, main_text = self._extract_selectolax(html)
+        elif self.backend == BACKEND_LXML:
+            title, meta, body_text, main_text = self._extract_lxml(html)
+        else:
+            title, meta, body_text, main_text = self._extract_bs4(html)
+
+        metadata = {}
+        for name, content in meta:
+            key = META_FIELDS.get((name or '').lower())
+            if key and content and key not in metadata:
+                metadata[key] = content.strip()
+        og_title = metadata.pop('og_title', None)
+        title    = clean_text(title) or og_title
+
+        body_text = clean_text(body_text)
+        main_text = clean_text(main_text)
+        text      = main_text if len(main_text) >= MIN_MAIN_CONTENT_LENGTH else body_text
+        return ExtractedPage(text, title=title, metadata=metadata)
+
+    def _extract_selectolax(self, html):
+        tree  = SelectolaxParser(html)
+        node  = tree.css_first('title')
+        title = node.text(strip=True) if node else None
+        meta  = [(node.attributes.get('name') or node.attributes.get('property'), node.attributes.get('content'))
+                 for node in tree.css('meta')]
+        tree.strip_tags(list(PRUNED_TAGS))
+        root      = tree.body or tree.root
+        body_text = root.text(separator=' ', strip=True) if root else ''
+        main_text = ''
+        for selector in MAIN_CONTENT_SELECTORS:
+            node = tree.css_first(selector)
+            if node is not None:
+                main_text = node.text(separator=' ', strip=True)
+                break
+        return title, meta, body_text, main_text
+
+    def _extract_lxml(self, html):
+        # Bytes input, lxml rejects str documents carrying an encoding declaration
+        root  = lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+        title = root.findtext('.//title')
+        meta  = [(node.get('name') or node.get('property'), node.get('content')) for node in root.iter('meta')]
+        for node in list(root.iter(lxml.etree.Comment, *PRUNED_TAGS)):
+            if node.getparent() is not None:
+                # drop_tree keeps the tail text that follows the tag
+                node.drop_tree()
+        body      = root.find('body')
+        body_text = ' '.join((body if body is not None else root).itertext())
+        main_text = ''
+        for path in ('.//article', './/main', ".//*[@role='main']"):
+            node = root.find(path)
+            if node is not None:
+                main_text = ' '.join(node.itertext())
+                break
+        return title, meta, body_text, main_text
+
+    def _extract_bs4(self, html):
+        soup  = BeautifulSoup(html, 'html.parser')
+        title = soup.title.get_text() if soup.title else None
+        meta  = [(node.get('name') or node.get('property'), node.get('content')) for node in soup.find_all('meta')]
+        for node in soup(list(PRUNED_TAGS)):
+            node.decompose()
+        root      = soup.body or soup
+        body_text = root.get_text(separator=' ', strip=True)
+        main_text = ''
+        for selector in MAIN_CONTENT_SELECTORS:
+            node = soup.select_one(selector)
+            if node is not None:
+                main_text = node.get_text(separator=' ', strip=True)
+                break
+        return title, meta, body_text, main_text
@@ -0,0 +1,102 @@
+import threading
+import requests
+from urllib.parse import urlparse
+from collections import defaultdict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+class HttpClient:
+    """
+    Shared HTTP fetch layer for ArticleScrapper.
+
+    A single keep-alive connection pool is reused for every article. Requests are capped
+    globally and per host so a batch of URLs can be fetched in parallel without hammering
+    any single publisher, and every request has connect/read timeouts and retries with
+    exponential backoff.
+    """
+    def __init__(self, logger, max_connections=32, max_per_host=4, connect_timeout=5, read_timeout=20,
+                 retries=3, backoff_factor=0.5, verify=True):
+        """
+        Args:
+            logger: Application logger
+            max_connections (int): Global cap on concurrent requests (and pooled connections)
+            max_per_host (int): Cap on concurrent requests to the same host
+            connect_timeout (float): Seconds to wait for the connection
+            read_timeout (float): Seconds to wait between bytes of the response
+            retries (int): Retries on connection errors, read errors and retryable status codes
+            backoff_factor (float): Base of the exponential backoff between retries
+            verify (bool): Verify TLS certificates
+        """
+        self.logger          = logger
+        self.max_connections = max(1, int(max_connections))
+        self.max_per_host    = max(1, int(max_per_host))
+        self.timeout         = (connect_timeout, read_timeout)
+        self.verify          = verify
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.max_connections, pool_maxsize=self.max_connections, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._global_slots = threading.BoundedSemaphore(self.max_connections)
+        self._host_slots   = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+        self._hosts_lock   = threading.Lock()
+        self.logger.info(f"HttpClient instance initialized.")
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._hosts_lock:
+            return self._host_slots[host]
+
+    def get(self, url, headers=None):
+        """
+        GET a URL through the shared pool, honouring the per-host and global caps
+
+        Args:
+            url (str): URL to download
+            headers (dict): Extra request headers
+
+        Returns:
+            requests.Response: The response, status errors are left to the caller
+        """
+        # Host slot first so a busy host does not hold global slots while it waits
+        with self._host_slot(url):
+            with self._global_slots:
+                return self.session.get(url, headers=headers, timeout=self.timeout, verify=self.verify)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client      = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client(logger):
+    """
+    Process wide client used by scrappers that are not given one explicitly
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient(logger)
+    return _default_client
@@ -0,0 +1,184 @@
+import io
+import os
+import email
+import openpyxl
+import pandas as pd
+from email import policy
+from email.utils import parsedate_to_datetime
+from datetime import date, datetime
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils import Utils, unwrap_redirect_url, normalize_url
+from scrapper import ArticleScrapper
+
+URL_COLUMN            = 'article_url'
+RECEIVED_COLUMN       = 'received_date'
+RECEIVED_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%Y/%m/%d", "%d %B %Y", "%d %b %Y")
+
+
+class ArticleIngestor:
+    """
+    Streaming input sources for the extraction pipeline.
+
+    Each back end yields (article_url, received_date) rows one by one, so large uploads
+    never have to be loaded as a whole: CSV files are read in chunks, Excel workbooks in
+    read-only mode and .eml files part by part (HTML and text bodies plus attachments).
+    """
+    def __init__(self, logger, chunksize=1000):
+        self.logger    = logger
+        self.chunksize = chunksize
+        self.utils     = Utils(logger)
+
+    def iter_rows(self, uploaded_file, default_date=None):
+        """
+        Dispatch an uploaded file to its back end based on its extension
+
+        Args:
+            uploaded_file: Uploaded file (file-like object with a name)
+            default_date (date): Received date of rows that do not carry one
+
+        Yields:
+            tuple: (article_url, received_date)
+        """
+        default_date = default_date or date.today()
+        extension    = os.path.splitext(uploaded_file.name)[1].lower()
+        if extension == '.csv':
+            yield from self.iter_csv(uploaded_file, default_date)
+        elif extension in ('.xlsx', '.xlsm'):
+            yield from self.iter_excel(uploaded_file, default_date)
+        elif extension == '.eml':
+            yield from self.iter_eml(uploaded_file, default_date)
+        elif extension == '.pdf':
+            yield from self.iter_pdf(uploaded_file.read(), default_date)
+        else:
+            raise ValueError(f"Unsupported input file: {uploaded_file.name}")
+
+    def parse_received_date(self, value, default_date):
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return default_date
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        value = str(value).strip()
+        if not value:
+            return default_date
+        for fmt in RECEIVED_DATE_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        try:
+            return pd.to_datetime(value, dayfirst=True).date()
+        except (ValueError, OverflowError):
+            self.logger.warning(f"Ingest: Unparseable received date '{value}', using {default_date}.")
+            return default_date
+
+    def _clean_url(self, value):
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return None
+        url = str(value).strip()
+        if not url.lower().startswith(('http://', 'https://')):
+            return None
+        return unwrap_redirect_url(url)
+
+    def iter_csv(self, file, default_date):
+        """
+        Read a CSV with article_url and received_date columns in chunks
+        """
+        reader = pd.read_csv(file, chunksize=self.chunksize, dtype=str, keep_default_na=False,
+                             usecols=lambda column: column.strip().lower() in (URL_COLUMN, RECEIVED_COLUMN))
+        for chunk in reader:
+            chunk.columns = [column.strip().lower() for column in chunk.columns]
+            if URL_COLUMN not in chunk.columns:
+                raise ValueError(f"CSV file has no '{URL_COLUMN}' column")
+            dates = chunk[RECEIVED_COLUMN] if RECEIVED_COLUMN in chunk.columns else [None] * len(chunk)
+            for url, received_date in zip(chunk[URL_COLUMN], dates):
+                url = self._clean_url(url)
+                if url:
+                    yield url, self.parse_received_date(received_date, default_date)
+
+    def iter_excel(self, file, default_date):
+        """
+        Read the first sheet of a workbook row by row in read-only mode
+        """
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows   = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(cell).strip().lower() if cell is not None else '' for cell in next(rows, ())]
+            if URL_COLUMN not in header:
+                raise ValueError(f"Excel file has no '{URL_COLUMN}' column")
+            url_index  = header.index(URL_COLUMN)
+            date_index = header.index(RECEIVED_COLUMN) if RECEIVED_COLUMN in header else None
+            for row in rows:
+                url = self._clean_url(row[url_index] if url_index < len(row) else None)
+                if not url:
+                    continue
+                received_date = row[date_index] if date_index is not None and date_index < len(row) else None
+                yield url, self.parse_received_date(received_date, default_date)
+        finally:
+            workbook.close()
+
+    def iter_eml(self, file, default_date):
+        """
+        Read the article links of an Outlook/RFC 822 email: hyperlinks of the HTML body,
+        URLs of the text body and the rows of PDF, CSV and Excel attachments. A link found
+        in several parts of the message is only yielded once.
+        """
+        message = email.message_from_binary_file(file, policy=policy.default)
+        try:
+            received_date = parsedate_to_datetime(message['Date']).date() if message['Date'] else default_date
+        except (TypeError, ValueError):
+            received_date = default_date
+
+        # multipart/alternative bodies hold the same links as HTML and as text
+        seen = set()
+        for url, url_received_date in self._iter_message_urls(message, received_date):
+            key = normalize_url(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield url, url_received_date
+
+    def _iter_message_urls(self, message, received_date):
+        for part in message.walk():
+            if part.is_multipart():
+                continue
+            filename     = part.get_filename()
+            content_type = part.get_content_type()
+            if filename:
+                yield from self._iter_attachment(part, filename, received_date)
+            elif content_type == 'text/html':
+                for url in self._html_urls(part.get_content()):
+                    yield url, received_date
+            elif content_type == 'text/plain':
+                # extract_urls already unwraps the redirect wrappers
+                for url in self.utils.extract_urls(part.get_content()):
+                    yield url, received_date
+
+    def _html_urls(self, html):
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('a'))
+        for anchor in soup.find_all('a', href=True):
+            url = self._clean_url(anchor['href'])
+            if url:
+                yield url
+
+    def _iter_attachment(self, part, filename, received_date):
+        extension = os.path.splitext(filename)[1].lower()
+        payload   = part.get_payload(decode=True)
+        if not payload:
+            return
+        if extension == '.pdf':
+            yield from self.iter_pdf(payload, received_date)
+        elif extension == '.csv':
+            yield from self.iter_csv(io.BytesIO(payload), received_date)
+        elif extension in ('.xlsx', '.xlsm'):
+            yield from self.iter_excel(io.BytesIO(payload), received_date)
+        elif extension == '.eml':
+            yield from self.iter_eml(io.BytesIO(payload), received_date)
+        else:
+            self.logger.info(f"Ingest: Skipping attachment {filename}.")
+
+    def iter_pdf(self, pdf_bytes, received_date):
+        for url in ArticleScrapper(self.logger).iter_pdf_urls(pdf_bytes):
+            yield url, received_date
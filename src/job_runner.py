@@ -0,0 +1,507 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import logging
+import sqlite3
+import threading
+import multiprocessing
+from datetime import date, datetime
+
+DEFAULT_JOBS_DB  = os.path.join(os.path.dirname(__file__), '..', 'output', 'jobs.sqlite3')
+OUTPUT_JSON_FILE = os.path.join(os.path.dirname(__file__), '..', 'output', 'output.json')
+
+# Job states
+JOB_QUEUED      = "queued"
+JOB_RUNNING     = "running"
+JOB_COMPLETED   = "completed"
+JOB_CANCELLED   = "cancelled"
+JOB_INTERRUPTED = "interrupted"
+JOB_FAILED      = "failed"
+ACTIVE_STATES   = (JOB_QUEUED, JOB_RUNNING)
+
+# Article states
+ITEM_PENDING    = "pending"
+ITEM_IN_FLIGHT  = "in_flight"
+ITEM_DONE       = "done"
+ITEM_SKIPPED    = "skipped"
+ITEM_FAILED     = "failed"
+# Articles a resumed job runs again
+UNFINISHED_ITEM_STATES = (ITEM_PENDING, ITEM_IN_FLIGHT)
+# output.json is exported during a job every that many stored articles
+EXPORT_EVERY_ARTICLES  = 25
+
+
+class JobStore:
+    """
+    Persisted job table of the background extraction jobs.
+
+    A job is a batch of (article_url, received_date) rows with its pipeline settings.
+    Every article has its own row, the batch manifest: pending, in flight (picked up by
+    a worker), done, skipped or failed, updated by the worker as soon as the article
+    starts and finishes. The UI streams the progress and results of a job by its ID
+    from any Streamlit session or rerun, and an interrupted job resumes with only its
+    unfinished (pending and in flight) articles. API keys are never stored.
+    """
+    def __init__(self, logger, db_path=None):
+        """
+        Args:
+            logger: Application logger
+            db_path (str): SQLite database file
+        """
+        self.logger  = logger
+        self.db_path = db_path or DEFAULT_JOBS_DB
+        self._lock   = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn   = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    settings TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    worker_pid INTEGER,
+                    owner_pid INTEGER,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL,
+                    item_index INTEGER NOT NULL,
+                    article_url TEXT NOT NULL,
+                    received_date TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    article_details TEXT,
+                    error TEXT,
+                    finished_at REAL,
+                    metrics TEXT,
+                    PRIMARY KEY (job_id, item_index)
+                )
+            """)
+            self._migrate()
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_items_finished ON job_items (job_id, finished_at)")
+
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        if 'metrics' not in columns:
+            # Job tables created before the per-article metrics
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN metrics TEXT")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'worker_pid' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN worker_pid INTEGER")
+        if 'owner_pid' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+
+    def create_job(self, rows, settings):
+        """
+        Persist a new queued job, owned by the calling process (whose JobRunner queue holds it)
+
+        Args:
+            rows (iterable): (article_url, received_date) pairs
+            settings (dict): LLM and pipeline settings, without the API key
+
+        Returns:
+            str: Job ID
+        """
+        job_id = f"job-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        items  = [(job_id, index, str(article_url), _date_to_iso(received_date), ITEM_PENDING)
+                  for index, (article_url, received_date) in enumerate(rows)]
+        now    = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO jobs (job_id, status, settings, total, owner_pid, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (job_id, JOB_QUEUED, json.dumps(settings), len(items), os.getpid(), now, now))
+            self._conn.executemany("INSERT INTO job_items (job_id, item_index, article_url, received_date, status) VALUES (?, ?, ?, ?, ?)",
+                                   items)
+        self.logger.info(f"JobStore: Created {job_id} with {len(items)} articles.")
+        return job_id
+
+    def set_status(self, job_id, status, error=None):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                               (status, error, time.time(), job_id))
+
+    def claim(self, job_id, worker_pid):
+        """
+        Mark a job running in a worker process, so it is known to be orphaned if that process dies
+        """
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = ?, worker_pid = ?, updated_at = ? WHERE job_id = ?",
+                               (JOB_RUNNING, worker_pid, time.time(), job_id))
+
+    def requeue(self, job_id):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = ?, cancel_requested = 0, error = NULL, owner_pid = ?, updated_at = ? WHERE job_id = ?",
+                               (JOB_QUEUED, os.getpid(), time.time(), job_id))
+
+    def request_cancel(self, job_id):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def cancel_requested(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def mark_interrupted(self):
+        """
+        Jobs left queued or running by a process that is gone will never be picked up again,
+        they wait for an explicit resume. A running job belongs to its worker process and a
+        queued one to the process whose queue holds it, so the jobs of another live process
+        sharing the database (a second Streamlit server, workers outliving a restart) are
+        left alone.
+
+        Returns:
+            list: IDs of the interrupted jobs
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT job_id, status, worker_pid, owner_pid FROM jobs WHERE status IN ({', '.join('?' * len(ACTIVE_STATES))})",
+                ACTIVE_STATES
+            ).fetchall()
+            stale = [job_id for job_id, status, worker_pid, owner_pid in rows
+                     if not _pid_alive(worker_pid if status == JOB_RUNNING else owner_pid)]
+            self._conn.executemany("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                                   [(JOB_INTERRUPTED, time.time(), job_id) for job_id in stale])
+        return stale
+
+    def mark_orphaned(self, live_pids):
+        """
+        Running jobs whose worker process died are interrupted, they wait for a resume
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT job_id, worker_pid FROM jobs WHERE status = ?", (JOB_RUNNING,)).fetchall()
+            orphaned = [job_id for job_id, worker_pid in rows if worker_pid not in live_pids]
+            self._conn.executemany("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                                   [(JOB_INTERRUPTED, time.time(), job_id) for job_id in orphaned])
+        return orphaned
+
+    def unfinished_items(self, job_id):
+        """
+        Articles of a job still to run: never started, or in flight when the job stopped
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT item_index, article_url, received_date FROM job_items WHERE job_id = ? "
+                f"AND status IN ({', '.join('?' * len(UNFINISHED_ITEM_STATES))}) ORDER BY item_index",
+                (job_id, *UNFINISHED_ITEM_STATES)
+            ).fetchall()
+        return [(index, article_url, date.fromisoformat(received_date)) for index, article_url, received_date in rows]
+
+    def start_item(self, job_id, item_index):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE job_items SET status = ? WHERE job_id = ? AND item_index = ? AND status = ?",
+                               (ITEM_IN_FLIGHT, job_id, item_index, ITEM_PENDING))
+
+    def finish_item(self, job_id, item_index, status, article_details=None, error=None, metrics=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_items SET status = ?, article_details = ?, error = ?, finished_at = ?, metrics = ? WHERE job_id = ? AND item_index = ?",
+                (status, json.dumps(article_details) if article_details is not None else None, error, time.time(),
+                 json.dumps(metrics) if metrics is not None else None, job_id, item_index)
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def get_job(self, job_id):
+        """
+        Job status and per-state article counts
+
+        Returns:
+            dict: The job, None for unknown job IDs
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, status, settings, total, cancel_requested, error, created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        job = dict(zip(('job_id', 'status', 'settings', 'total', 'cancel_requested', 'error', 'created_at', 'updated_at'), row))
+        job['settings'] = json.loads(job['settings'])
+        job['counts']   = {status: counts.get(status, 0) for status in (ITEM_PENDING, ITEM_IN_FLIGHT, ITEM_DONE, ITEM_SKIPPED, ITEM_FAILED)}
+        job['finished'] = job['total'] - sum(job['counts'][status] for status in UNFINISHED_ITEM_STATES)
+        return job
+
+    def finished_items(self, job_id, since=0):
+        """
+        Articles of a job finished after `since` (a finished_at timestamp), oldest first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_index, article_url, status, article_details, error, finished_at, metrics FROM job_items "
+                "WHERE job_id = ? AND finished_at > ? ORDER BY finished_at, item_index",
+                (job_id, since)
+            ).fetchall()
+        return [{
+            'index': index, 'article_url': article_url, 'status': status,
+            'article_details': json.loads(details) if details else None, 'error': error, 'finished_at': finished_at,
+            'metrics': json.loads(metrics) if metrics else None,
+        } for index, article_url, status, details, error, finished_at, metrics in rows]
+
+    def list_jobs(self, limit=20):
+        with self._lock:
+            rows = self._conn.execute("SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [row[0] for row in rows]
+
+
+def _pid_alive(pid):
+    """
+    Whether a process of this machine is still running, False for a missing PID
+    """
+    if not pid:
+        return False
+    if os.name == 'nt':
+        import ctypes
+        # PROCESS_QUERY_LIMITED_INFORMATION, os.kill would terminate the process on Windows
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running under another user
+        return True
+    return True
+
+
+def _date_to_iso(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, 'date'):  # pandas Timestamp
+        return value.date().isoformat()
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+
+class JobRunner:
+    """
+    Local queue of background extraction jobs served by worker processes.
+
+    The UI submits a batch and gets a job ID back right away; each worker process runs
+    one job at a time through the ExtractionPipeline and records every article in the
+    JobStore as soon as it is finished. Jobs survive Streamlit reruns and several jobs
+    run at once, one per worker.
+    """
+    def __init__(self, logger, workers=2, db_path=None):
+        """
+        Args:
+            logger: Application logger
+            workers (int): Number of worker processes, i.e. of jobs running at once
+            db_path (str): SQLite database of the job table
+        """
+        self.logger   = logger
+        self.store    = JobStore(logger, db_path=db_path)
+        interrupted   = self.store.mark_interrupted()
+        if interrupted:
+            self.logger.info(f"JobRunner: {len(interrupted)} jobs of a previous run are waiting to be resumed.")
+        # Worker processes do not inherit the Streamlit threads and state
+        self._context = multiprocessing.get_context("spawn")
+        self._queue   = self._context.Queue()
+        self._workers = [self._start_worker(i) for i in range(max(1, int(workers)))]
+        self._lock    = threading.Lock()
+        atexit.register(self.close)
+        self.logger.info(f"JobRunner instance initialized with {len(self._workers)} worker processes.")
+
+    def submit(self, rows, settings, api_key):
+        """
+        Queue a batch of articles
+
+        Args:
+            rows (iterable): (article_url, received_date) pairs
+            settings (dict): selected_llm, llm_model and the pipeline settings
+            api_key (str): LLM API key, only handed to the worker
+
+        Returns:
+            str: Job ID
+        """
+        job_id = self.store.create_job(rows, settings)
+        self._queue.put((job_id, api_key))
+        return job_id
+
+    def resume(self, job_id, api_key):
+        """
+        Queue the unfinished (pending and in flight) articles of an interrupted, cancelled
+        or failed job again, articles already done are not extracted twice
+        """
+        job = self.store.get_job(job_id)
+        if job is None or job['status'] in ACTIVE_STATES:
+            return False
+        self.store.requeue(job_id)
+        self._queue.put((job_id, api_key))
+        return True
+
+    def cancel(self, job_id):
+        self.store.request_cancel(job_id)
+
+    def _start_worker(self, number):
+        worker = self._context.Process(target=_worker_main, args=(self._queue, self.store.db_path),
+                                       name=f"job-worker-{number}", daemon=True)
+        worker.start()
+        return worker
+
+    def check_workers(self):
+        """
+        Replace dead worker processes and interrupt the jobs they were running, so those
+        jobs can be resumed instead of showing as running forever
+
+        Returns:
+            list: IDs of the interrupted jobs
+        """
+        with self._lock:
+            for number, worker in enumerate(self._workers):
+                if not worker.is_alive():
+                    self.logger.warning(f"JobRunner: {worker.name} exited with code {worker.exitcode}, restarting it.")
+                    self._workers[number] = self._start_worker(number)
+            orphaned = self.store.mark_orphaned({worker.pid for worker in self._workers})
+        for job_id in orphaned:
+            self.logger.warning(f"JobRunner: {job_id} lost its worker process and is waiting to be resumed.")
+        return orphaned
+
+    def close(self):
+        for worker in self._workers:
+            if worker.is_alive():
+                self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+
+
+def _worker_main(task_queue, db_path):
+    """
+    Worker process: runs queued jobs one at a time until it gets the None sentinel
+    """
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s       - %(message)s [%(filename)s:%(lineno)d]',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    store  = JobStore(logger, db_path=db_path)
+    worker = JobWorker(logger, store)
+    while True:
+        task = task_queue.get()
+        if task is None:
+            return
+        job_id, api_key = task
+        worker.run_job(job_id, api_key)
+
+
+class JobWorker:
+    """
+    Runs jobs inside a worker process, on components shared by the jobs of the process
+    """
+    def __init__(self, logger, store):
+        self.logger      = logger
+        self.store       = store
+        self._components = None
+
+    def components(self):
+        if self._components is None:
+            # Imported here, the parent process does not need the scraping stack
+            from driver_pool import DriverPool
+            from http_client import HttpClient
+            from cache import PageCache, LLMResponseCache
+            from result_store import ResultStore
+            self._components = {
+                'driver_pool': DriverPool(self.logger, size=int(os.getenv("CHROME_POOL_SIZE", 4)), max_pages=int(os.getenv("CHROME_MAX_PAGES", 50))),
+                'http_client': HttpClient(self.logger, max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 32)), max_per_host=int(os.getenv("HTTP_MAX_PER_HOST", 4))),
+                'page_cache': PageCache(self.logger, ttl=int(os.getenv("PAGE_CACHE_TTL", 30 * 24 * 3600))),
+                'llm_response_cache': LLMResponseCache(self.logger, max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))),
+                'result_store': ResultStore(self.logger, legacy_json_file=OUTPUT_JSON_FILE),
+            }
+        return self._components
+
+    def run_job(self, job_id, api_key):
+        from llm_router import build_llm
+        from pipeline import ExtractionPipeline
+        from scrapper import ArticleScrapper
+        from utils import DataPreprocessor
+        from metrics import get_metrics
+
+        metrics = get_metrics()
+        job     = self.store.get_job(job_id)
+        if job is None or job['status'] != JOB_QUEUED:
+            return
+        if job['cancel_requested']:
+            self.store.set_status(job_id, JOB_CANCELLED)
+            return
+        self.store.claim(job_id, os.getpid())
+        settings = job['settings']
+        try:
+            components    = self.components()
+            result_store  = components['result_store']
+            llm_processor = build_llm(self.logger, settings['selected_llm'], settings['llm_model'], api_key,
+                                      response_cache=components['llm_response_cache'])
+
+            def scrapper_factory():
+                return ArticleScrapper(self.logger, driver_pool=components['driver_pool'], http_client=components['http_client'],
+                                       page_cache=components['page_cache'])
+
+            pipeline = ExtractionPipeline(self.logger, scrapper_factory, llm_processor, DataPreprocessor(self.logger),
+                                          fetch_workers=settings.get('fetch_workers', 4), llm_workers=settings.get('llm_workers', 4),
+                                          llm_batch_size=settings.get('llm_batch_size', 1), result_store=result_store,
+                                          refresh=settings.get('refresh', False))
+            pending   = self.store.unfinished_items(job_id)
+            indexes   = [index for index, _, _ in pending]
+            results   = pipeline.run([(article_url, received_date) for _, article_url, received_date in pending],
+                                     on_start=lambda index: self.store.start_item(job_id, indexes[index]))
+            cancelled = False
+            stored    = 0
+            for result in results:
+                item_index = indexes[result.index]
+                if not result.ok:
+                    self.store.finish_item(job_id, item_index, ITEM_FAILED, error=result.error, metrics=result.metrics.as_dict())
+                elif result.skipped:
+                    self.store.finish_item(job_id, item_index, ITEM_SKIPPED, article_details=result.article_details,
+                                           metrics=result.metrics.as_dict())
+                else:
+                    with metrics.track(result.metrics):
+                        result_store.upsert(result.article_details)
+                    self.store.finish_item(job_id, item_index, ITEM_DONE, article_details=result.article_details,
+                                           metrics=result.metrics.as_dict())
+                    stored += 1
+                    if stored % EXPORT_EVERY_ARTICLES == 0:
+                        # output.json keeps up with a long job, the store itself is durable per article
+                        self._export(result_store)
+                if self.store.cancel_requested(job_id):
+                    # Closing the result generator stops the pipeline workers
+                    results.close()
+                    cancelled = True
+                    break
+            self.store.set_status(job_id, JOB_CANCELLED if cancelled else JOB_COMPLETED)
+            self.logger.info(f"Job {job_id} {'cancelled' if cancelled else 'completed'}.")
+        except Exception as e:
+            self.logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            self.store.set_status(job_id, JOB_FAILED, error=str(e))
+        finally:
+            result_store = (self._components or {}).get('result_store')
+            if result_store is not None:
+                self._export(result_store)
+            try:
+                metrics.write_prometheus()
+            except OSError:
+                self.logger.error("Metrics file could not be written.", exc_info=True)
+
+    def _export(self, result_store):
+        if not result_store.dirty:
+            return
+        try:
+            result_store.export_json(OUTPUT_JSON_FILE)
+        except OSError:
+            self.logger.error("Output JSON File could not be written.", exc_info=True)
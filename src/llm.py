@@ -1,12 +1,119 @@
 import os
-from openai import OpenAI
+import json
+import asyncio
+import weakref
+import threading
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import google.generativeai as genai
+import google.ai.generativelanguage as glm
+from concurrent.futures import ThreadPoolExecutor
+
+from content_reducer import ContentReducer
+from metrics import get_metrics
+from rate_limiter import get_rate_limiter, COMPLETION_TOKEN_ESTIMATE
+from utils import DataPreprocessor
+from feature_parser import parse_features, validate_features, loads, FeatureParseError
 
 load_dotenv()
 
+# Bump whenever the prompt template changes so cached responses of the old prompt are not reused
+PROMPT_VERSION = "2"
+
+# Fields that can hold several values; they are unioned when merging per-chunk extractions
+MULTI_VALUE_FIELDS = ('china_key_leaders_groups', 'country_key_leaders_groups')
+# Maximum number of chunks of one long article extracted in parallel
+MAX_CHUNK_WORKERS  = 4
+# Default cap on the number of articles packed into one batched request
+MAX_BATCH_ARTICLES = 8
+
+# Long-lived provider clients shared by every LLM instance of the process (and Streamlit reruns)
+_clients       = {}
+# Async clients are bound to the event loop they were created on, they are kept per loop
+# and go away with it
+_async_clients = weakref.WeakKeyDictionary()
+_clients_lock  = threading.Lock()
+
+
+def _loop_client(key, factory):
+    """
+    Async client of the running event loop, created by factory on first use
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        for closed_loop in [cached_loop for cached_loop in _async_clients if cached_loop.is_closed()]:
+            del _async_clients[closed_loop]
+        clients = _async_clients.setdefault(loop, {})
+        if key not in clients:
+            clients[key] = factory()
+        return clients[key]
+
+
+def get_openai_client(api_key, use_async=False, base_url=None):
+    """
+    OpenAI clients are thread safe and keep their HTTP connection pool, so one client is
+    created per API key and endpoint, and per event loop for async clients. Retries are
+    left to the RateLimiter, which backs off across callers.
+    """
+    key = ("openai", api_key, base_url)
+    if use_async:
+        return _loop_client(key, lambda: AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=20, max_retries=0))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = OpenAI(api_key=api_key, base_url=base_url, timeout=20, max_retries=0)
+        return _clients[key]
+
+
+def _gemini_client_options(api_key, base_url):
+    options = {"api_key": api_key}
+    if base_url:
+        options["api_endpoint"] = base_url
+    return options
+
+
+def get_gemini_model(model_name, api_key, base_url=None, use_async=False):
+    """
+    One GenerativeModel per model, API key and endpoint (and event loop for async calls).
+    genai.configure is process wide, so every model gets its own generative service
+    client built from its client options instead: back ends with different keys or
+    endpoints never send with each other's. A base_url (e.g. a local stand-in) is
+    reached through the REST transport.
+    """
+    key = ("gemini", model_name, api_key, base_url)
+    if use_async:
+        return _loop_client(key, lambda: _gemini_model(
+            model_name, api_key, base_url, "_async_client",
+            lambda: glm.GenerativeServiceAsyncClient(client_options=_gemini_client_options(api_key, base_url))))
+    with _clients_lock:
+        if key not in _clients:
+            transport     = {"transport": "rest"} if base_url else {}
+            _clients[key] = _gemini_model(
+                model_name, api_key, base_url, "_client",
+                lambda: glm.GenerativeServiceClient(client_options=_gemini_client_options(api_key, base_url), **transport),
+                **transport)
+        return _clients[key]
+
+
+def _gemini_model(model_name, api_key, base_url, client_attribute, client_factory, **configure_options):
+    """
+    GenerativeModel sending with its own client. The SDK has no public per-model client
+    option: GenerativeModel keeps its client in the private `_client` / `_async_client`
+    attributes (google-generativeai 0.8.3, pinned in requirements.txt), left None until
+    the first call, when the process wide genai.configure client is taken. If the SDK no
+    longer has the attribute, a plain GenerativeModel on the configured client is used,
+    and back ends with different keys or endpoints share the last configuration.
+    """
+    model = genai.GenerativeModel(model_name)
+    if hasattr(model, client_attribute) and getattr(model, client_attribute) is None:
+        setattr(model, client_attribute, client_factory())
+        return model
+    genai.configure(api_key=api_key, client_options=_gemini_client_options(api_key, base_url), **configure_options)
+    return model
+
+
 class LLM:
-    def __init__(self, logger, selected_llm, llm_model, llm_model_api_key):
+    def __init__(self, logger, selected_llm, llm_model, llm_model_api_key, response_cache=None, content_reducer=None, base_url=None,
+                 metrics=None, rate_limiter=None):
         self.logger         = logger
         # self.OPENAI_MODEL   = os.getenv("OPENAI_MODEL")
         # self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -15,9 +122,21 @@ class LLM:
         self.LLM_MODEL          = llm_model
         self.LLM_MODEL_API_KEY  = llm_model_api_key
         self.SELECTED_LLM       = selected_llm
+        # Alternative provider endpoint (proxy, compatible server or local stand-in)
+        self.base_url           = base_url
+        # Optional LLMResponseCache, identical extractions are answered without calling the provider
+        self.response_cache     = response_cache
+        # Trims the page content to the article body and splits it to the model token budget
+        self.content_reducer    = content_reducer or ContentReducer(logger, llm_model)
+        # Call timings, token usage, cache hits, retries and parse failures
+        self.metrics            = metrics or get_metrics()
+        # Requests and tokens per minute budgets of the provider model, shared by every instance
+        self.rate_limiter       = rate_limiter or get_rate_limiter(logger, selected_llm, llm_model)
+        # Parses the responses of the chunks of long articles before they are merged
+        self.data_preprocessor  = DataPreprocessor(logger, self.metrics)
         self.logger.info(f"{selected_llm} LLM instance initialized.")
-    
-    def run_llm(self, news_page_content):
+
+    def build_prompt(self, news_page_content):
         prompt = f"""
 
         You are a helpful AI news expert and you need to extract the following information from the news article:
@@ -44,6 +163,23 @@ class LLM:
             - Do not wrap the json codes in JSON markers:
         EXPECTED OUTPUT:
         {{
+            "article_date": "",
+            "country": "",
+            "region": "",
+            "project_title": "",
+            "sector": "",
+            "china_key_leaders_groups": "",
+            "country_key_leaders_groups": "",
+            "date": "",
+            "from": "",
+            "recipient": "",
+            "amount": ""
+        }}
+        """
+        return prompt
+
+    def empty_features(self):
+        return {
             'article_date': '',
             'country': '',
             'region': '',
@@ -55,38 +191,447 @@ class LLM:
             'from': '',
             'recipient': '',
             'amount': ''
-        }}
+        }
+
+    def _cache_key(self, news_page_content):
+        if not self.response_cache:
+            return None
+        return self.response_cache.make_key(news_page_content, self.SELECTED_LLM, self.LLM_MODEL, PROMPT_VERSION)
+
+    def _cached_response(self, cache_key):
+        if not cache_key:
+            return None
+        features = self.response_cache.get(cache_key)
+        self.metrics.inc("llm_cache", result="miss" if features is None else "hit")
+        if features is not None:
+            self.logger.info(f"{self.SELECTED_LLM.upper()} LLM Response served from cache.")
+        return features
+
+    def _store_response(self, cache_key, features):
+        self.logger.debug(f"{self.SELECTED_LLM.upper()} LLM Response: {features}")
+        if cache_key:
+            self.response_cache.put(cache_key, json.dumps(features, ensure_ascii=False), self.SELECTED_LLM, self.LLM_MODEL, PROMPT_VERSION)
+
+    def extract(self, prompt):
         """
-        
+        Run an extraction prompt in JSON mode and parse its output into the 11-field
+        schema. The model is only asked again when the output cannot be repaired locally.
+
+        Returns:
+            dict: Validated features
+        """
+        try:
+            return parse_features(self.complete(prompt, json_mode=True), model=self.LLM_MODEL)
+        except FeatureParseError as e:
+            self._count_parse_retry(e)
+        try:
+            return parse_features(self.complete(prompt, json_mode=True), model=self.LLM_MODEL)
+        except FeatureParseError:
+            self.metrics.inc("parse_failures", component="llm")
+            raise
+
+    async def aextract(self, prompt):
+        """
+        Async counterpart of extract
+        """
+        try:
+            return parse_features(await self.acomplete(prompt, json_mode=True), model=self.LLM_MODEL)
+        except FeatureParseError as e:
+            self._count_parse_retry(e)
+        try:
+            return parse_features(await self.acomplete(prompt, json_mode=True), model=self.LLM_MODEL)
+        except FeatureParseError:
+            self.metrics.inc("parse_failures", component="llm")
+            raise
+
+    def _count_parse_retry(self, error):
+        self.logger.warning(f"{self.SELECTED_LLM.upper()} LLM output could not be parsed, retrying once: {error}")
+        self.metrics.inc("parse_failures", component="llm")
+        self.metrics.inc("retries", component="llm_parse")
+
+    def _count_tokens(self, response):
+        """
+        Token usage reported by the provider: OpenAI usage, Gemini usage_metadata
+        """
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            tokens_in, tokens_out = getattr(usage, 'prompt_tokens', 0), getattr(usage, 'completion_tokens', 0)
+        else:
+            usage = getattr(response, 'usage_metadata', None)
+            tokens_in, tokens_out = getattr(usage, 'prompt_token_count', 0), getattr(usage, 'candidates_token_count', 0)
+        provider = self.SELECTED_LLM.lower()
+        self.metrics.inc("llm_tokens", tokens_in or 0, provider=provider, direction="in")
+        self.metrics.inc("llm_tokens", tokens_out or 0, provider=provider, direction="out")
+        return (tokens_in or 0) + (tokens_out or 0)
+
+    def _estimate_tokens(self, prompt):
+        return self.content_reducer.estimate_tokens(prompt) + COMPLETION_TOKEN_ESTIMATE
+
+    def _json_mode_options(self, json_mode):
+        """
+        Provider structured output options: OpenAI JSON mode, Gemini JSON MIME type
+        """
+        if not json_mode:
+            return {}
+        if self.SELECTED_LLM.lower()=="openai":
+            return {"response_format": {"type": "json_object"}}
+        return {"generation_config": {"response_mime_type": "application/json"}}
+
+    def complete(self, prompt, json_mode=False):
+        """
+        Send a prompt to the selected provider and return the raw text response. The call
+        waits for its turn in the provider rate limits and transient errors are retried
+        with backoff.
+
+        Args:
+            prompt (str): Prompt to send
+            json_mode (bool): Ask the provider for a single JSON object
+        """
+        tokens = self._estimate_tokens(prompt)
+        if self.SELECTED_LLM.lower()=="openai":
+            client = get_openai_client(self.LLM_MODEL_API_KEY, base_url=self.base_url)
+
+            def send():
+                with self.metrics.span("llm_call", provider="openai"):
+                    raw = client.chat.completions.with_raw_response.create(
+                        model=self.LLM_MODEL,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        **self._json_mode_options(json_mode)
+                    )
+                self.rate_limiter.update_from_headers(raw.headers)
+                return raw.parse()
+
+            response = self.rate_limiter.call(send, tokens)
+            self.rate_limiter.settle(tokens, self._count_tokens(response))
+            return response.choices[0].message.content
+        if self.SELECTED_LLM.lower()=="gemini":
+            model = get_gemini_model(self.LLM_MODEL, self.LLM_MODEL_API_KEY, base_url=self.base_url)
+
+            def send():
+                with self.metrics.span("llm_call", provider="gemini"):
+                    return model.generate_content(prompt, **self._json_mode_options(json_mode))
+
+            response = self.rate_limiter.call(send, tokens)
+            self.rate_limiter.settle(tokens, self._count_tokens(response))
+            return response.candidates[0].content.parts[0].text
+        raise ValueError(f"Unsupported LLM: {self.SELECTED_LLM}")
+
+    async def acomplete(self, prompt, json_mode=False):
+        """
+        Async counterpart of complete, many extractions share one connection pool
+        """
+        tokens = self._estimate_tokens(prompt)
+        if self.SELECTED_LLM.lower()=="openai":
+            client = get_openai_client(self.LLM_MODEL_API_KEY, use_async=True, base_url=self.base_url)
+
+            async def send():
+                with self.metrics.span("llm_call", provider="openai"):
+                    raw = await client.chat.completions.with_raw_response.create(
+                        model=self.LLM_MODEL,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        **self._json_mode_options(json_mode)
+                    )
+                self.rate_limiter.update_from_headers(raw.headers)
+                return raw.parse()
+
+            response = await self.rate_limiter.acall(send, tokens)
+            self.rate_limiter.settle(tokens, self._count_tokens(response))
+            return response.choices[0].message.content
+        if self.SELECTED_LLM.lower()=="gemini":
+            model = get_gemini_model(self.LLM_MODEL, self.LLM_MODEL_API_KEY, base_url=self.base_url, use_async=True)
+
+            async def send():
+                with self.metrics.span("llm_call", provider="gemini"):
+                    return await model.generate_content_async(prompt, **self._json_mode_options(json_mode))
+
+            response = await self.rate_limiter.acall(send, tokens)
+            self.rate_limiter.settle(tokens, self._count_tokens(response))
+            return response.candidates[0].content.parts[0].text
+        raise ValueError(f"Unsupported LLM: {self.SELECTED_LLM}")
+
+    def merge_features(self, chunk_features):
+        """
+        Reduce the per-chunk field dicts of a long article into the single 11-field schema.
+        The first non-empty value wins, except for multi value fields which are unioned.
+        """
+        merged = self.empty_features()
+        for field in merged:
+            values = []
+            for features in chunk_features:
+                value = str(features.get(field) or '').strip()
+                if value and value not in values:
+                    values.append(value)
+            if values:
+                merged[field] = ', '.join(values) if field in MULTI_VALUE_FIELDS else values[0]
+        return merged
+
+    def _run_chunk(self, news_page_content, strict=False):
+        cache_key = self._cache_key(news_page_content)
+        features  = self._cached_response(cache_key)
+        if features is not None:
+            return features
+
+        try:
+            features = self.extract(self.build_prompt(news_page_content))
+            self._store_response(cache_key, features)
+        except Exception as e:
+            if strict:
+                raise
+            self.logger.error(f"Error in extracting the information from the page_content", exc_info=True)
+            features = self.empty_features()
+        return features
+
+    async def _arun_chunk(self, news_page_content):
+        cache_key = self._cache_key(news_page_content)
+        features  = self._cached_response(cache_key)
+        if features is not None:
+            return features
+
         try:
-            if self.SELECTED_LLM.lower()=="openai":            
-                client   = OpenAI(api_key=self.LLM_MODEL_API_KEY, timeout=20, max_retries=3)
-                response = client.chat.completions.create(
-                    model=self.LLM_MODEL,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                features = response.choices[0].message.content
-            if self.SELECTED_LLM.lower()=="gemini":
-                genai.configure(api_key=self.LLM_MODEL_API_KEY)
-                model    = genai.GenerativeModel(self.LLM_MODEL)
-                response = model.generate_content(prompt)
-                features = response.candidates[0].content.parts[0].text
-            self.logger.info(f"{self.SELECTED_LLM.upper()} LLM Response: {features}")
+            features = await self.aextract(self.build_prompt(news_page_content))
+            self._store_response(cache_key, features)
         except Exception as e:
             self.logger.error(f"Error in extracting the information from the page_content", exc_info=True)
-            features = {
-                        'article_date': '',
-                        'country': '',
-                        'region': '',
-                        'project_title': '',
-                        'sector': '',
-                        'china_key_leaders_groups': '',
-                        'country_key_leaders_groups': '',
-                        'date': '',
-                        'from': '',
-                        'recipient': '',
-                        'amount': ''
-                    }
-        return features
\ No newline at end of file
+            features = self.empty_features()
+        return features
+
+    def _reduce_responses(self, responses):
+        return self.merge_features([self.data_preprocessor.clean_and_parse_features(response) for response in responses])
+
+    def run_llm(self, news_page_content, strict=False):
+        """
+        Extract the features of an article
+
+        Args:
+            news_page_content (str): Page content of the article
+            strict (bool): Raise provider and parse errors instead of returning empty
+                features, so a router can fail over to another back end
+        """
+        with self.metrics.span("llm"):
+            # Only the main article body is sent, split to the model token budget
+            chunks = self.content_reducer.reduce(news_page_content)
+            if len(chunks) <= 1:
+                return self._run_chunk(chunks[0] if chunks else news_page_content, strict=strict)
+
+            # Map: extract every chunk, Reduce: merge the per-chunk fields
+            article = self.metrics.current_article()
+
+            def run_chunk(chunk):
+                # Chunk threads count towards the article of the calling thread
+                with self.metrics.track(article):
+                    return self._run_chunk(chunk, strict=strict)
+
+            with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_CHUNK_WORKERS)) as executor:
+                responses = list(executor.map(run_chunk, chunks))
+            return self._reduce_responses(responses)
+
+    async def arun_llm(self, news_page_content):
+        """
+        Async variant of run_llm
+        """
+        chunks = self.content_reducer.reduce(news_page_content)
+        if len(chunks) <= 1:
+            return await self._arun_chunk(chunks[0] if chunks else news_page_content)
+
+        semaphore = asyncio.Semaphore(MAX_CHUNK_WORKERS)
+
+        async def run_one(chunk):
+            async with semaphore:
+                return await self._arun_chunk(chunk)
+
+        responses = await asyncio.gather(*(run_one(chunk) for chunk in chunks))
+        return self._reduce_responses(responses)
+
+    async def arun_llm_many(self, news_page_contents, max_concurrency=8):
+        """
+        Run many extractions concurrently over the shared async connection pool
+
+        Args:
+            news_page_contents (list): Page contents to extract the features from
+            max_concurrency (int): Maximum number of in-flight requests
+
+        Returns:
+            list: LLM responses in the same order as the inputs
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(content):
+            async with semaphore:
+                return await self.arun_llm(content)
+
+        return await asyncio.gather(*(run_one(content) for content in news_page_contents))
+
+    def build_batch_prompt(self, articles):
+        """
+        Prompt extracting the features of several articles in one request
+
+        Args:
+            articles (list): (article_id, page_content) pairs
+        """
+        sections = "\n".join(
+            f"### ARTICLE {article_id}\n{content}\n### END ARTICLE {article_id}\n"
+            for article_id, content in articles
+        )
+        prompt = f"""
+
+        You are a helpful AI news expert and you need to extract the following information from each of the news articles below:
+        
+        1. Article Date
+        2. Country
+        3. Region
+        4. Project Title
+        5. Sector
+        6. China Key Leaders/Groups
+        7. Country Key Leaders/Groups
+        8. Date
+        9. From
+        10. Recipient
+        11. Amount
+        
+        Articles (each one is delimited by ### ARTICLE <id> and ### END ARTICLE <id>):
+        {sections}
+        
+        INSTRUCTION: 
+            - Extract the information of every article independently, only from its own section.
+            - Sector will only be classified any of these: 'Diplomatic', 'Information', 'Military', 'Economic', 'Financial Intelligence', 'Law Enforcement'
+            - For blank values, please provide an empty string only and null is not allowed.
+            - Please provide the final output as a plain JSON array with exactly one object per article, without any markdown or additional text and start with [.
+            - Every object must contain the "id" of its article.
+        EXPECTED OUTPUT:
+        [
+            {{
+                "id": "<article id>",
+                "article_date": "",
+                "country": "",
+                "region": "",
+                "project_title": "",
+                "sector": "",
+                "china_key_leaders_groups": "",
+                "country_key_leaders_groups": "",
+                "date": "",
+                "from": "",
+                "recipient": "",
+                "amount": ""
+            }}
+        ]
+        """
+        return prompt
+
+    def pack_batches(self, articles, max_articles=MAX_BATCH_ARTICLES):
+        """
+        Size-aware packer: fill each request up to the model token budget
+
+        Args:
+            articles (list): (article_id, page_content) pairs
+            max_articles (int): Maximum number of articles per request
+
+        Returns:
+            list: Lists of (article_id, page_content) pairs, one per request
+        """
+        budget  = self.content_reducer.token_budget
+        batches, current, current_tokens = [], [], 0
+        # Largest first packs the budget tighter
+        sized = sorted(((self.content_reducer.estimate_tokens(content), article_id, content) for article_id, content in articles),
+                       key=lambda item: item[0], reverse=True)
+        for tokens, article_id, content in sized:
+            if current and (current_tokens + tokens > budget or len(current) >= max_articles):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((article_id, content))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def parse_batch_response(self, response, article_ids):
+        """
+        Parse the JSON array of a batched request back into per-article field dicts
+
+        Returns:
+            dict: article_id -> field dict, None when the output is malformed or incomplete
+        """
+        try:
+            items = loads(response, model=self.LLM_MODEL)
+        except FeatureParseError:
+            self.logger.warning("Batched LLM response is not valid JSON.")
+            return None
+        if isinstance(items, dict):
+            # Some models wrap the array in an object
+            items = next((value for value in items.values() if isinstance(value, list)), None)
+        if not isinstance(items, list):
+            return None
+        results = {}
+        for item in items:
+            if isinstance(item, dict) and str(item.get('id')) in article_ids:
+                try:
+                    features = validate_features({key: value for key, value in item.items() if key != 'id'})
+                except FeatureParseError:
+                    continue
+                results[str(item['id'])] = features
+        if set(results) != set(article_ids):
+            self.logger.warning(f"Batched LLM response is missing articles: {sorted(set(article_ids) - set(results))}")
+            return None
+        return results
+
+    def _run_batch(self, batch, strict=False):
+        article_ids = [article_id for article_id, _ in batch]
+        try:
+            response = self.complete(self.build_batch_prompt(batch))
+            self.logger.info(f"{self.SELECTED_LLM.upper()} batched LLM Response for {len(batch)} articles.")
+            results  = self.parse_batch_response(response, article_ids)
+        except Exception as e:
+            if strict:
+                raise
+            self.logger.error(f"Error in the batched extraction of {len(batch)} articles", exc_info=True)
+            results = None
+        if results is None:
+            # Malformed batch output: fall back to one request per article
+            self.metrics.inc("parse_failures", component="llm_batch")
+            self.logger.info(f"Falling back to per-article extraction for {len(batch)} articles.")
+            return {article_id: self._run_chunk(content, strict=strict) for article_id, content in batch}
+        for article_id, content in batch:
+            self._store_response(self._cache_key(content), results[article_id])
+        return results
+
+    def run_llm_batch(self, news_page_contents, max_articles=MAX_BATCH_ARTICLES, strict=False):
+        """
+        Extract the features of several articles, packing short articles into shared requests
+        so the instruction block is only paid once per request
+
+        Args:
+            news_page_contents (list): Page contents of the articles
+            max_articles (int): Maximum number of articles per request
+            strict (bool): Raise provider errors instead of returning empty features, so a
+                router can fail over to another back end
+
+        Returns:
+            list: LLM responses (raw text or field dicts) in the same order as the inputs
+        """
+        results = [None] * len(news_page_contents)
+        pending = []
+        for index, news_page_content in enumerate(news_page_contents):
+            chunks = self.content_reducer.reduce(news_page_content)
+            if len(chunks) > 1:
+                # Long articles go through the chunked map-reduce extraction
+                results[index] = self.run_llm(news_page_content, strict=strict)
+                continue
+            content  = chunks[0] if chunks else news_page_content
+            features = self._cached_response(self._cache_key(content))
+            if features is not None:
+                results[index] = features
+                continue
+            pending.append((str(index), content))
+
+        if len(pending) == 1:
+            results[int(pending[0][0])] = self._run_chunk(pending[0][1], strict=strict)
+        elif pending:
+            batches = self.pack_batches(pending, max_articles=max_articles)
+            with ThreadPoolExecutor(max_workers=min(len(batches), MAX_CHUNK_WORKERS)) as executor:
+                for batch_results in executor.map(lambda batch: self._run_batch(batch, strict=strict), batches):
+                    for article_id, features in batch_results.items():
+                        results[int(article_id)] = features
+        return results
@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from llm import LLM
+from metrics import get_metrics
+
+# Latencies kept per back end for the hedging threshold
+LATENCY_WINDOW         = 50
+# Hedge delay until a back end has enough latencies of its own, in seconds
+DEFAULT_HEDGE_AFTER    = 20.0
+MIN_HEDGE_AFTER        = 2.0
+MIN_LATENCY_SAMPLES    = 5
+# Consecutive failures that take a back end out of the rotation, and for how long
+MAX_CONSECUTIVE_ERRORS = 3
+COOLDOWN_SECONDS       = 60
+# Provider API key environment variables of the configured routes
+API_KEY_ENV            = {'openai': 'OPENAI_API_KEY', 'gemini': 'GEMINI_API_KEY'}
+# Concurrent provider calls of all the routers of the process
+ROUTER_MAX_WORKERS     = 32
+
+_executor      = None
+_executor_lock = threading.Lock()
+
+
+def get_router_executor():
+    """
+    Thread pool of the routed calls, shared by every router of the process: a router is
+    built for every single-URL extraction and job, its calls must not leave threads behind
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ROUTER_MAX_WORKERS, thread_name_prefix="llm-router")
+    return _executor
+
+
+class BackendStats:
+    """
+    Latency and error stats of one provider/model
+    """
+    def __init__(self):
+        self.calls              = 0
+        self.errors             = 0
+        self.consecutive_errors = 0
+        self.cooldown_until     = 0.0
+        self.latencies          = deque(maxlen=LATENCY_WINDOW)
+        self._lock              = threading.Lock()
+
+    def available(self, now):
+        return now >= self.cooldown_until
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self.consecutive_errors = 0
+                self.latencies.append(seconds)
+                return
+            self.errors             += 1
+            self.consecutive_errors += 1
+            if self.consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                self.cooldown_until = time.monotonic() + COOLDOWN_SECONDS
+
+    def latency_p95(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            stats     = {
+                'calls': self.calls,
+                'errors': self.errors,
+                'error_rate': round(self.errors / self.calls, 3) if self.calls else 0.0,
+                'p50_s': round(latencies[len(latencies) // 2], 3) if latencies else None,
+                'cooling_down': time.monotonic() < self.cooldown_until,
+            }
+        p95            = self.latency_p95()
+        stats['p95_s'] = round(p95, 3) if p95 is not None else None
+        return stats
+
+
+_backend_stats      = {}
+_backend_stats_lock = threading.Lock()
+
+
+def get_backend_stats(provider, model, api_key):
+    """
+    Stats of a provider/model and API key, shared by the back ends of every router of the
+    process: a router is built for every single-URL extraction and job, on its own it would
+    never see enough calls to adapt its hedge delay or cool a failing back end down
+    """
+    key = (provider.lower(), model, hashlib.sha256((api_key or '').encode('utf-8')).hexdigest())
+    with _backend_stats_lock:
+        if key not in _backend_stats:
+            _backend_stats[key] = BackendStats()
+        return _backend_stats[key]
+
+
+class LLMBackend:
+    """
+    One provider/model of the router with its latency and error stats
+    """
+    def __init__(self, llm, max_article_tokens=None, call_stats=None):
+        """
+        Args:
+            llm (LLM): Provider/model client
+            max_article_tokens (int): Longer articles are sent to the next back ends, by
+                default the model token budget
+            call_stats (BackendStats): Stats shared with other routers, own stats when not given
+        """
+        self.llm                = llm
+        self.name               = f"{llm.SELECTED_LLM.lower()}:{llm.LLM_MODEL}"
+        self.max_article_tokens = max_article_tokens or llm.content_reducer.token_budget
+        self.call_stats         = call_stats or BackendStats()
+
+    def available(self, now):
+        return self.call_stats.available(now)
+
+    def record(self, seconds, ok):
+        self.call_stats.record(seconds, ok)
+
+    def latency_p95(self):
+        return self.call_stats.latency_p95()
+
+    def stats(self):
+        return {'backend': self.name, **self.call_stats.stats()}
+
+
+class LLMRouter:
+    """
+    Routing layer over an ordered list of LLM back ends, used in place of a single LLM.
+
+    Each article goes to the first back end whose token budget fits it, so short
+    articles go to a cheap, fast model and long ones to a long-context model without
+    being chunked. If that call has not answered within the hedge delay (the p95 latency
+    of the back end, or `hedge_after` until enough calls were seen), a backup call is
+    sent to the next back end and the first answer wins. Failed calls fail over to the
+    next back end right away, and a back end failing several times in a row is left out
+    of the rotation for a while.
+    """
+    def __init__(self, logger, backends, hedge_after=None, metrics=None):
+        """
+        Args:
+            logger: Application logger
+            backends (list): LLMBackend in order of preference
+            hedge_after (float): Fixed hedge delay in seconds, adaptive when not given
+            metrics (Metrics): Registry of the routing outcomes
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one back end.")
+        self.logger      = logger
+        self.backends    = list(backends)
+        self.hedge_after = hedge_after
+        self.metrics     = metrics or get_metrics()
+        self._executor   = get_router_executor()
+        # The first back end stands in for the router where a single LLM is expected
+        self.SELECTED_LLM = self.backends[0].llm.SELECTED_LLM
+        self.LLM_MODEL    = self.backends[0].llm.LLM_MODEL
+        self.logger.info(f"LLMRouter instance initialized with back ends {[backend.name for backend in self.backends]}.")
+
+    def empty_features(self):
+        return self.backends[0].llm.empty_features()
+
+    def route(self, news_page_content):
+        """
+        Back ends to try for an article, in order: the ones fitting its size first, back
+        ends cooling down after errors last
+        """
+        tokens    = self.backends[0].llm.content_reducer.estimate_tokens(news_page_content or '')
+        fitting   = [backend for backend in self.backends if tokens <= backend.max_article_tokens]
+        # Articles too long for every back end are chunked by the largest one
+        oversized = sorted((backend for backend in self.backends if backend not in fitting),
+                           key=lambda backend: backend.max_article_tokens, reverse=True)
+        now       = time.monotonic()
+        ordered   = fitting + oversized
+        return [backend for backend in ordered if backend.available(now)] + [backend for backend in ordered if not backend.available(now)]
+
+    def _hedge_delay(self, backend):
+        if self.hedge_after is not None:
+            return self.hedge_after
+        p95 = backend.latency_p95()
+        return max(MIN_HEDGE_AFTER, p95) if p95 is not None else DEFAULT_HEDGE_AFTER
+
+    def _call(self, backend, news_page_content, article):
+        start = time.monotonic()
+        try:
+            with self.metrics.track(article):
+                features = backend.llm.run_llm(news_page_content, strict=True)
+        except Exception:
+            backend.record(time.monotonic() - start, ok=False)
+            raise
+        backend.record(time.monotonic() - start, ok=True)
+        return features
+
+    def run_llm(self, news_page_content):
+        """
+        Extract the features of an article through the routed back ends
+
+        Returns:
+            dict: Features of the first back end to answer, empty features when all failed
+        """
+        candidates = self.route(news_page_content)
+        article    = self.metrics.current_article()
+        in_flight  = {}
+
+        def launch(outcome):
+            backend = candidates.pop(0)
+            future  = self._executor.submit(self._call, backend, news_page_content, article)
+            in_flight[future] = backend
+            self.metrics.inc("llm_route", backend=backend.name, outcome=outcome)
+            return backend
+
+        primary = launch("primary")
+        while in_flight:
+            # Only the primary call is hedged
+            timeout = self._hedge_delay(primary) if len(in_flight) == 1 and candidates and primary in in_flight.values() else None
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                self.logger.info(f"LLMRouter: {primary.name} is slow, hedging with {candidates[0].name}.")
+                launch("hedge")
+                continue
+            for future in done:
+                backend = in_flight.pop(future)
+                try:
+                    features = future.result()
+                except Exception as e:
+                    self.logger.warning(f"LLMRouter: {backend.name} failed: {e}")
+                    if candidates and not in_flight:
+                        launch("failover")
+                    continue
+                self.metrics.inc("llm_route_wins", backend=backend.name)
+                # The losing hedge call finishes in the background, its answer lands in the response cache
+                return features
+        self.logger.error("LLMRouter: Every back end failed for the article.")
+        return self.empty_features()
+
+    def run_llm_batch(self, news_page_contents, max_articles=8):
+        """
+        Batched extraction on the first available back end, articles of a failed batch
+        are routed one by one (hedged and failed over like single articles)
+        """
+        backend = next((backend for backend in self.backends if backend.available(time.monotonic())), self.backends[0])
+        start   = time.monotonic()
+        try:
+            return backend.llm.run_llm_batch(news_page_contents, max_articles=max_articles, strict=True)
+        except Exception as e:
+            # Only failures are recorded, batch latencies would skew the hedge delay of single calls
+            backend.record(time.monotonic() - start, ok=False)
+            self.logger.warning(f"LLMRouter: Batched extraction on {backend.name} failed, routing articles one by one: {e}")
+            # Articles of the batches that did succeed are answered by the response cache
+            return [self.run_llm(news_page_content) for news_page_content in news_page_contents]
+
+    def stats(self):
+        return [backend.stats() for backend in self.backends]
+
+
+def load_routes():
+    """
+    Back ends configured in the LLM_ROUTES environment variable, a JSON list of
+    {"provider", "model", "max_article_tokens" (optional), "api_key_env" (optional)}
+    """
+    routes = os.getenv("LLM_ROUTES")
+    if not routes:
+        return []
+    return json.loads(routes)
+
+
+def build_llm(logger, selected_llm, llm_model, llm_model_api_key, response_cache=None):
+    """
+    The selected LLM, or a router over the LLM_ROUTES back ends when routes are configured.
+    The selected provider/model is kept as the last resort back end. The latency and error
+    stats of the back ends outlive the router, see get_backend_stats.
+    """
+    routes = load_routes()
+    if not routes:
+        return LLM(logger, selected_llm, llm_model, llm_model_api_key, response_cache=response_cache)
+    backends = []
+    for route in routes:
+        provider = route['provider']
+        api_key  = os.getenv(route.get('api_key_env') or API_KEY_ENV.get(provider.lower(), ''))
+        if provider.lower() == selected_llm.lower():
+            api_key = api_key or llm_model_api_key
+        backends.append(LLMBackend(LLM(logger, provider, route['model'], api_key, response_cache=response_cache),
+                                   max_article_tokens=route.get('max_article_tokens'),
+                                   call_stats=get_backend_stats(provider, route['model'], api_key)))
+    if not any(backend.name == f"{selected_llm.lower()}:{llm_model}" for backend in backends):
+        backends.append(LLMBackend(LLM(logger, selected_llm, llm_model, llm_model_api_key, response_cache=response_cache),
+                                   call_stats=get_backend_stats(selected_llm, llm_model, llm_model_api_key)))
+    return LLMRouter(logger, backends, hedge_after=float(os.environ["LLM_HEDGE_AFTER"]) if os.getenv("LLM_HEDGE_AFTER") else None)
@@ -0,0 +1,224 @@
+import os
+import time
+import bisect
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_METRICS_DIR = os.path.join(os.path.dirname(__file__), '..', 'output', 'metrics')
+METRIC_PREFIX       = "news_pipeline"
+# Upper bounds (seconds) of the stage duration histogram buckets
+SPAN_BUCKETS        = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Per-article records kept in memory for the UI
+MAX_RECENT_ARTICLES = 500
+
+
+class ArticleMetrics:
+    """
+    Structured metrics of one article: seconds spent in every stage and its counters.
+    The record follows the article from the fetch worker to the LLM worker.
+    """
+    def __init__(self, article_url):
+        self.article_url = article_url
+        self.stages      = {}
+        self.counters    = {}
+        self.labels      = {}
+
+    def add_stage(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def inc(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        return {
+            'article_url': self.article_url,
+            'stages': {stage: round(seconds, 4) for stage, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+            'labels': dict(self.labels),
+        }
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """
+    Process wide registry of timing spans and counters of the extraction pipeline.
+
+    Spans and counters are aggregated per name and labels for the Prometheus text export,
+    and also added to the ArticleMetrics bound to the current thread (see `track`), which
+    gives the per-article breakdown.
+    """
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._counters = {}
+        # (stage, labels) -> [bucket counts..., count, sum]
+        self._spans    = {}
+        self._recent   = deque(maxlen=MAX_RECENT_ARTICLES)
+        self._local    = threading.local()
+
+    def current_article(self):
+        return getattr(self._local, 'article', None)
+
+    @contextmanager
+    def track(self, article_metrics):
+        """
+        Attribute the spans and counters of the `with` block to an article
+        """
+        previous            = self.current_article()
+        self._local.article = article_metrics
+        try:
+            yield article_metrics
+        finally:
+            self._local.article = previous
+
+    def observe(self, stage, seconds, **labels):
+        key = (stage, _label_key(labels))
+        with self._lock:
+            series = self._spans.get(key)
+            if series is None:
+                series = self._spans[key] = [0] * (len(SPAN_BUCKETS) + 1) + [0.0]
+            series[bisect.bisect_left(SPAN_BUCKETS, seconds)] += 1
+            series[-1] += seconds
+        article = self.current_article()
+        if article is not None:
+            article.add_stage(stage, seconds)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """
+        Time the `with` block as one occurrence of a pipeline stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        article = self.current_article()
+        if article is not None:
+            suffix = "".join(f"_{label_value}" for _, label_value in key[1])
+            article.inc(f"{name}{suffix}", value)
+
+    def label(self, **labels):
+        """
+        Tag the current article, e.g. with the fetch strategy that served it
+        """
+        article = self.current_article()
+        if article is not None:
+            article.labels.update(labels)
+
+    def record_article(self, article_metrics):
+        with self._lock:
+            self._recent.append(article_metrics)
+
+    def recent_articles(self):
+        with self._lock:
+            recent = list(self._recent)
+        return [article_metrics.as_dict() for article_metrics in recent]
+
+    def snapshot(self):
+        """
+        Counters and span totals: {"counters": {(name, labels): value}, "spans": {(stage, labels): (count, seconds)}}
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'spans': {key: (sum(series[:-1]), series[-1]) for key, series in self._spans.items()},
+            }
+
+    def to_prometheus(self):
+        """
+        Prometheus text exposition format of every counter and span histogram
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            spans    = sorted((key, list(series)) for key, series in self._spans.items())
+        lines = []
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            lines += [f"{METRIC_PREFIX}_{name}_total{_format_labels(labels)} {value}"
+                      for (counter_name, labels), value in counters if counter_name == name]
+        if spans:
+            metric = f"{METRIC_PREFIX}_stage_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (stage, labels), series in spans:
+                labels     = (('stage', stage),) + labels
+                cumulative = 0
+                for bound, count in zip(SPAN_BUCKETS + ('+Inf',), series[:-1]):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {series[-1]:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """
+        Write the Prometheus text file of this process (node_exporter textfile collector
+        layout: one file per process in the metrics directory), atomically
+
+        Returns:
+            str: Path of the written file
+        """
+        path = path or os.path.join(DEFAULT_METRICS_DIR, f"{multiprocessing.current_process().name}.prom")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+
+_default_metrics      = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Registry shared by every component of the process
+    """
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+    return _default_metrics
+
+
+def summarize_articles(article_records):
+    """
+    Per-stage breakdown of a batch of ArticleMetrics records
+
+    Returns:
+        tuple: ({stage: {"articles", "total_s", "mean_s", "p95_s"}}, {counter: total})
+    """
+    stages, counters = {}, {}
+    for record in article_records:
+        for stage, seconds in (record.get('stages') or {}).items():
+            stages.setdefault(stage, []).append(seconds)
+        for name, value in (record.get('counters') or {}).items():
+            counters[name] = counters.get(name, 0) + value
+    breakdown = {}
+    for stage, values in stages.items():
+        values = sorted(values)
+        breakdown[stage] = {
+            'articles': len(values),
+            'total_s': round(sum(values), 3),
+            'mean_s': round(sum(values) / len(values), 3),
+            'p95_s': round(values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))], 3),
+        }
+    return breakdown, counters
@@ -0,0 +1,114 @@
+import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Article body containers of known sites, matched on the domain suffix
+DOMAIN_SELECTORS = {
+    'thehindu.com': ('.articlebodycontent', '.article-section'),
+    'reuters.com': ('[data-testid="ArticleBody"]', 'div[class*="article-body"]'),
+    'apnews.com': ('.RichTextStoryBody', '.Article'),
+    'bloomberg.com': ('.body-content', '[data-component="body-content"]'),
+    'scmp.com': ('[data-qa="GenericArticle-Content"]', '.article-body'),
+    'bbc.co.uk': ('[data-component="text-block"]', 'main article'),
+    'bbc.com': ('[data-component="text-block"]', 'main article'),
+    'economictimes.indiatimes.com': ('.artText', '.article_wrap'),
+    'livemint.com': ('.mainArea', '#mainArea'),
+}
+# Generic article body containers tried after the domain ones
+DEFAULT_SELECTORS = ('article', 'main', '[role="main"]', '[itemprop="articleBody"]', '.article-body', '.entry-content')
+
+# Resources that never hold article text, blocked in the browser
+BLOCKED_URL_PATTERNS = (
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.ogg', '*.wav',
+)
+
+# Returns the first selector holding enough text, or the number of resources loaded so far
+READINESS_SCRIPT = """
+const selectors = arguments[0], minText = arguments[1];
+if (document.readyState === 'loading') return null;
+for (const selector of selectors) {
+    const element = document.querySelector(selector);
+    if (element && (element.innerText || '').trim().length >= minText) return selector;
+}
+return performance.getEntriesByType('resource').length;
+"""
+
+
+class PageReadiness:
+    """
+    Event driven readiness of JS rendered pages.
+
+    Pages are loaded with the "eager" strategy (DOMContentLoaded, no wait for images and
+    sub-resources) and an explicit wait then polls until an article body selector of the
+    domain holds text, or until the network has been idle for `idle_time` seconds. The
+    whole page (load and wait) never takes more than `page_budget` seconds: whatever is
+    rendered by then is scraped.
+    """
+    def __init__(self, logger, page_budget=20, idle_time=1.0, min_text_length=500, poll_frequency=0.25):
+        """
+        Args:
+            logger: Application logger
+            page_budget (float): Hard time budget of a page, in seconds
+            idle_time (float): Seconds without new network requests that make a page ready
+            min_text_length (int): Text an article body selector must hold to make a page ready
+            poll_frequency (float): Seconds between readiness checks
+        """
+        self.logger          = logger
+        self.page_budget     = page_budget
+        self.idle_time       = idle_time
+        self.min_text_length = min_text_length
+        self.poll_frequency  = poll_frequency
+
+    def selectors_for(self, domain):
+        domain = (domain or '').lower()
+        tuned  = next((selectors for suffix, selectors in DOMAIN_SELECTORS.items()
+                       if domain == suffix or domain.endswith('.' + suffix)), ())
+        return list(tuned) + list(DEFAULT_SELECTORS)
+
+    def load(self, driver, url, domain):
+        """
+        Load a page and wait until it is ready, within the page time budget
+
+        Args:
+            driver: Selenium web driver
+            url (str): URL to load
+            domain (str): Domain of the URL, picks the article body selectors
+
+        Returns:
+            str: How the page became ready ("selector", "network idle" or "budget")
+        """
+        deadline = time.monotonic() + self.page_budget
+        driver.set_page_load_timeout(self.page_budget)
+        try:
+            driver.get(url)
+        except TimeoutException:
+            # Keep what is rendered so far
+            driver.execute_script("window.stop();")
+            self.logger.warning(f"Page load of {url} exceeded its {self.page_budget}s budget.")
+            return "budget"
+
+        selectors = self.selectors_for(domain)
+        state     = {'resources': -1, 'since': time.monotonic()}
+
+        def ready(driver):
+            probe = driver.execute_script(READINESS_SCRIPT, selectors, self.min_text_length)
+            if isinstance(probe, str):
+                return "selector"
+            if probe is None:
+                return False
+            now = time.monotonic()
+            if probe != state['resources']:
+                state['resources'], state['since'] = probe, now
+                return False
+            return "network idle" if now - state['since'] >= self.idle_time else False
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return "budget"
+        try:
+            return WebDriverWait(driver, remaining, poll_frequency=self.poll_frequency).until(ready)
+        except TimeoutException:
+            self.logger.warning(f"{url} was not ready within its {self.page_budget}s budget, scraping it as rendered.")
+            return "budget"
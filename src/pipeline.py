@@ -0,0 +1,231 @@
+import time
+import queue
+import threading
+
+from utils import Utils
+from metrics import ArticleMetrics, get_metrics
+
+# Marks the end of the work items in a stage queue
+_STOP = object()
+
+
+class PipelineResult:
+    def __init__(self, index, article_url, article_details=None, error=None, skipped=False, metrics=None):
+        self.index           = index
+        self.article_url     = article_url
+        self.article_details = article_details
+        self.error           = error
+        # Already processed article served from the result store
+        self.skipped         = skipped
+        # ArticleMetrics: time spent in every stage and the counters of the article
+        self.metrics         = metrics
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class ExtractionPipeline:
+    """
+    Concurrent batch extraction engine built around Utils.get_features.
+
+    Articles flow through two worker stages connected by bounded queues:
+
+        rows -> [fetch workers] -> queue -> [llm workers] -> results
+
+    The fetch stage scrapes the page, the LLM stage extracts, parses and standardizes
+    the features. Each stage has its own concurrency, so the batch wall time is bound
+    by the slowest stage instead of the sum of all of them. Results are yielded as soon
+    as each article finishes, in completion order.
+    """
+    def __init__(self, logger, scrapper_factory, llm_processor, data_preprocessor,
+                 fetch_workers=4, llm_workers=4, queue_size=8, llm_batch_size=1, result_store=None, refresh=False, metrics=None):
+        """
+        Args:
+            logger: Application logger
+            scrapper_factory (callable): Returns an ArticleScrapper ready to scrape one article
+            llm_processor (LLM): LLM processor shared by the LLM workers
+            data_preprocessor (DataPreprocessor): Feature parser and date normalizer
+            fetch_workers (int): Number of concurrent scraping workers
+            llm_workers (int): Number of concurrent LLM workers
+            queue_size (int): Capacity of the queues between the stages
+            llm_batch_size (int): Maximum number of queued articles packed into one LLM request
+            result_store (ResultStore): Dedup index, known articles are skipped
+            refresh (bool): Process known articles again instead of skipping them
+            metrics (Metrics): Registry the per-article metrics are recorded in
+        """
+        self.logger            = logger
+        self.scrapper_factory  = scrapper_factory
+        self.llm_processor     = llm_processor
+        self.data_preprocessor = data_preprocessor
+        self.fetch_workers     = max(1, int(fetch_workers))
+        self.llm_workers       = max(1, int(llm_workers))
+        self.queue_size        = max(1, int(queue_size))
+        self.llm_batch_size    = max(1, int(llm_batch_size))
+        self.result_store      = result_store
+        self.refresh           = refresh
+        self.metrics           = metrics or get_metrics()
+        self.utils             = Utils(logger)
+        self.logger.info(f"ExtractionPipeline instance initialized with {self.fetch_workers} fetch and {self.llm_workers} LLM workers.")
+
+    def run(self, rows, on_start=None):
+        """
+        Process a batch of articles concurrently
+
+        Args:
+            rows (iterable): (article_url, received_date) pairs
+            on_start (callable): Called with the row index when a worker picks an article up
+
+        Yields:
+            PipelineResult: One result per article, as soon as it is finished
+        """
+        stop_event    = threading.Event()
+        fetch_queue   = queue.Queue(maxsize=self.queue_size)
+        llm_queue     = queue.Queue(maxsize=self.queue_size)
+        result_queue  = queue.Queue()
+        fetchers_left = [self.fetch_workers]
+        fetchers_lock = threading.Lock()
+
+        def feed():
+            try:
+                for index, (article_url, received_date) in enumerate(rows):
+                    if not self._put(fetch_queue, (index, article_url, received_date), stop_event):
+                        return
+            except Exception as e:
+                self.logger.error(f"Pipeline: Error reading the input rows: {e}", exc_info=True)
+            finally:
+                for _ in range(self.fetch_workers):
+                    self._put(fetch_queue, _STOP, stop_event)
+
+        def fetch_worker():
+            try:
+                while not stop_event.is_set():
+                    item = self._get(fetch_queue, stop_event)
+                    if item is _STOP or item is None:
+                        return
+                    index, article_url, received_date = item
+                    article_metrics = ArticleMetrics(article_url)
+                    if on_start is not None:
+                        try:
+                            on_start(index)
+                        except Exception as e:
+                            self.logger.error(f"Pipeline: Error recording the start of article {article_url}: {e}", exc_info=True)
+                    if not self.refresh:
+                        article_details = self.utils.find_processed(self.result_store, article_url)
+                        if article_details is not None:
+                            self._finish(result_queue, PipelineResult(index, article_url, article_details=article_details, skipped=True,
+                                                                      metrics=article_metrics))
+                            continue
+                    try:
+                        with self.metrics.track(article_metrics):
+                            article_scrapper = self.scrapper_factory()
+                            page_document    = self.utils.fetch_page(article_scrapper, article_url)
+                        if page_document is None:
+                            raise ValueError("No content could be extracted from the article page.")
+                    except Exception as e:
+                        self.logger.error(f"Pipeline: Error fetching article {article_url}: {e}", exc_info=True)
+                        self._finish(result_queue, PipelineResult(index, article_url, error=str(e), metrics=article_metrics))
+                        continue
+                    if not self._put(llm_queue, (index, article_url, received_date, page_document, article_metrics), stop_event):
+                        return
+            finally:
+                # The last fetch worker to finish releases the LLM workers
+                with fetchers_lock:
+                    fetchers_left[0] -= 1
+                    last_fetcher = fetchers_left[0] == 0
+                if last_fetcher:
+                    for _ in range(self.llm_workers):
+                        self._put(llm_queue, _STOP, stop_event)
+
+        def llm_worker():
+            try:
+                while not stop_event.is_set():
+                    item = self._get(llm_queue, stop_event)
+                    if item is _STOP or item is None:
+                        return
+                    # Short articles are packed into shared requests when batching is enabled
+                    items       = [item]
+                    worker_done = False
+                    while len(items) < self.llm_batch_size:
+                        try:
+                            extra = llm_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if extra is _STOP:
+                            worker_done = True
+                            break
+                        items.append(extra)
+                    self._extract(items, result_queue)
+                    if worker_done:
+                        return
+            finally:
+                result_queue.put(_STOP)
+
+        threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+        threads += [threading.Thread(target=fetch_worker, name=f"pipeline-fetch-{i}", daemon=True) for i in range(self.fetch_workers)]
+        threads += [threading.Thread(target=llm_worker, name=f"pipeline-llm-{i}", daemon=True) for i in range(self.llm_workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            llm_workers_left = self.llm_workers
+            while llm_workers_left:
+                result = result_queue.get()
+                if result is _STOP:
+                    llm_workers_left -= 1
+                    continue
+                yield result
+        finally:
+            # Stops the workers if the consumer goes away before the batch is finished
+            stop_event.set()
+
+    def _extract(self, items, result_queue):
+        try:
+            if len(items) == 1:
+                with self.metrics.track(items[0][4]):
+                    responses = [self.llm_processor.run_llm(items[0][3].page_content)]
+            else:
+                start     = time.perf_counter()
+                responses = self.llm_processor.run_llm_batch([item[3].page_content for item in items],
+                                                             max_articles=self.llm_batch_size)
+                # A shared request is charged in full to each of its articles
+                elapsed   = time.perf_counter() - start
+                for item in items:
+                    item[4].add_stage("llm", elapsed)
+                    item[4].inc("llm_batch_articles", len(items))
+        except Exception as e:
+            self.logger.error(f"Pipeline: Error running the LLM for {len(items)} articles: {e}", exc_info=True)
+            for index, article_url, _, _, article_metrics in items:
+                self._finish(result_queue, PipelineResult(index, article_url, error=str(e), metrics=article_metrics))
+            return
+        for (index, article_url, received_date, page_document, article_metrics), response in zip(items, responses):
+            try:
+                with self.metrics.track(article_metrics):
+                    features    = self.utils.postprocess_features(self.data_preprocessor, response)
+                article_details = self.utils.build_article_details(received_date, article_url, page_document, features)
+                self._finish(result_queue, PipelineResult(index, article_url, article_details=article_details, metrics=article_metrics))
+            except Exception as e:
+                self.logger.error(f"Pipeline: Error extracting features for article {article_url}: {e}", exc_info=True)
+                self._finish(result_queue, PipelineResult(index, article_url, error=str(e), metrics=article_metrics))
+
+    def _finish(self, result_queue, result):
+        self.metrics.inc("articles", status="skipped" if result.skipped else "done" if result.ok else "failed")
+        self.metrics.record_article(result.metrics)
+        result_queue.put(result)
+
+    def _put(self, q, item, stop_event):
+        while not stop_event.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, stop_event):
+        while not stop_event.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
@@ -0,0 +1,446 @@
+import os
+import re
+import time
+import random
+import sqlite3
+import asyncio
+import threading
+import itertools
+from collections import deque
+
+from metrics import get_metrics
+
+try:
+    from openai import APIConnectionError
+except ImportError:  # Optional, only the status code of provider errors is looked at without it
+    APIConnectionError = None
+
+# Bucket state shared by every process calling the providers (Streamlit and job workers)
+DEFAULT_STATE_DB = os.path.join(os.path.dirname(__file__), '..', 'output', 'rate_limits.sqlite3')
+# Default budgets per provider (requests and tokens per minute), overridden by the
+# <PROVIDER>_RPM / <PROVIDER>_TPM environment variables (e.g. OPENAI_RPM) and adapted
+# to the rate limit headers
+DEFAULT_LIMITS = {
+    'openai': {'rpm': 500, 'tpm': 200000},
+    'gemini': {'rpm': 1000, 'tpm': 1000000},
+}
+FALLBACK_LIMITS = {'rpm': 60, 'tpm': 100000}
+# Tokens reserved for the model answer on top of the prompt
+COMPLETION_TOKEN_ESTIMATE = 400
+# Transient provider errors retried by the scheduler
+RETRYABLE_STATUS    = (408, 409, 429, 500, 502, 503, 504)
+RATE_LIMITED_STATUS = 429
+# Multiplicative decrease of the send rate on a 429, additive recovery per success
+RATE_DECREASE       = 0.5
+RATE_RECOVERY       = 0.05
+MIN_RATE_FACTOR     = 0.1
+
+DURATION_PART_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+DURATION_UNITS        = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_duration(value):
+    """
+    Seconds of a rate limit reset duration: "1s", "6m0s", "20ms", "0.5" or "1.2s"
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header(headers, name):
+    if headers is None:
+        return None
+    try:
+        return headers.get(name)
+    except AttributeError:
+        return None
+
+
+def error_status(error):
+    """
+    HTTP status of a provider error: OpenAI status_code, google.api_core code
+    """
+    for attribute in ('status_code', 'code'):
+        value = getattr(error, attribute, None)
+        if value is None or callable(value):
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def error_headers(error):
+    return getattr(getattr(error, 'response', None), 'headers', None)
+
+
+class RateLimiter:
+    """
+    Client-side scheduler of the calls to one provider model.
+
+    Requests-per-minute and tokens-per-minute budgets are two token buckets refilled
+    continuously. The buckets are a row of a SQLite database updated in write
+    transactions, so the Streamlit process and every job worker process draw from the
+    same budget instead of each spending all of it. Callers of a process are served
+    first come, first served: a call waits until both buckets hold its estimated cost.
+    The budgets follow the x-ratelimit-* response headers when the provider sends them;
+    a 429 halves the send rate (recovered gradually on success) and pauses every caller
+    for the Retry-After delay or a jittered exponential backoff.
+    """
+    def __init__(self, logger, name, rpm, tpm, max_retries=5, base_delay=1.0, max_delay=60.0, metrics=None, db_path=None):
+        """
+        Args:
+            logger: Application logger
+            name (str): provider:model, for the logs and metrics
+            rpm (int): Requests per minute budget
+            tpm (int): Tokens per minute budget
+            max_retries (int): Retries of a call on transient errors
+            base_delay (float): First backoff delay, in seconds
+            max_delay (float): Cap on a backoff delay, in seconds
+            metrics (Metrics): Registry of the waits and rate limited calls
+            db_path (str): SQLite database of the shared buckets, the buckets are only
+                           shared by the threads of this process when not given
+        """
+        self.logger      = logger
+        self.name        = name
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay  = base_delay
+        self.max_delay   = max_delay
+        self.metrics     = metrics or get_metrics()
+        self._tickets    = itertools.count()
+        self._queue      = deque()
+        self._condition  = threading.Condition()
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Autocommit mode, the write transactions are opened explicitly
+        self._conn       = sqlite3.connect(db_path or ':memory:', check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                rpm REAL NOT NULL,
+                tpm REAL NOT NULL,
+                requests REAL NOT NULL,
+                tokens REAL NOT NULL,
+                refilled_at REAL NOT NULL,
+                paused_until REAL NOT NULL DEFAULT 0,
+                rate_factor REAL NOT NULL DEFAULT 1
+            )
+        """)
+        rpm, tpm = max(1, int(rpm)), max(1, int(tpm))
+        with self._condition:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("INSERT OR IGNORE INTO buckets (name, rpm, tpm, requests, tokens, refilled_at) VALUES (?, ?, ?, ?, ?, ?)",
+                                   (name, rpm, tpm, rpm, tpm, time.time()))
+                # The configured budgets win over the ones of a previous run
+                self._conn.execute("UPDATE buckets SET rpm = ?, tpm = ?, requests = MIN(requests, ?), tokens = MIN(tokens, ?) WHERE name = ?",
+                                   (rpm, tpm, rpm, tpm, name))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _update(self, update):
+        """
+        Run update(bucket) on the refilled bucket state in one write transaction, the
+        changes it makes to the bucket dict are saved. Must be called with the condition held.
+
+        Returns:
+            The return value of update
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row    = self._conn.execute("SELECT rpm, tpm, requests, tokens, refilled_at, paused_until, rate_factor FROM buckets WHERE name = ?",
+                                        (self.name,)).fetchone()
+            bucket = dict(zip(('rpm', 'tpm', 'requests', 'tokens', 'refilled_at', 'paused_until', 'rate_factor'), row))
+            # Wall clock, the refill time is compared across processes
+            now                   = time.time()
+            elapsed               = max(0.0, now - bucket['refilled_at'])
+            bucket['refilled_at'] = now
+            bucket['requests']    = min(bucket['rpm'], bucket['requests'] + elapsed * bucket['rpm'] * bucket['rate_factor'] / 60)
+            bucket['tokens']      = min(bucket['tpm'], bucket['tokens'] + elapsed * bucket['tpm'] * bucket['rate_factor'] / 60)
+            result                = update(bucket, now)
+            self._conn.execute("UPDATE buckets SET rpm = ?, tpm = ?, requests = ?, tokens = ?, refilled_at = ?, paused_until = ?, rate_factor = ? "
+                               "WHERE name = ?", (bucket['rpm'], bucket['tpm'], bucket['requests'], bucket['tokens'], bucket['refilled_at'],
+                                                 bucket['paused_until'], bucket['rate_factor'], self.name))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _try_acquire(self, ticket, tokens):
+        """
+        Take the budget of a call when it is its turn. Returns 0 when granted, else the
+        seconds to wait before trying again. Must be called with the condition held.
+        """
+        if self._queue[0] != ticket:
+            return 0.05
+
+        def take(bucket, now):
+            if now < bucket['paused_until']:
+                return bucket['paused_until'] - now
+            # A call larger than the whole budget only waits for a full bucket
+            cost = min(tokens, bucket['tpm'])
+            if bucket['requests'] >= 1 and bucket['tokens'] >= cost:
+                bucket['requests'] -= 1
+                bucket['tokens']   -= cost
+                return 0
+            rate         = bucket['rate_factor'] / 60
+            request_wait = (1 - bucket['requests']) / (bucket['rpm'] * rate) if bucket['requests'] < 1 else 0
+            token_wait   = (cost - bucket['tokens']) / (bucket['tpm'] * rate) if bucket['tokens'] < cost else 0
+            # Other processes may take the budget first, the wait is checked again
+            return min(max(request_wait, token_wait, 0.01), 1.0)
+
+        wait = self._update(take)
+        if not wait:
+            self._queue.popleft()
+            self._condition.notify_all()
+        return wait
+
+    def acquire(self, tokens):
+        """
+        Block until the call fits in the request and token budgets, in arrival order
+        """
+        start = time.monotonic()
+        with self._condition:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            try:
+                while True:
+                    wait = self._try_acquire(ticket, tokens)
+                    if not wait:
+                        break
+                    self._condition.wait(timeout=wait)
+            except BaseException:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+                raise
+        self._observe_wait(time.monotonic() - start)
+
+    async def aacquire(self, tokens):
+        """
+        Async counterpart of acquire, the event loop keeps running while a call waits.
+        The condition and the SQLite write transaction can block for as long as another
+        thread or process holds them, they are only taken in worker threads.
+        """
+        start  = time.monotonic()
+        ticket = await asyncio.to_thread(self._enqueue)
+        try:
+            while True:
+                wait = await asyncio.to_thread(self._try_acquire_locked, ticket, tokens)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        except BaseException:
+            await asyncio.to_thread(self._dequeue, ticket)
+            raise
+        self._observe_wait(time.monotonic() - start)
+
+    def _enqueue(self):
+        with self._condition:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+        return ticket
+
+    def _try_acquire_locked(self, ticket, tokens):
+        with self._condition:
+            return self._try_acquire(ticket, tokens)
+
+    def _dequeue(self, ticket):
+        with self._condition:
+            # A cancelled call may have been granted by the worker thread in the meantime
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            self._condition.notify_all()
+
+    def _observe_wait(self, seconds):
+        if seconds > 0.001:
+            self.metrics.observe("rate_limit_wait", seconds, limiter=self.name)
+
+    def settle(self, estimated, actual):
+        """
+        Charge the difference between the estimated and the reported token usage of a call
+        """
+        if not actual:
+            return
+
+        def charge(bucket, now):
+            bucket['tokens'] = min(bucket['tpm'], bucket['tokens'] + estimated - actual)
+
+        with self._condition:
+            self._update(charge)
+
+    def update_from_headers(self, headers):
+        """
+        Adapt the budgets to the x-ratelimit-* headers of a response (OpenAI and
+        compatible servers): the limits become the reported ones and the buckets never
+        hold more than what the provider says remains
+        """
+        limit_requests     = _header(headers, 'x-ratelimit-limit-requests')
+        limit_tokens       = _header(headers, 'x-ratelimit-limit-tokens')
+        remaining_requests = _header(headers, 'x-ratelimit-remaining-requests')
+        remaining_tokens   = _header(headers, 'x-ratelimit-remaining-tokens')
+        if not any((limit_requests, limit_tokens, remaining_requests, remaining_tokens)):
+            return
+
+        def adapt(bucket, now):
+            if limit_requests:
+                bucket['rpm'] = max(1, int(float(limit_requests)))
+            if limit_tokens:
+                bucket['tpm'] = max(1, int(float(limit_tokens)))
+            if remaining_requests is not None:
+                bucket['requests'] = min(bucket['requests'], float(remaining_requests))
+            if remaining_tokens is not None:
+                bucket['tokens'] = min(bucket['tokens'], float(remaining_tokens))
+
+        with self._condition:
+            try:
+                self._update(adapt)
+            except ValueError:
+                self.logger.warning(f"RateLimiter {self.name}: Ignoring malformed rate limit headers.")
+
+    def budget(self):
+        """
+        Current state of the shared buckets: {"rpm", "tpm", "requests", "tokens", "rate_factor", "paused_for"}
+        """
+        def read(bucket, now):
+            return {
+                'rpm': bucket['rpm'],
+                'tpm': bucket['tpm'],
+                'requests': bucket['requests'],
+                'tokens': bucket['tokens'],
+                'rate_factor': bucket['rate_factor'],
+                'paused_for': max(0.0, bucket['paused_until'] - now),
+            }
+
+        with self._condition:
+            return self._update(read)
+
+    def _retry_delay(self, attempt, headers):
+        retry_after = parse_duration(_header(headers, 'retry-after-ms'))
+        if retry_after is not None:
+            retry_after /= 1000
+        else:
+            retry_after = parse_duration(_header(headers, 'retry-after'))
+        if retry_after is None:
+            resets      = [parse_duration(_header(headers, name)) for name in ('x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens')]
+            resets      = [reset for reset in resets if reset is not None]
+            retry_after = min(resets) if resets else None
+        # Full jitter: callers that failed together do not retry together
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return min(self.max_delay, max(retry_after or 0, backoff))
+
+    def _is_retryable(self, error):
+        if APIConnectionError is not None and isinstance(error, APIConnectionError):
+            return True
+        return isinstance(error, (ConnectionError, TimeoutError)) or error_status(error) in RETRYABLE_STATUS
+
+    def _on_error(self, error, attempt):
+        """
+        Delay before retrying a failed call, None when it must not be retried
+        """
+        if attempt >= self.max_retries or not self._is_retryable(error):
+            return None
+        headers = error_headers(error)
+        delay   = self._retry_delay(attempt, headers)
+        if error_status(error) == RATE_LIMITED_STATUS:
+
+            def slow_down(bucket, now):
+                # Slow every caller down, not only this one, in every process
+                bucket['rate_factor']  = max(MIN_RATE_FACTOR, bucket['rate_factor'] * RATE_DECREASE)
+                bucket['paused_until'] = max(bucket['paused_until'], now + delay)
+
+            with self._condition:
+                self._update(slow_down)
+                self._condition.notify_all()
+            self.metrics.inc("rate_limited", limiter=self.name)
+        self.update_from_headers(headers)
+        self.metrics.inc("retries", component="llm_http")
+        self.logger.warning(f"RateLimiter {self.name}: {type(error).__name__} (status {error_status(error)}), "
+                            f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s.")
+        return delay
+
+    def _on_success(self):
+        def recover(bucket, now):
+            bucket['rate_factor'] = min(1.0, bucket['rate_factor'] + RATE_RECOVERY)
+
+        with self._condition:
+            self._update(recover)
+
+    def call(self, func, tokens):
+        """
+        Run a provider call within the budgets, retrying transient errors
+
+        Args:
+            func (callable): The call, without arguments
+            tokens (int): Estimated tokens of the call (prompt and answer)
+
+        Returns:
+            The result of the call
+        """
+        for attempt in itertools.count():
+            self.acquire(tokens)
+            try:
+                result = func()
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    async def acall(self, func, tokens):
+        """
+        Async counterpart of call, func returns an awaitable
+        """
+        for attempt in itertools.count():
+            await self.aacquire(tokens)
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+
+_limiters      = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(logger, provider, model):
+    """
+    One scheduler per provider and model in the process, its buckets are shared with
+    the other processes through the LLM_RATE_LIMIT_DB database. The budgets of a provider
+    are set with <PROVIDER>_RPM and <PROVIDER>_TPM, e.g. OPENAI_RPM=500.
+    """
+    provider = (provider or '').lower()
+    key      = (provider, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            limits = DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS)
+            _limiters[key] = RateLimiter(
+                logger, f"{provider}:{model}",
+                rpm=int(os.getenv(f"{provider.upper()}_RPM", limits['rpm'])),
+                tpm=int(os.getenv(f"{provider.upper()}_TPM", limits['tpm'])),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", 5)),
+                db_path=os.getenv("LLM_RATE_LIMIT_DB", DEFAULT_STATE_DB),
+            )
+        return _limiters[key]
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from utils import normalize_url
+from metrics import get_metrics
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'output', 'results.sqlite3')
+
+
+class ResultStore:
+    """
+    Persistent store of the processed article records.
+
+    Records are appended one by one to a SQLite table (WAL journal, so an append is a
+    single durable transaction and a crash never corrupts earlier records) indexed on
+    article_url, its normalized form (the dedup index) and article_received_month.
+    output.json is only an export of the store, streamed record by record.
+    """
+    def __init__(self, logger, db_path=None, legacy_json_file=None, metrics=None):
+        """
+        Args:
+            logger: Application logger
+            db_path (str): SQLite database file
+            legacy_json_file (str): output.json imported into an empty store on first use
+            metrics (Metrics): Registry of the write timings
+        """
+        self.logger  = logger
+        self.metrics = metrics or get_metrics()
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.dirty   = False
+        self._lock   = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn   = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    article_url TEXT NOT NULL,
+                    normalized_url TEXT,
+                    received_month TEXT,
+                    record TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._migrate()
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_url ON articles (article_url)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_normalized_url ON articles (normalized_url)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_received_month ON articles (received_month)")
+        if legacy_json_file and self.count() == 0:
+            self.import_json(legacy_json_file)
+        self.logger.info(f"ResultStore instance initialized at {self.db_path}.")
+
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(articles)")}
+        if 'normalized_url' not in columns:
+            # Stores created before the dedup index: add and backfill the normalized URL
+            self._conn.execute("ALTER TABLE articles ADD COLUMN normalized_url TEXT")
+            rows = self._conn.execute("SELECT id, article_url FROM articles").fetchall()
+            self._conn.executemany("UPDATE articles SET normalized_url = ? WHERE id = ?",
+                                   [(normalize_url(url), row_id) for row_id, url in rows])
+
+    def _row(self, record):
+        article_url = record.get('article_url') or ''
+        return (article_url, normalize_url(article_url) if article_url else '', record.get('article_received_month'),
+                json.dumps(record, ensure_ascii=False), time.time())
+
+    def append(self, record):
+        """
+        Durably append one article record
+
+        Returns:
+            int: Row ID of the record
+        """
+        with self.metrics.span("store"), self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO articles (article_url, normalized_url, received_month, record, created_at) VALUES (?, ?, ?, ?, ?)",
+                self._row(record)
+            )
+            self.dirty = True
+            return cursor.lastrowid
+
+    def append_many(self, records):
+        with self.metrics.span("store"), self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO articles (article_url, normalized_url, received_month, record, created_at) VALUES (?, ?, ?, ?, ?)",
+                [self._row(record) for record in records]
+            )
+            self.dirty = True
+
+    def upsert(self, record):
+        """
+        Store a record as the only one of its normalized URL (refreshing known articles
+        instead of appending duplicates). Storing an unchanged record is a no-op.
+
+        Returns:
+            bool: True if the store changed
+        """
+        row = self._row(record)
+        with self.metrics.span("store"), self._lock, self._conn:
+            existing = self._conn.execute(
+                "SELECT id, record FROM articles WHERE normalized_url = ? ORDER BY id", (row[1],)
+            ).fetchall()
+            if len(existing) == 1 and existing[0][1] == row[3]:
+                return False
+            self._conn.execute("DELETE FROM articles WHERE normalized_url = ?", (row[1],))
+            self._conn.execute(
+                "INSERT INTO articles (article_url, normalized_url, received_month, record, created_at) VALUES (?, ?, ?, ?, ?)",
+                row
+            )
+            self.dirty = True
+            return True
+
+    def latest_by_url(self, article_url):
+        """
+        Latest record of an article, matched on the normalized URL
+
+        Returns:
+            dict: The record, None for unknown articles
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM articles WHERE normalized_url = ? ORDER BY id DESC LIMIT 1", (normalize_url(article_url),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def get_by_url(self, article_url):
+        """
+        All the records of an article URL, oldest first
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT record FROM articles WHERE article_url = ? ORDER BY id", (article_url,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_records(self, received_month=None, batch_size=500):
+        """
+        Stream the records in insertion order, optionally for one received month ("January 2025")
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                if received_month is None:
+                    rows = self._conn.execute(
+                        "SELECT id, record FROM articles WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        "SELECT id, record FROM articles WHERE received_month = ? AND id > ? ORDER BY id LIMIT ?",
+                        (received_month, last_id, batch_size)
+                    ).fetchall()
+            if not rows:
+                return
+            for row_id, record in rows:
+                yield json.loads(record)
+            last_id = rows[-1][0]
+
+    def import_json(self, json_file):
+        try:
+            with open(json_file, 'r', encoding='utf-8') as file:
+                records = json.load(file)
+        except FileNotFoundError:
+            return 0
+        self.append_many(records)
+        self.dirty = False
+        self.logger.info(f"ResultStore: Imported {len(records)} records from {json_file}.")
+        return len(records)
+
+    def export_json(self, json_file):
+        """
+        Stream the store to the output.json format (a JSON list indented by 4 spaces)
+        """
+        # Per process temporary file, background job workers export concurrently
+        tmp_path = f"{json_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write('[')
+            written = 0
+            for record in self.iter_records():
+                file.write(',\n    ' if written else '\n    ')
+                file.write(json.dumps(record, indent=4).replace('\n', '\n    '))
+                written += 1
+            file.write('\n]' if written else ']')
+        os.replace(tmp_path, json_file)
+        self.dirty = False
@@ -1,148 +1,255 @@
 import os
-import requests
+import time
 import tempfile
+import logging
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor
+import pymupdf
 import pymupdf4llm
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from langchain.docstore.document import Document
 
-from utils import Utils
+from utils import Utils, normalize_url, unique_normalized_urls, unwrap_redirect_url
+from driver_pool import get_default_pool
+from http_client import get_default_client
+from html_extractor import HtmlExtractor
+from page_readiness import PageReadiness
+from metrics import get_metrics
+
+# Fetch strategies
+STRATEGY_REQUESTS = "requests"
+STRATEGY_SELENIUM = "selenium"
+
+# PDFs with at least this many pages are split across a process pool (about 3.5 ms per
+# page serially, smaller PDFs are done before the pool has started)
+PARALLEL_PDF_MIN_PAGES = 100
+PDF_PAGES_PER_TASK     = 16
+
+# JS-need detection thresholds
+MIN_ARTICLE_TEXT_LENGTH   = 500
+MIN_CONFIDENT_TEXT_LENGTH = 2000
+MIN_TEXT_TO_MARKUP_RATIO  = 0.02
+JS_REQUIRED_MARKERS       = (
+    "enable javascript",
+    "javascript is required",
+    "javascript is disabled",
+    "requires javascript",
+    "turn on javascript",
+)
+
+
+class FetchStrategyMemory:
+    """
+    Thread safe record of which fetch strategy worked for each domain
+    """
+    def __init__(self):
+        self._strategies = {}
+        self._lock       = threading.Lock()
+
+    def get(self, domain):
+        with self._lock:
+            return self._strategies.get(domain)
+
+    def record(self, domain, strategy):
+        with self._lock:
+            self._strategies[domain] = strategy
+
+
+# Shared by every scrapper of the process so it survives Streamlit reruns
+_strategy_memory = FetchStrategyMemory()
+
 
 class ArticleScrapper:
-    def __init__(self, logger):
-        self.logger = logger
-        self.driver = None
+    def __init__(self, logger, driver_pool=None, strategy_memory=None, http_client=None, page_cache=None, html_extractor=None, page_readiness=None,
+                 metrics=None):
+        self.logger          = logger
+        # Warm browsers are borrowed from the pool per page instead of started per article
+        self.driver_pool     = driver_pool or get_default_pool(logger)
+        self.strategy_memory = strategy_memory or _strategy_memory
+        # Keep-alive connections are shared by every static fetch
+        self.http_client     = http_client or get_default_client(logger)
+        # Optional on-disk cache of already scraped pages
+        self.page_cache      = page_cache
+        # Single parse per page with the fastest installed HTML back end
+        self.html_extractor  = html_extractor or HtmlExtractor(logger)
+        # Explicit waits on the article body within a hard per-page time budget
+        self.page_readiness  = page_readiness or PageReadiness(logger)
+        # Stage timings and fetch counters
+        self.metrics         = metrics or get_metrics()
         self.logger.info(f"ArticleScrapper instance initialized.")
-    
-    def get_driver(self):
-        try:        
-            # Setup Chrome options
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")  # Run in background
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            # Setup the webdriver
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()), 
-                options=chrome_options
-            )
-            self.logger.info("CHROME DRIVER IS READY.")
-            self.driver = driver
+
+    def fetch_html_selenium(self, url):
+        """
+        Render a web page in Chrome and return its HTML
+
+        Args:
+            url (str): URL to render
+
+        Returns:
+            str: Rendered page HTML, None if the page could not be loaded
+        """
+        try:
+            # Borrow a warm browser, it goes back to the pool once the page source is read
+            with self.driver_pool.driver() as driver:
+                # Navigate to the page and wait until its article body is rendered
+                start     = time.perf_counter()
+                readiness = self.page_readiness.load(driver, url, urlparse(url).netloc)
+                self.metrics.observe("page_load", time.perf_counter() - start, readiness=readiness)
+                self.logger.info(f"Selenium page ready ({readiness}): {url}")
+
+                # Get page source
+                html = driver.page_source
+                self.metrics.inc("bytes_downloaded", len(html.encode('utf-8')), strategy=STRATEGY_SELENIUM)
+                return html
+
         except Exception as e:
-            self.logger.error(f"Error in downloading and installing chrome webdriver.", exc_info=True)
+            self.logger.error(f"Selenium fetch error: {e}", exc_info=True)
             return None
-        
-    def close_driver(self):
-        if self.driver:
-            self.driver.quit()
-            self.logger.info("Chrome driver closed successfully.")
 
-    def extract_content_selenium(self, url):
+    def extract_content_selenium(self, url, html=None):
         """
         Extract web page content using Selenium with Chrome
         
         Args:
             url (str): URL to extract content from
+            html (str): Already rendered page HTML, rendered with Selenium when not given
         
         Returns:
             Document: Extracted web content
         """
-        try:                
-            # Navigate to the page
-            self.driver.get(url)
-            
-            # Wait for potential dynamic content to load
-            self.driver.implicitly_wait(10)
-            
-            # Get page source
-            page_source = self.driver.page_source
-            
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Remove script, style, and other non-content tags
-            for script in soup(["script", "style", "head", "title", "meta", "nav"]):
-                script.decompose()
-            
-            # Extract text
-            text = soup.get_text(separator=' ', strip=True)
-            
-            # Clean up text
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            cleaned_text = ' '.join(lines)
-            
-            self.logger.info(f"Selenium Extracted text: {cleaned_text[:50]}...")
-            # Close the driver
-            self.close_driver()
+        try:
+            if html is None:
+                html = self.fetch_html_selenium(url)
+                if html is None:
+                    return None
             
-            # Return as LangChain Document
-            return Document(
-                page_content=cleaned_text,
-                metadata={
-                    'source': url,
-                    'title': soup.title.string if soup.title else 'No Title'
-                }
-            )
-        
+            return self.build_document(url, html, "Selenium")
+
         except Exception as e:
             self.logger.error(f"Selenium extraction error: {e}", exc_info=True)
             return None
-        
-    def extract_content_requests(self, url):
+
+    def fetch_response_requests(self, url, headers=None):
+        """
+        GET a web page through the shared HTTP client
+
+        Args:
+            url (str): URL to download
+            headers (dict): Extra request headers, e.g. cache validators
+
+        Returns:
+            requests.Response: The response (2xx or 304), None if the request failed
         """
-        Extract web page content using requests and BeautifulSoup
+        try:
+            # Send request through the shared connection pool (browser-like headers, timeouts and retries)
+            with self.metrics.span("http_get"):
+                response = self.http_client.get(url, headers=headers)
+            retries = getattr(getattr(response.raw, 'retries', None), 'history', None)
+            if retries:
+                self.metrics.inc("retries", len(retries), component="http")
+            self.metrics.inc("bytes_downloaded", len(response.content), strategy=STRATEGY_REQUESTS)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+
+        except Exception as e:
+            self.logger.error(f"Requests fetch error: {e}", exc_info=True)
+            return None
+
+    def fetch_html_requests(self, url):
+        """
+        Download the raw HTML of a web page using requests
+
+        Args:
+            url (str): URL to download
+
+        Returns:
+            str: Page HTML, None if the request failed
+        """
+        response = self.fetch_response_requests(url)
+        return response.text if response is not None else None
+
+    def extract_content_requests(self, url, html=None):
+        """
+        Extract web page content using requests
         
         Args:
             url (str): URL to extract content from
+            html (str): Already downloaded page HTML, fetched with requests when not given
         
         Returns:
             Document: Extracted web content
         """
         try:
-            # Setup headers to mimic browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
+            if html is None:
+                html = self.fetch_html_requests(url)
+                if html is None:
+                    return None
             
-            # Send request
-            response = requests.get(url, headers=headers, verify=False)
-            response.raise_for_status()
-            
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script, style, and other non-content tags
-            for script in soup(["script", "style", "head", "title", "meta", "nav"]):
-                script.decompose()
-            
-            # Extract text
-            text = soup.get_text(separator=' ', strip=True)
-            
-            # Clean up text
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            cleaned_text = ' '.join(lines)
-
-            self.logger.info(f"BeautifulSoup Extracted text: {cleaned_text[:50]}...")
-            # Return as LangChain Document
-            return Document(
-                page_content=cleaned_text,
-                metadata={
-                    'source': url,
-                    'title': soup.title.string if soup.title else 'No Title'
-                }
-            )
-        
+            return self.build_document(url, html, "Requests")
+
         except Exception as e:
-            self.logger.error(f"BeautifulSoup extraction error: {e}", exc_info=True)
+            self.logger.error(f"Requests extraction error: {e}", exc_info=True)
             return None
-    
+
+    def build_document(self, url, html, label):
+        """
+        Extract the article text, title and metadata of a page HTML
+
+        Args:
+            url (str): URL of the page
+            html (str): Page HTML
+            label (str): Fetch strategy, for the logs
+
+        Returns:
+            Document: Extracted web content
+        """
+        with self.metrics.span("html_parse", backend=self.html_extractor.backend):
+            page = self.html_extractor.extract(html)
+        self.logger.info(f"{label} Extracted text ({self.html_extractor.backend}): {page.text[:50]}...")
+        # Return as LangChain Document
+        return Document(
+            page_content=page.text,
+            metadata={
+                'source': url,
+                'title': page.title or 'No Title',
+                **page.metadata
+            }
+        )
+
+    def needs_javascript(self, html, text):
+        """
+        Judge whether a statically fetched page is a JS shell rather than a real article body
+
+        Args:
+            html (str): Raw page HTML
+            text (str): Text extracted from the HTML
+
+        Returns:
+            bool: True when the page has to be rendered in a browser
+        """
+        text = text or ''
+        # Barely any readable text: the body is filled in by JavaScript
+        if len(text) < MIN_ARTICLE_TEXT_LENGTH:
+            return True
+        lowered_html = html.lower()
+        # Explicit "please enable JavaScript" markers
+        if any(marker in lowered_html for marker in JS_REQUIRED_MARKERS):
+            return len(text) < MIN_CONFIDENT_TEXT_LENGTH
+        # Mostly markup and scripts with little text: typical of single page apps
+        if len(text) / max(len(html), 1) < MIN_TEXT_TO_MARKUP_RATIO:
+            return len(text) < MIN_CONFIDENT_TEXT_LENGTH
+        return False
+
     def extract_web_content(self, url):
         """
-        Multiple strategy web content extraction
+        Adaptive, cached web content extraction
+
+        Pages fetched within the cache TTL are served from the page cache without any
+        network access, stale pages are revalidated with their ETag/Last-Modified.
+        Otherwise a cheap requests fetch is tried first and the page is escalated to
+        Selenium only when it looks like a JS shell. The strategy that worked is
+        remembered per domain, so later URLs from the same domain skip the probe.
         
         Args:
             url (str): URL to extract content from
@@ -150,23 +257,145 @@ class ArticleScrapper:
         Returns:
             Document: Extracted web content
         """
-        # Try Selenium first (better for JS-heavy sites)
-        document = self.extract_content_selenium(url)
-        
-        # Fallback to requests method
-        if not document or not document.page_content.strip():
-            document = self.extract_content_requests(url)
-        
+        with self.metrics.span("fetch"):
+            return self._extract_web_content(url)
+
+    def _served(self, strategy, document):
+        # How the page was served: cache, revalidated, requests, selenium, stale, fallback or failed
+        self.metrics.inc("fetch_strategy", strategy=strategy)
+        self.metrics.label(fetch_strategy=strategy)
         return document
 
-    def scrape_pdf(self, uploaded_file):
+    def _extract_web_content(self, url):
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if self.page_cache and self.page_cache.is_fresh(cached) and cached.get('text'):
+            self.logger.info(f"Page cache hit for {url}.")
+            return self._served("cache", self._cached_document(url, cached))
+
+        domain   = urlparse(url).netloc.lower()
+        strategy = self.strategy_memory.get(domain)
+        document = None
+        html     = None
+
+        if strategy != STRATEGY_SELENIUM:
+            validators = self.page_cache.validators(cached) if self.page_cache else {}
+            response   = self.fetch_response_requests(url, headers=validators or None)
+            if response is not None and response.status_code == 304:
+                # Unchanged since it was cached
+                self.logger.info(f"Page cache revalidated for {url}.")
+                self.page_cache.touch(url, cached)
+                return self._served("revalidated", self._cached_document(url, cached))
+            if response is not None:
+                html     = response.text
+                document = self.extract_content_requests(url, html=html)
+            has_content = bool(document and document.page_content.strip())
+            # Known static domains skip the JS-need probe
+            if has_content and (strategy == STRATEGY_REQUESTS or not self.needs_javascript(html, document.page_content)):
+                self.strategy_memory.record(domain, STRATEGY_REQUESTS)
+                self._cache_document(url, html, document, response, STRATEGY_REQUESTS)
+                return self._served(STRATEGY_REQUESTS, document)
+            self.logger.info(f"Escalating {url} to Selenium, the static fetch returned no usable article body.")
+
+        # Render the page in the browser (better for JS-heavy sites)
+        rendered_html     = self.fetch_html_selenium(url)
+        selenium_document = self.extract_content_selenium(url, html=rendered_html) if rendered_html is not None else None
+        if selenium_document and selenium_document.page_content.strip():
+            self.strategy_memory.record(domain, STRATEGY_SELENIUM)
+            self._cache_document(url, rendered_html, selenium_document, None, STRATEGY_SELENIUM)
+            return self._served(STRATEGY_SELENIUM, selenium_document)
+
+        # Fallback to whatever the static fetch returned
+        if not document and strategy == STRATEGY_SELENIUM:
+            document = self.extract_content_requests(url)
+        # Last resort: a stale cached copy beats no content at all
+        if not (document and document.page_content.strip()) and cached and cached.get('text'):
+            self.logger.info(f"Serving stale cached copy of {url}.")
+            return self._served("stale", self._cached_document(url, cached))
+        document = document or selenium_document
+        return self._served("fallback" if document and document.page_content.strip() else "failed", document)
+
+    def _cached_document(self, url, entry):
+        return Document(
+            page_content=entry['text'],
+            metadata={
+                'source': url,
+                'title': entry.get('title') or 'No Title'
+            }
+        )
+
+    def _cache_document(self, url, html, document, response, strategy):
+        if not self.page_cache:
+            return
+        headers = response.headers if response is not None else {}
+        self.page_cache.put(
+            url, html, document.page_content,
+            title=document.metadata.get('title'),
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            strategy=strategy,
+        )
+
+    def iter_pdf_urls(self, pdf_bytes, max_workers=None):
+        """
+        Stream the article URLs of a PDF as they are found, in page order
+
+        Link annotations (hyperlinks whose anchor text is not the URL) and the text layer
+        are read page by page straight from the PDF bytes, without a temporary file or a
+        markdown rendering. Large PDFs are processed in parallel across a process pool,
+        every worker process gets the PDF once and reads its page ranges from it.
+
+        Args:
+            pdf_bytes (bytes): Content of the PDF file
+            max_workers (int): Size of the process pool for large PDFs
+
+        Yields:
+            str: Article URL, each normalized URL only once
+        """
+        seen = set()
+        def unique(urls):
+            for url in urls:
+                key = normalize_url(url)
+                if key not in seen:
+                    seen.add(key)
+                    yield url
+
+        with pymupdf.open(stream=pdf_bytes, filetype="pdf") as document:
+            page_count = document.page_count
+            if page_count < PARALLEL_PDF_MIN_PAGES or (os.cpu_count() or 1) < 2:
+                utils = Utils(self.logger)
+                for page_number in range(page_count):
+                    yield from unique(_page_urls(document[page_number], utils))
+                return
+
+        ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count)) for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_open_worker_pdf, initargs=(pdf_bytes,)) as executor:
+            # map yields in submission order, i.e. page order
+            for urls in executor.map(_extract_worker_pdf_urls, *zip(*ranges)):
+                yield from unique(urls)
+
+    def scrape_pdf(self, uploaded_file, fast=True):
+        """
+        Extract the article URLs of an uploaded PDF
+
+        Args:
+            uploaded_file: Uploaded PDF file
+            fast (bool): Read link annotations and the text layer page by page (default),
+                         instead of rendering the whole PDF to markdown
+
+        Returns:
+            iterable: Article URLs, streamed in page order as they are found in fast mode
+        """
+        if fast:
+            return self._logged_pdf_urls(uploaded_file.read())
+
+        tmp_path = None
         try:
             with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
                 tmp_file.write(uploaded_file.read())
                 tmp_path = tmp_file.name
             # Extract text from PDF
             text=pymupdf4llm.to_markdown(tmp_path)
-            article_urls=Utils(self.logger).extract_urls(text)
+            article_urls=unique_normalized_urls(Utils(self.logger).extract_urls(text))
             self.logger.info(f"Extracted URLs: {article_urls}")
             return article_urls
         except Exception as e:
@@ -174,5 +403,56 @@ class ArticleScrapper:
             return None
         finally:
             # Clean up the temporary file - this ensures deletion even if an error occurs
-            os.unlink(tmp_path)
-    
\ No newline at end of file
+            if tmp_path:
+                os.unlink(tmp_path)
+
+    def _logged_pdf_urls(self, pdf_bytes):
+        """
+        iter_pdf_urls for the UI: an unreadable PDF is logged and ends the stream with the
+        URLs found so far
+        """
+        count = 0
+        try:
+            for url in self.iter_pdf_urls(pdf_bytes):
+                count += 1
+                yield url
+        except Exception as e:
+            self.logger.error(f"Error extracting URLs from PDF: {str(e)}", exc_info=True)
+            return
+        self.logger.info(f"Extracted {count} URLs from the PDF.")
+
+
+def _page_urls(page, utils):
+    """
+    URLs of the link annotations and the text layer of a PDF page
+    """
+    urls = []
+    # Hyperlinks first, their anchor text is often not the URL itself. Like extract_urls
+    # for the text layer, redirect wrappers are replaced by their target
+    for link in page.get_links():
+        uri = link.get('uri')
+        if uri and uri.lower().startswith(('http://', 'https://')):
+            urls.append(unwrap_redirect_url(uri.strip()))
+    urls.extend(utils.extract_urls(page.get_text()))
+    return urls
+
+
+# PDF opened once per process pool worker, by the pool initializer
+_worker_pdf = None
+
+
+def _open_worker_pdf(pdf_bytes):
+    global _worker_pdf
+    _worker_pdf = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+
+
+def _extract_worker_pdf_urls(start, end):
+    """
+    URLs of pages [start, end) of the PDF of the worker process. Module level so it
+    can run in a process pool worker.
+    """
+    utils = Utils(logging.getLogger(__name__))
+    urls  = []
+    for page_number in range(start, end):
+        urls.extend(_page_urls(_worker_pdf[page_number], utils))
+    return urls
@@ -1,12 +1,20 @@
 import os
-import json
+import time
 import pandas as pd
 import streamlit as st
 from datetime import datetime, date
 
-from llm import LLM
+from llm_router import LLMRouter, build_llm
+from job_runner import JobRunner, ACTIVE_STATES, JOB_INTERRUPTED, JOB_CANCELLED, JOB_FAILED, ITEM_FAILED, ITEM_SKIPPED
+from ingest import ArticleIngestor
 from scrapper import ArticleScrapper
+from driver_pool import DriverPool
+from http_client import HttpClient
+from cache import PageCache, LLMResponseCache
+from result_store import ResultStore
 from utils import DataPreprocessor, Utils
+from feature_parser import parse_stats
+from metrics import ArticleMetrics, get_metrics, summarize_articles
 
 import logging
 logging.basicConfig(
@@ -16,6 +24,113 @@ logging.basicConfig(
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+OUTPUT_JSON_FILE = os.path.join(os.path.dirname(__file__), '..', 'output', 'output.json')
+# Seconds between two refreshes of the running jobs
+JOB_POLL_INTERVAL = 2
+
+
+@st.cache_resource
+def get_driver_pool():
+    # Warm browsers are kept alive across Streamlit reruns
+    return DriverPool(logger, size=int(os.getenv("CHROME_POOL_SIZE", 4)), max_pages=int(os.getenv("CHROME_MAX_PAGES", 50)))
+
+
+@st.cache_resource
+def get_http_client():
+    # Keep-alive connections are reused across Streamlit reruns
+    return HttpClient(logger, max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 32)), max_per_host=int(os.getenv("HTTP_MAX_PER_HOST", 4)))
+
+
+@st.cache_resource
+def get_result_store():
+    # output.json is imported into the store the first time it is created
+    return ResultStore(logger, legacy_json_file=OUTPUT_JSON_FILE)
+
+
+@st.cache_resource
+def get_page_cache():
+    page_cache = PageCache(logger, ttl=int(os.getenv("PAGE_CACHE_TTL", 30 * 24 * 3600)))
+    # Pages already stored in the processed articles cost no network or browser time
+    page_cache.seed_from_records(get_result_store().iter_records())
+    return page_cache
+
+
+@st.cache_resource
+def get_llm_response_cache():
+    return LLMResponseCache(logger, max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000)))
+
+
+@st.cache_resource
+def get_job_runner():
+    # Worker processes keep running batches across Streamlit reruns and sessions
+    return JobRunner(logger, workers=int(os.getenv("JOB_WORKERS", 2)))
+
+
+def show_stage_breakdown(article_records):
+    """
+    Where the time of a batch went (fetch, browser, HTML parsing, LLM, parsing, storage)
+    and its fetch, token, cache, retry and parse failure counters
+    """
+    breakdown, counters = summarize_articles(article_records)
+    if not breakdown:
+        return
+    st.dataframe(pd.DataFrame.from_dict(breakdown, orient='index').sort_values('total_s', ascending=False),
+                 use_container_width=True)
+    if counters:
+        st.caption(", ".join(f"{name}: {value}" for name, value in sorted(counters.items())))
+
+
+def show_jobs(job_runner, llm_model_api_key):
+    """
+    Progress and results of the background jobs followed by this session, streamed by
+    polling the job table while any of them is running
+    """
+    st.subheader("Extraction Jobs")
+    # Jobs whose worker process died are interrupted, and like the jobs of a previous
+    # run they are listed so their unfinished articles can be resumed
+    job_runner.check_workers()
+    for job_id in job_runner.store.list_jobs():
+        if job_id not in st.session_state.job_ids and job_runner.store.get_job(job_id)['status'] == JOB_INTERRUPTED:
+            st.session_state.job_ids.append(job_id)
+    follow_job_id = st.text_input("Follow a job by ID:", placeholder="job-...")
+    if follow_job_id and follow_job_id not in st.session_state.job_ids and job_runner.store.get_job(follow_job_id):
+        st.session_state.job_ids.insert(0, follow_job_id)
+
+    active = False
+    for job_id in st.session_state.job_ids:
+        job = job_runner.store.get_job(job_id)
+        if job is None:
+            continue
+        running = job['status'] in ACTIVE_STATES
+        active  = active or running
+        counts  = job['counts']
+        with st.expander(f"{job_id}: {job['status']} ({job['finished']}/{job['total']} articles)", expanded=running):
+            st.progress(job['finished'] / max(job['total'], 1),
+                        text=f"{counts['done']} extracted, {counts['skipped']} skipped, {counts['failed']} failed, "
+                             f"{counts['in_flight']} in flight, {counts['pending']} pending")
+            if running and st.button("Cancel job", key=f"cancel_{job_id}"):
+                job_runner.cancel(job_id)
+            unfinished = counts['pending'] + counts['in_flight']
+            if job['status'] in (JOB_INTERRUPTED, JOB_CANCELLED, JOB_FAILED) and unfinished:
+                if st.button(f"Resume batch ({unfinished} unfinished articles)", key=f"resume_{job_id}"):
+                    job_runner.resume(job_id, llm_model_api_key)
+                    st.rerun()
+            if job['error']:
+                st.error(f"Job failed: {job['error']}")
+            items = job_runner.store.finished_items(job_id)
+            show_stage_breakdown([item['metrics'] for item in items if item['metrics']])
+            for item in items:
+                if item['status'] == ITEM_FAILED:
+                    st.error(f"Failed to extract features for Article: {item['article_url']} ({item['error']})")
+                elif item['status'] == ITEM_SKIPPED:
+                    st.info(f"Article already processed, skipped: {item['article_url']}")
+                else:
+                    st.success(f"Features extracted and processed successfully for Article:     {item['article_url']}")
+                    st.json(item['article_details'], expanded=False)
+    if active:
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
 
 def main():
     # Set page title and configuration
@@ -44,17 +159,11 @@ def main():
     """
     st.markdown(footer, unsafe_allow_html=True)
 
-    processed_articles = []
-    output_json_file = os.path.join(os.path.dirname(__file__), '..', 'output', 'output.json')
-    try:
-        # Load the existing file
-        with open(output_json_file, 'r', encoding='utf-8') as file:
-            processed_articles = json.load(file)
-            #st.success("Output JSON File loaded successfully.", icon="🟢")
-    except FileNotFoundError:
-        logger.error("Output JSON File not found.")
-        st.error("Output JSON File not found.", icon="🔴")
-        return
+    # Processed articles are appended to the result store as soon as they are extracted
+    result_store = get_result_store()
+    # Background jobs followed by this session, newest first
+    if 'job_ids' not in st.session_state:
+        st.session_state.job_ids = []
     
     # Define the text you want to adjust
     my_text = """
@@ -108,13 +217,13 @@ def main():
         fetch_article_btn = None
         # File upload section
         uploaded_file = st.file_uploader("Please attach the PDF/CSV/EXCEL or Outlook email file here", 
-                                       type=['pdf', 'csv', 'excel','eml'],
+                                       type=['pdf', 'csv', 'xlsx', 'eml'],
                                        help="Upload your news document")
         st.warning("Note: CSV/Excel file should have the following columns: 'article_url', 'received_date'", icon="⚠️")
         # Submit button - now directly under the file upload
         fetch_article_btn = st.button("Fetch Article URLs", use_container_width=True)
         # Handle form submission
-        articles = []
+        rows = []
         # Initialize session state
         if "article_table_visible" not in st.session_state:
             st.session_state.article_table_visible = False  # Tracks if the table and button2 are visible
@@ -128,21 +237,24 @@ def main():
             else:
                 # Add loading spinner while processing
                 with st.spinner('Processing your file...'):
-                    article_scrapper  = ArticleScrapper(logger)
+                    article_scrapper  = ArticleScrapper(logger, driver_pool=get_driver_pool(), http_client=get_http_client(), page_cache=get_page_cache())
                     if uploaded_file.type == 'application/pdf':                                           
-                        articles = article_scrapper.scrape_pdf(uploaded_file)
-                    elif uploaded_file.type == 'application/vnd.ms-outlook':
-                        pass
-                    elif uploaded_file.type == 'text/csv':
-                        pass
-                    elif uploaded_file.type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
-                        pass
-                if len(articles) > 0:
+                        articles = article_scrapper.scrape_pdf(uploaded_file) or []
+                        rows     = [(article, datetime.today()) for article in articles]
+                    else:
+                        # CSV, Excel and .eml files are streamed row by row
+                        try:
+                            rows = list(ArticleIngestor(logger).iter_rows(uploaded_file, default_date=datetime.today()))
+                        except Exception as e:
+                            logger.error(f"Error reading the uploaded file: {e}", exc_info=True)
+                            st.error(f"Could not read the uploaded file: {e}", icon="🔴")
+                            rows = []
+                if len(rows) > 0:
                     st.session_state.article_table_visible = True  # Set the table visibility flag to True
                     # Initialize with default data for the first time
                     data = {
-                        'article_url': articles,
-                        'received_date': [datetime.today()] * len(articles)
+                        'article_url': [article_url for article_url, _ in rows],
+                        'received_date': [received_date for _, received_date in rows]
                     }
                     st.session_state.extracted_articles = pd.DataFrame(data)
                     st.session_state.extracted_articles.index = st.session_state.extracted_articles.index + 1
@@ -170,28 +282,30 @@ def main():
             num_rows="dynamic"
             )
 
+            # Pipeline concurrency settings
+            with st.expander("Pipeline Settings"):
+                fetch_workers = st.number_input("Fetch workers:", min_value=1, max_value=16, value=4, step=1)
+                llm_workers   = st.number_input("LLM workers:", min_value=1, max_value=16, value=4, step=1)
+                llm_batch_size = st.number_input("Articles per LLM request:", min_value=1, max_value=16, value=1, step=1,
+                                                 help="Short articles are packed into one request to save the repeated instructions")
+                refresh_known  = st.checkbox("Refresh already processed articles", value=False)
+
             # Button2
             if st.button("Extract Features", use_container_width=True, key="extract_table_features_btn"):
-                # Add loading spinner while processing
-                with st.spinner('Scraping Articles and Extracting features from them...'):
-                    # Initialize the LLM processor and Data Preprocessor
-                    llm_processor     = LLM(logger, selected_llm_option, llm_model, llm_model_api_key)
-                    data_preprocessor = DataPreprocessor(logger)
-                    
-                    # Example: Process the table data
-                    for _, row in st.session_state.extracted_articles.iterrows():
-                        logger.info(row)
-                        # Initialize the ArticleScrapper
-                        article_scrapper  = ArticleScrapper(logger)
-                        article_scrapper.get_driver()
-                        article_details   = Utils(logger).get_features(article_scrapper, llm_processor, data_preprocessor, row.received_date, row.article_url)
-                        processed_articles.append(article_details)
-                        st.success(f"Features extracted and processed successfully for Article:     {row.article_url}")
-                        logger.info(f"Features extracted and processed successfully for Article:    {row.article_url}")
-                        # Display file details
-                        st.write("Article Details:")
-                        st.json(article_details)
-                        
+                # The batch runs in a background worker process, the page only follows its progress
+                rows   = [(row.article_url, row.received_date) for _, row in st.session_state.extracted_articles.iterrows()]
+                job_id = get_job_runner().submit(rows, {
+                    'selected_llm': selected_llm_option,
+                    'llm_model': llm_model,
+                    'fetch_workers': int(fetch_workers),
+                    'llm_workers': int(llm_workers),
+                    'llm_batch_size': int(llm_batch_size),
+                    'refresh': refresh_known,
+                }, llm_model_api_key)
+                st.session_state.job_ids.insert(0, job_id)
+                st.info(f"Extraction job {job_id} submitted.")
+                logger.info(f"Extraction job {job_id} submitted with {len(rows)} articles.")
+
     if selected_src_option == "Article URL":
         article_url = st.text_input("Enter your Article URL:", placeholder="https://www.example.com")
         if article_url:
@@ -203,6 +317,7 @@ def main():
         today = date.today()
 
         selected_date = st.date_input("Article Received Date", None)
+        refresh_known = st.checkbox("Refresh if already processed", value=False)
 
         if selected_date:
             # Submit button - Scrape data from the URL and extract features using GenAI
@@ -212,25 +327,44 @@ def main():
                     # Add loading spinner while processing
                     with st.spinner('Extracting features from the article...'):
                         # Initialize the ArticleScrapper, LLM processor and Data Preprocessor
-                        article_scrapper  = ArticleScrapper(logger)
-                        llm_processor     = LLM(logger, selected_llm_option, llm_model, llm_model_api_key)
+                        article_scrapper  = ArticleScrapper(logger, driver_pool=get_driver_pool(), http_client=get_http_client(), page_cache=get_page_cache())
+                        llm_processor     = build_llm(logger, selected_llm_option, llm_model, llm_model_api_key, response_cache=get_llm_response_cache())
                         data_preprocessor = DataPreprocessor(logger)
-                        article_details   = Utils(logger).get_features(article_scrapper, llm_processor, data_preprocessor, selected_date, article_url)
-                        processed_articles.append(article_details)
+                        article_metrics   = ArticleMetrics(article_url)
+                        with get_metrics().track(article_metrics):
+                            article_details = Utils(logger).get_features(article_scrapper, llm_processor, data_preprocessor, selected_date, article_url,
+                                                                         result_store=result_store, refresh=refresh_known)
+                            result_store.upsert(article_details)
+                        get_metrics().record_article(article_metrics)
                         st.success(f"Features extracted and processed successfully for Article: {article_url}")
                         logger.info(f"Features extracted and processed successfully for Article: {article_url}")
                         
                         # Display file details
                         st.write("Article Details:")
                         st.json(article_details)
-    # Save the final ouput in JSON file
+                        cache_stats = get_llm_response_cache().stats()
+                        st.caption(f"LLM response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['size']} entries")
+                        for model, counts in parse_stats().items():
+                            st.caption(f"LLM output parsing ({model}): {counts['parsed']} parsed, {counts['repaired']} repaired, {counts['failed']} failed")
+                        show_stage_breakdown([article_metrics.as_dict()])
+                        if isinstance(llm_processor, LLMRouter):
+                            st.dataframe(pd.DataFrame(llm_processor.stats()), use_container_width=True, hide_index=True)
+    # Export the output JSON file, only when new articles were stored during this run
+    if result_store.dirty:
+        try:
+            result_store.export_json(OUTPUT_JSON_FILE)
+            # st.success("Output JSON File saved successfully.", icon="🟢")
+        except OSError:
+            logger.error("Output JSON File could not be written.", exc_info=True)
+            st.error("Output JSON File could not be written.", icon="🔴")
+            return
     try:
-        with open(output_json_file, 'w', encoding='utf-8') as file:
-            json.dump(processed_articles, file, indent=4)
-        # st.success("Output JSON File saved successfully.", icon="🟢")
-    except FileNotFoundError:
-        logger.error("Output JSON File not found.")
-        st.error("Output JSON File not found.", icon="🔴")
-        return
+        get_metrics().write_prometheus()
+    except OSError:
+        logger.error("Metrics file could not be written.", exc_info=True)
+
+    if selected_src_option == "File Upload":
+        show_jobs(get_job_runner(), llm_model_api_key)
+
 if __name__ == "__main__":
     main()
@@ -1,200 +1,392 @@
 import re
-import string
 import pandas as pd
-from ast import literal_eval
 from datetime import datetime
+from functools import lru_cache
 from babel.dates import parse_date
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from feature_parser import parse_features, FeatureParseError
+from metrics import get_metrics
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# URL characters accepted by the extractor (printable ASCII but space " # ` { | } ~), the
+# closing parenthesis, bracket and quote end the kept part of a match: group 1 is the URL
+# and the rest of the match is PDF junk that is consumed and dropped
+URL_ALLOWED_CHARS  = r"!$%&'()*+,\-./0-9:;<=>?@A-Z\[\\\]^_a-z"
+URL_KEPT_CHARS     = r"!$%&(*+,\-./0-9:;<=>?@A-Z\[\\^_a-z"
+URL_PATTERN        = re.compile(rf"(https?://(?=[{URL_ALLOWED_CHARS}])[{URL_KEPT_CHARS}]*)[{URL_ALLOWED_CHARS}]*")
+URL_REJECT_PATTERN = re.compile(r"[(\[]")
+
+# Plain URLs (no user info, port or IP literal) that normalize_url can take apart without urlsplit
+SIMPLE_URL_PATTERN = re.compile(r"(https?)://([A-Za-z0-9.-]+)(/[^?#\t\r\n]*)?(?:\?([^#\t\r\n]*))?(?:#[^\t\r\n]*)?\Z", re.IGNORECASE)
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS        = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    'ref', 'ref_src', 'ref_url', 'cmpid', 'ocid', 'smid', 'smtyp', 'sr_share', 'share', 'spm',
+}
+TRACKING_PARAM_PREFIXES = ('utm_', 'at_', 'pk_', 'mtm_', 'hsa_', 'itm_')
+
+# Redirect wrappers: host suffix -> query parameter holding the target URL
+REDIRECT_WRAPPERS = {
+    'safelinks.protection.outlook.com': ('url',),
+    'google.com': ('q', 'url'),
+    'l.facebook.com': ('u',),
+    'lm.facebook.com': ('u',),
+    'out.reddit.com': ('url',),
+    'linkedin.com': ('url',),
+    'urldefense.com': ('u',),
+}
+# Cheap pre-check so that only URLs naming a wrapper host are parsed by unwrap_redirect_url
+REDIRECT_HOST_PATTERN = re.compile("|".join(re.escape(suffix) for suffix in REDIRECT_WRAPPERS) + r"|[\t\r\n]", re.IGNORECASE)
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def unwrap_redirect_url(url, max_depth=3):
+    """
+    Replace redirect wrappers (Outlook safelinks, Google redirect links, ...) by their target URL
+    """
+    for _ in range(max_depth):
+        if not REDIRECT_HOST_PATTERN.search(url):
+            return url
+        parts = urlsplit(url)
+        host  = (parts.hostname or '').lower()
+        names = next((names for suffix, names in REDIRECT_WRAPPERS.items()
+                      if host == suffix or host.endswith('.' + suffix)), None)
+        if not names or (host.endswith('google.com') and parts.path != '/url'):
+            return url
+        params = dict(parse_qsl(parts.query))
+        target = next((params[name] for name in names if params.get(name, '').startswith(('http://', 'https://'))), None)
+        if not target:
+            return url
+        url = target
+    return url
+
+
+def normalize_url(url):
+    """
+    Normalize a URL so that different spellings of the same page share one key:
+    redirect wrappers unwrapped, https scheme, lowercase host without "www." and default
+    port, no fragment, no tracking parameters, sorted query parameters and no trailing
+    slash on the path.
+    """
+    url    = unwrap_redirect_url(url.strip())
+    simple = SIMPLE_URL_PATTERN.match(url)
+    if simple:
+        scheme, host, path, query = simple.groups()
+        scheme, host, path, query = scheme.lower(), host.lower(), path or '', query or ''
+    else:
+        parts  = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host   = (parts.hostname or '').lower()
+        if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{parts.port}"
+        path, query = parts.path, parts.query
+    if host.startswith('www.'):
+        host = host[4:]
+    if scheme == 'http':
+        scheme = 'https'
+    path  = path.rstrip('/') or '/'
+    query = query and urlencode(sorted((name, value) for name, value in parse_qsl(query, keep_blank_values=True)
+                                       if not is_tracking_param(name)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def unique_normalized_urls(urls):
+    """
+    Drop the near duplicates of a list of URLs (spellings sharing a normalized URL),
+    keeping the first spelling found
+    """
+    unique_urls = {}
+    for url in urls:
+        unique_urls.setdefault(normalize_url(url), url)
+    return list(unique_urls.values())
+
+
+DATE_OUTPUT_FORMAT = "%d-%m-%Y"
+DATE_CACHE_SIZE    = 4096
+
+# Formats tried by standardize_date, first match wins
+DATE_FORMATS = (
+    "%d-%m-%Y",                # 25-12-2023
+    "%Y-%m-%d",                # 2023-12-25
+    "%d/%m/%Y",                # 25/12/2023
+    "%d.%m.%Y",                # 25.12.2023
+    "%d %B %Y",                # 25 December 2023
+    "%d %b %Y",                # 25 Dec 2023
+    "%d %b, %Y",               # 25 Dec, 2023
+    "%B %d %Y",                # December 25 2023
+    "%b %d %Y",                # Dec 25 2023
+    "%d-%b-%Y",                # 25-Dec-2023
+    "%d %m %Y",                # 25 12 2023
+    "%b-%d-%Y",                # Dec-25-2023
+    "%Y%m%d",                  # 20231225
+    "%d%m%Y",                  # 25122023
+    "%d %B, %Y",               # 25 December, 2023
+    "%B %d, %Y",               # December 25, 2023
+    "%d-%B-%Y",                # 25-December-2023
+)
+
+
+def _date_signature(text, is_format=False):
+    # strptime only matches a string holding month names iff the format has %B/%b, and
+    # holding exactly the separators of the format (whitespace aside)
+    if is_format:
+        has_names = '%B' in text or '%b' in text
+        text      = re.sub(r'%.', '', text)
+    else:
+        has_names = any(char.isalpha() for char in text)
+    return has_names, frozenset(char for char in text if not char.isalnum() and not char.isspace())
+
+
+# Date signature -> formats that can match it, in DATE_FORMATS order
+DATE_FORMATS_BY_SIGNATURE = {}
+for _date_format in DATE_FORMATS:
+    DATE_FORMATS_BY_SIGNATURE.setdefault(_date_signature(_date_format, is_format=True), []).append(_date_format)
+
+# Spanish and Portuguese month names
+MONTH_TRANSLATIONS = {
+    'enero': 'january', 'febrero': 'february', 'marzo': 'march',
+    'abril': 'april', 'mayo': 'may', 'junio': 'june',
+    'julio': 'july', 'agosto': 'august', 'septiembre': 'september',
+    'octubre': 'october', 'noviembre': 'november', 'diciembre': 'december',
+    'janeiro': 'january', 'fevereiro': 'february', 'março': 'march',
+    'maio': 'may', 'junho': 'june',
+    'julho': 'july', 'setembro': 'september',
+    'outubro': 'october', 'novembro': 'november', 'dezembro': 'december'
+}
+MONTH_TRANSLATION_PATTERN = re.compile("|".join(re.escape(month) for month in MONTH_TRANSLATIONS))
+MONTH_NUMBERS             = {month: number for number, month in enumerate((
+    'january', 'february', 'march', 'april', 'may', 'june',
+    'july', 'august', 'september', 'october', 'november', 'december'), start=1)}
+
+DATE_PARENTHESIS_PATTERN = re.compile(r'\s*\([^)]*\)')
+DATE_ORDINAL_PATTERN     = re.compile(r'(\d+)(st|nd|rd|th)')
+WEEKDAY_PATTERN          = re.compile(r'(?:lunes|martes|miércoles|jueves|viernes|sábado|domingo) ')
+YEAR_PATTERN             = re.compile(r'^\d{4}$')
+MONTH_YEAR_PATTERN       = re.compile(rf"^({'|'.join(MONTH_NUMBERS)})\s+(\d{{4}})$", re.IGNORECASE)
+
+STATIC_DATE_CASES   = {
+    '2020 to present': '01-01-2020',
+    '2019 - last year': '01-01-2019'
+}
+RELATIVE_DATE_CASES = {
+    'last month': lambda: datetime.now().replace(day=1) - pd.DateOffset(months=1),
+    'last year': lambda: datetime.now() - pd.DateOffset(years=1),
+}
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _clean_date_string(date_str):
+    # Remove extra whitespace
+    date_str = date_str.strip()
+
+    # Handle empty strings
+    if not date_str or date_str.lower() in ['', 'none', 'null']:
+        return None
+
+    # Handle date ranges - take the first date
+    if ' to ' in date_str:
+        date_str = date_str.split(' to ')[0]
+
+    # Remove timezone information if present
+    date_str = DATE_PARENTHESIS_PATTERN.sub('', date_str)
+
+    # Remove ordinal indicators
+    date_str = DATE_ORDINAL_PATTERN.sub(r'\1', date_str)
+
+    # Normalize Spanish/Portuguese date format
+    date_str = date_str.lower().replace('de ', '').replace(',', '')
+    date_str = WEEKDAY_PATTERN.sub('', date_str)
+
+    # Handle partial dates or special cases
+    if YEAR_PATTERN.match(date_str):  # Just year
+        return f"01-01-{date_str}"
+    month_year = MONTH_YEAR_PATTERN.match(date_str)
+    if month_year:
+        return f"01-{MONTH_NUMBERS[month_year.group(1).lower()]:02d}-{month_year.group(2)}"
+
+    return date_str
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_clean_date(date_str, source_locale='en'):
+    """
+    Parse a cleaned date string
+
+    Returns:
+        tuple: (DD-MM-YYYY date or None, date string with English month names)
+    """
+    if date_str in STATIC_DATE_CASES:
+        return STATIC_DATE_CASES[date_str], date_str
+
+    # Replace month names with English versions in one pass
+    date_str = MONTH_TRANSLATION_PATTERN.sub(lambda match: MONTH_TRANSLATIONS[match.group(0)], date_str)
+
+    # Only the formats that can match the separators and month names of the string are tried
+    for fmt in DATE_FORMATS_BY_SIGNATURE.get(_date_signature(date_str), ()):
+        try:
+            return datetime.strptime(date_str, fmt).strftime(DATE_OUTPUT_FORMAT), date_str
+        except ValueError:
+            continue
+
+    # Try babel parsing as last resort
+    try:
+        return parse_date(date_str, locale=source_locale).strftime(DATE_OUTPUT_FORMAT), date_str
+    except Exception:
+        return None, date_str
+
 
 class DataPreprocessor:
-    def __init__(self, logger):
-        self.logger = logger
+    def __init__(self, logger, metrics=None):
+        self.logger  = logger
+        # Parse timings and failures
+        self.metrics = metrics or get_metrics()
         self.logger.info(f"DataPreprocessor instance initialized.")
         
     def clean_and_parse_features(self, features):
-        if not features or pd.isna(features):
+        """
+        Parse an LLM response into the 11-field schema (strict JSON, repaired locally
+        when needed, see feature_parser)
+        """
+        if not isinstance(features, dict) and (not features or pd.isna(features)):
             return {}
-        elif isinstance(features, dict):
-            return features
         try:
-            # Replace smart quotes with regular quotes
-            features = features.replace("artical_date", "article_date")
-            features = features.replace("dimpfel_classifiation", "dimpfel_classification")
-            features = features.replace("```json", "").replace("```", "")
-            features = features.replace('"', '"').replace('"', '"')
-            features = features.replace("'", "'").replace("'", "'")
-            features = literal_eval(features)
+            with self.metrics.span("feature_parse"):
+                features = parse_features(features)
             self.logger.info("Feature Preprocessing: Features are successfully cleaned and parsed.")
             return features
-        except Exception as e:
-            self.logger.error(f"Feature Preprocessing: Error cleaning and parsing features: {str(e)}", exc_info=True)
+        except FeatureParseError as e:
+            self.metrics.inc("parse_failures", component="features")
+            self.logger.error(f"Feature Preprocessing: Error cleaning and parsing features: {str(e)}")
             return {}
-            
+
     def clean_date_string(self, date_str):
         """
         Clean and normalize date string before parsing
         """
         if not isinstance(date_str, str):
             return None
-            
-        # Remove extra whitespace
-        date_str = date_str.strip()
-        
-        # Handle empty strings
-        if not date_str or date_str.lower() in ['', 'none', 'null']:
-            return None
-            
-        # Handle date ranges - take the first date
-        if ' to ' in date_str:
-            date_str = date_str.split(' to ')[0]
-            
-        # Remove timezone information if present
-        date_str = re.sub(r'\s*\([^)]*\)', '', date_str)
-        
-        # Remove ordinal indicators
-        date_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
-        
-        # Normalize Spanish/Portuguese date format
-        date_str = date_str.lower()
-        date_str = date_str.replace('de ', '')
-        date_str = date_str.replace(',', '')
-        date_str = date_str.replace('lunes ', '')
-        date_str = date_str.replace('martes ', '')
-        date_str = date_str.replace('miércoles ', '')
-        date_str = date_str.replace('jueves ', '')
-        date_str = date_str.replace('viernes ', '')
-        date_str = date_str.replace('sábado ', '')
-        date_str = date_str.replace('domingo ', '')
-        
-        # Handle partial dates or special cases
-        if re.match(r'^\d{4}$', date_str):  # Just year
-            return f"01-01-{date_str}"
-        if re.match(r'^(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{4}$', date_str, re.I):
-            month, year = date_str.split()
-            return f"01-{datetime.strptime(month, '%B').month:02d}-{year}"
-            
-        return date_str
+        return _clean_date_string(date_str)
 
     def standardize_date(self, date_str, source_locale='en'):
         """
         Convert dates from different languages to DD-MM-YYYY format
+
+        Cleaning and parsing are memoized per date string, relative dates ("last month")
+        are computed on every call.
         """
         if not isinstance(date_str, str):
             return None
-            
+
         # Clean the date string
-        date_str = self.clean_date_string(date_str)
+        date_str = _clean_date_string(date_str)
         if not date_str:
             return None
-            
-        # Special cases
-        special_cases = {
-            'last month': (datetime.now().replace(day=1) - pd.DateOffset(months=1)).strftime("%d-%m-%Y"),
-            'last year': (datetime.now() - pd.DateOffset(years=1)).strftime("%d-%m-%Y"),
-            '2020 to present': '01-01-2020',
-            '2019 - last year': '01-01-2019'
-        }
-        
-        if date_str.lower() in special_cases:
-            return special_cases[date_str.lower()]
-            
-        try:
-            # Month name translations
-            month_translations = {
-                'enero': 'january', 'febrero': 'february', 'marzo': 'march',
-                'abril': 'april', 'mayo': 'may', 'junio': 'june',
-                'julio': 'july', 'agosto': 'august', 'septiembre': 'september',
-                'octubre': 'october', 'noviembre': 'november', 'diciembre': 'december',
-                'janeiro': 'january', 'fevereiro': 'february', 'março': 'march',
-                'abril': 'april', 'maio': 'may', 'junho': 'june',
-                'julho': 'july', 'agosto': 'august', 'setembro': 'september',
-                'outubro': 'october', 'novembro': 'november', 'dezembro': 'december'
-            }
-            
-            # Replace month names with English versions
-            for es_month, en_month in month_translations.items():
-                date_str = date_str.lower().replace(es_month, en_month)
-            
-            # Try different date formats
-            formats = [
-                "%d-%m-%Y",                # 25-12-2023
-                "%Y-%m-%d",                # 2023-12-25
-                "%d/%m/%Y",                # 25/12/2023
-                "%d.%m.%Y",                # 25.12.2023
-                "%d %B %Y",                # 25 December 2023
-                "%d %b %Y",                # 25 Dec 2023
-                "%d %b, %Y",               # 25 Dec, 2023
-                "%B %d %Y",                # December 25 2023
-                "%b %d %Y",                # Dec 25 2023
-                "%d-%b-%Y",                # 25-Dec-2023
-                "%d %m %Y",                # 25 12 2023
-                "%b-%d-%Y",                # Dec-25-2023
-                "%Y%m%d",                  # 20231225
-                "%d%m%Y",                  # 25122023
-                "%d %B, %Y",               # 25 December, 2023
-                "%B %d, %Y",               # December 25, 2023
-                "%d-%B-%Y"                 # 25-December-2023
-            ]
-            
-            for fmt in formats:
-                try:
-                    date_obj = datetime.strptime(date_str, fmt)
-                    return date_obj.strftime("%d-%m-%Y")
-                except:
-                    continue
-                    
-            # Try babel parsing as last resort
-            try:
-                date_obj = parse_date(date_str, locale=source_locale)
-                return date_obj.strftime("%d-%m-%Y")
-            except:
-                pass
-                    
-            raise ValueError(f"Could not parse date: {date_str}")
-            
-        except Exception as e:
-            self.logger.error(f"Error processing date '{date_str}': {str(e)}", exc_info=True)
-            return date_str
+
+        # Relative dates depend on today, never cached
+        if date_str in RELATIVE_DATE_CASES:
+            return RELATIVE_DATE_CASES[date_str]().strftime(DATE_OUTPUT_FORMAT)
+
+        with self.metrics.span("date_parse"):
+            standardized, translated = _parse_clean_date(date_str, source_locale)
+        if standardized is None:
+            self.metrics.inc("parse_failures", component="date")
+            self.logger.error(f"Error processing date '{translated}': Could not parse date: {translated}")
+            return translated
+        return standardized
+
+    def standardize_dates(self, dates, source_locale='en'):
+        """
+        Vectorized standardize_date for a whole column: every distinct date string is
+        parsed once and mapped back onto the column
+
+        Args:
+            dates (pd.Series or list): Raw date strings
+            source_locale (str): Locale of the babel fallback parser
+
+        Returns:
+            pd.Series: DD-MM-YYYY dates, None where the value is not a string
+        """
+        dates    = pd.Series(dates, dtype=object)
+        distinct = {date_str: self.standardize_date(date_str, source_locale)
+                    for date_str in pd.unique(dates) if isinstance(date_str, str)}
+        return pd.Series([distinct.get(date_str) if isinstance(date_str, str) else None for date_str in dates],
+                         index=dates.index, dtype=object)
 
 class Utils:
     def __init__(self, logger):
         self.logger = logger
     
-    def extract_urls(self, text):
+    def extract_urls(self, text, unwrap_redirects=True):
         """
         Extracts clean URLs from text while filtering out common PDF artifacts and invalid URL parts.
+
+        Single pass over the text with precompiled patterns: everything from the first closing
+        parenthesis, bracket or quote of a match is cut off by the pattern itself, PDF metadata
+        is dropped and matches still holding an opening parenthesis or bracket are rejected.
+        Redirect wrappers (Outlook safelinks, Google redirects) are replaced by their target,
+        with unwrap_redirects=False the output is the one of the original extractor. Only exact
+        duplicates are removed, see unique_normalized_urls for near duplicates.
+        """
+        unique_urls = {}
+        for match in URL_PATTERN.finditer(text):
+            url = match.group(1)
+            # Remove PDF metadata
+            metadata = url.find('external-destination=')
+            if metadata != -1:
+                url = url[:metadata]
+            # No brackets (the closing ones and quotes are already cut off)
+            if URL_REJECT_PATTERN.search(url):
+                continue
+            if unwrap_redirects:
+                url = unwrap_redirect_url(url)
+            # Remove duplicates while preserving order
+            unique_urls[url] = None
+        return list(unique_urls)
+
+    def fetch_page(self, article_scrapper, article_url):
+        """
+        Scrape the article page (fetch stage of the extraction pipeline)
+        """
+        return article_scrapper.extract_web_content(article_url)
+
+    def extract_features(self, llm_processor, data_preprocessor, page_document):
+        """
+        Run the LLM on the page content and clean up its response (LLM stage of the extraction pipeline)
+        """
+        features = llm_processor.run_llm(page_document.page_content)
+        return self.postprocess_features(data_preprocessor, features)
+
+    def postprocess_features(self, data_preprocessor, features):
+        """
+        Parse the raw LLM response and standardize its dates
         """
-        # More comprehensive URL pattern
-        url_pattern = r'https?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        
-        # Find all matches
-        urls = re.findall(url_pattern, text)
-        
-        # Clean up URLs
-        cleaned_urls = []
-        for url in urls:
-            # Remove common PDF artifacts and invalid URL endings
-            url = re.sub(r'\).*$', '', url)  # Remove everything after closing parenthesis
-            url = re.sub(r'\].*$', '', url)  # Remove everything after closing bracket
-            url = re.sub(r'["\'\]].*$', '', url)  # Remove quotes and anything after
-            url = url.split('external-destination=')[0]  # Remove PDF metadata
-            
-            # Basic URL validation
-            if all(char in string.printable for char in url):  # Check for valid characters
-                if not any(x in url for x in ['[', ']', ')', '(', '"', "'"]):  # No brackets or quotes
-                    cleaned_urls.append(url.strip())
-        
-        # Remove duplicates while preserving order
-        return list(dict.fromkeys(cleaned_urls))
-    
-    def get_features(self, article_scrapper, llm_processor, data_preprocessor, selected_date, article_url):
-        # Extract the web content
-        page_document     = article_scrapper.extract_web_content(article_url)
-        features          = llm_processor.run_llm(page_document.page_content)
-        # Here you would add your URL processing logic
         features                 = data_preprocessor.clean_and_parse_features(features)
         features['article_date'] = data_preprocessor.standardize_date(features.get('article_date'))
-        features['date']         =  data_preprocessor.standardize_date(features.get('date'))
+        features['date']         = data_preprocessor.standardize_date(features.get('date'))
+        return features
+
+    def postprocess_many_features(self, data_preprocessor, responses):
+        """
+        Parse a batch of raw LLM responses and standardize their dates column by column
+        """
+        features_list = [data_preprocessor.clean_and_parse_features(response) for response in responses]
+        for field in ('article_date', 'date'):
+            dates = data_preprocessor.standardize_dates([features.get(field) for features in features_list])
+            for features, standardized in zip(features_list, dates):
+                features[field] = standardized
+        return features_list
 
+    def build_article_details(self, selected_date, article_url, page_document, features):
+        """
+        Build the output record stored in output.json for a processed article
+        """
         article_details = {
             "article_received_month": selected_date.strftime("%B") + " " + str(selected_date.year),
             "article_url": article_url,
@@ -205,7 +397,27 @@ class Utils:
         article_details.update(features)
         return article_details
 
+    def find_processed(self, result_store, article_url):
+        """
+        Latest stored record of an already processed article (matched on the normalized URL)
+        """
+        if result_store is None:
+            return None
+        return result_store.latest_by_url(article_url)
 
+    def get_features(self, article_scrapper, llm_processor, data_preprocessor, selected_date, article_url,
+                     result_store=None, refresh=False):
+        # Known articles are not scraped and extracted again unless a refresh is asked for
+        if not refresh:
+            article_details = self.find_processed(result_store, article_url)
+            if article_details is not None:
+                self.logger.info(f"Article already processed, skipping: {article_url}")
+                return article_details
+        # Extract the web content
+        page_document = self.fetch_page(article_scrapper, article_url)
+        # Extract the features from the page content using the LLM
+        features      = self.extract_features(llm_processor, data_preprocessor, page_document)
+        return self.build_article_details(selected_date, article_url, page_document, features)
 
     # Function to expand the dictionary column into separate columns
     def expand_dict_column(self, df, dict_column):
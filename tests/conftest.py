@@ -0,0 +1,24 @@
+import os
+import sys
+import logging
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+# The modules of src/ import each other by their flat names, as when run with streamlit,
+# and the local provider stand-ins live with the benchmarks
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+
+@pytest.fixture(autouse=True)
+def rate_limit_db(tmp_path, monkeypatch):
+    # The shared rate limit buckets of the tests never touch the ones of output/
+    import rate_limiter
+    monkeypatch.setenv("LLM_RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite3"))
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("tests")
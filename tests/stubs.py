@@ -0,0 +1,51 @@
+import json
+import time
+import threading
+
+from langchain.docstore.document import Document
+
+from local_servers import FAKE_FEATURES
+
+
+class StubScrapper:
+    """
+    Serves a page for every URL, the URLs containing `fail_marker` cannot be fetched
+    """
+    def __init__(self, delay=0.0, fail_marker="/broken/"):
+        self.delay       = delay
+        self.fail_marker = fail_marker
+        self.fetched     = []
+        self._lock       = threading.Lock()
+
+    def extract_web_content(self, article_url):
+        time.sleep(self.delay)
+        with self._lock:
+            self.fetched.append(article_url)
+        if self.fail_marker in article_url:
+            raise ConnectionError(f"{article_url} is unreachable")
+        return Document(page_content=f"Content of {article_url}", metadata={'source': article_url, 'title': article_url})
+
+
+class StubLLM:
+    """
+    Answers the fake features for every article, one by one or in batches
+    """
+    SELECTED_LLM = "OpenAI"
+    LLM_MODEL    = "stub"
+
+    def __init__(self, delay=0.0):
+        self.delay    = delay
+        self.contents = []
+        self.batches  = []
+        self._lock    = threading.Lock()
+
+    def run_llm(self, news_page_content):
+        time.sleep(self.delay)
+        with self._lock:
+            self.contents.append(news_page_content)
+        return json.dumps(FAKE_FEATURES)
+
+    def run_llm_batch(self, news_page_contents, max_articles=8):
+        with self._lock:
+            self.batches.append(list(news_page_contents))
+        return [self.run_llm(news_page_content) for news_page_content in news_page_contents]
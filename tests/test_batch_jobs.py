@@ -0,0 +1,156 @@
+import pytest
+
+from llm import LLM
+from batch_jobs import BatchJobRunner, JOB_SUBMITTING, JOB_SUBMITTED, JOB_COMPLETED, JOB_MERGED
+from utils import DataPreprocessor
+from result_store import ResultStore
+from content_reducer import ContentReducer
+from local_servers import FakeLLMServer, FAKE_FEATURES
+
+MODELS = {'openai': 'gpt-4o-mini', 'gemini': 'gemini-1.5-flash'}
+
+SENTENCE     = "The {index}th tranche of the expressway loan was signed by the finance ministry and the lender today."
+ARTICLE_TEXT = " ".join(SENTENCE.format(index=index) for index in range(6))
+LONG_TEXT    = " ".join(SENTENCE.format(index=index) for index in range(120))
+
+
+def article(index, page_content=ARTICLE_TEXT, received_date="2024-03-12"):
+    return {
+        'article_url': f"https://news.example.com/article/{index}",
+        'received_date': received_date,
+        'page_source': f"https://news.example.com/article/{index}",
+        'page_title': f"Article {index}",
+        'page_content': page_content,
+    }
+
+
+@pytest.fixture(params=sorted(MODELS))
+def provider(request):
+    return request.param
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer(latency=0, per_1k_tokens=0, batch_pending_polls=1) as server:
+        yield server
+
+
+def make_runner(logger, provider, server, jobs_dir, token_budget=None):
+    base_url = f"{server.url}/v1" if provider == 'openai' else server.url
+    llm      = LLM(logger, provider, MODELS[provider], "local-test-key", base_url=base_url,
+                   content_reducer=ContentReducer(logger, MODELS[provider], token_budget=token_budget))
+    return BatchJobRunner(logger, llm, DataPreprocessor(logger), jobs_dir=str(jobs_dir), base_url=base_url, poll_interval=0)
+
+
+def test_submit_poll_collect(logger, provider, server, tmp_path):
+    runner = make_runner(logger, provider, server, tmp_path)
+    job_id = runner.create_job([article(index) for index in range(3)])
+
+    records = runner.run(job_id)
+
+    assert runner.load(job_id)['status'] == JOB_COMPLETED
+    assert len(server.batch_prompts()) == 3
+    assert [record['article_url'] for record in records] == [article(index)['article_url'] for index in range(3)]
+    assert all(record['country'] == FAKE_FEATURES['country'] for record in records)
+    assert all(record['article_received_month'] == "March 2024" for record in records)
+    # DD-MM-YYYY, standardized like the synchronous path
+    assert records[0]['article_date'] == "12-03-2024"
+
+
+def test_restarted_runner_resumes_the_job(logger, provider, server, tmp_path):
+    job_id = make_runner(logger, provider, server, tmp_path).create_job([article(index) for index in range(2)])
+
+    # The batch is still in progress on the first poll
+    assert make_runner(logger, provider, server, tmp_path).run(job_id, wait=False) is None
+    assert make_runner(logger, provider, server, tmp_path).load(job_id)['status'] == JOB_SUBMITTED
+
+    # A new process picks the persisted job up without submitting it again
+    records = make_runner(logger, provider, server, tmp_path).run(job_id)
+    assert len(records) == 2
+    assert len(server.batches) == 1
+
+
+def test_merge_happens_once(logger, provider, server, tmp_path):
+    runner       = make_runner(logger, provider, server, tmp_path)
+    job_id       = runner.create_job([article(index) for index in range(2)])
+    records      = runner.run(job_id)
+    result_store = ResultStore(logger, db_path=str(tmp_path / "results.sqlite3"))
+
+    assert runner.merge_into(job_id, records, result_store) == 2
+    assert runner.merge_into(job_id, records, result_store) == 0
+    assert runner.load(job_id)['status'] == JOB_MERGED
+
+
+def test_long_articles_send_every_chunk(logger, provider, server, tmp_path):
+    runner = make_runner(logger, provider, server, tmp_path, token_budget=200)
+    chunks = runner.llm_processor.content_reducer.reduce(LONG_TEXT)
+    assert len(chunks) > 1
+    job_id = runner.create_job([article(0, page_content=LONG_TEXT), article(1)])
+
+    records = runner.run(job_id)
+
+    prompts = server.batch_prompts()
+    assert len(prompts) == len(chunks) + 1
+    # Every chunk of the long article is in the batch, not only the first one
+    assert all(any(chunk in prompt for _, prompt in prompts) for chunk in chunks)
+    assert len(records) == 2
+    assert records[0]['project_title'] == FAKE_FEATURES['project_title']
+    assert records[0]['page_content'] == LONG_TEXT
+
+
+def test_received_dates_are_checked_before_upload(logger, provider, server, tmp_path):
+    runner = make_runner(logger, provider, server, tmp_path)
+    job_id = runner.create_job([
+        article(0, received_date="12 March 2024"),
+        article(1, received_date="not a date"),
+        article(2),
+    ])
+
+    job = runner.load(job_id)
+    assert [item['received_date'] for item in job['articles'].values()] == ["2024-03-12", "2024-03-12"]
+
+    records = runner.run(job_id)
+    assert len(server.batch_prompts()) == 2
+    assert [record['article_url'] for record in records] == [article(0)['article_url'], article(2)['article_url']]
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_interrupted_submission_is_not_billed_twice(logger, provider, server, tmp_path, monkeypatch):
+    runner = make_runner(logger, provider, server, tmp_path)
+    job_id = runner.create_job([article(index) for index in range(2)])
+    save   = runner.save
+
+    def save_until_submitted(job):
+        # The process stops after the provider accepted the batch, before its ID was saved
+        if job['status'] == JOB_SUBMITTED:
+            raise Interrupted()
+        save(job)
+
+    monkeypatch.setattr(runner, "save", save_until_submitted)
+    with pytest.raises(Interrupted):
+        runner.run(job_id)
+    assert runner.load(job_id)['status'] == JOB_SUBMITTING
+
+    records = make_runner(logger, provider, server, tmp_path).run(job_id)
+    assert len(server.batches) == 1
+    assert len(records) == 2
+
+
+def test_submission_interrupted_before_the_provider_is_sent_again(logger, provider, server, tmp_path, monkeypatch):
+    runner = make_runner(logger, provider, server, tmp_path)
+    job_id = runner.create_job([article(index) for index in range(2)])
+
+    def interrupted_submit(job_id, prompts):
+        raise Interrupted()
+
+    monkeypatch.setattr(runner.backend, "submit", interrupted_submit)
+    with pytest.raises(Interrupted):
+        runner.run(job_id)
+    assert not server.batches
+
+    records = make_runner(logger, provider, server, tmp_path).run(job_id)
+    assert len(server.batches) == 1
+    assert len(records) == 2
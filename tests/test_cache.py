@@ -0,0 +1,31 @@
+import os
+import time
+import multiprocessing
+
+import pytest
+
+from cache import PageCache
+
+URL = "https://www.reuters.com/world/article-1"
+
+
+def _write_entries(cache_dir, worker):
+    # Forked workers keep the thread ident of their parent's main thread
+    cache = PageCache(multiprocessing.get_logger(), cache_dir=cache_dir)
+    for index in range(300):
+        cache._write(cache._path(URL), {'url': URL, 'fetched_at': time.time(), 'text': f"{worker}-{index}" * 200})
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_processes_writing_the_same_entry_do_not_collide(logger, tmp_path):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_write_entries, args=(str(tmp_path), worker)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+    assert [worker.exitcode for worker in workers] == [0] * len(workers)
+
+    cache = PageCache(logger, cache_dir=str(tmp_path))
+    assert cache.get(URL)['url'] == URL
+    assert not [name for name in os.listdir(cache.cache_dir) if name.endswith('.tmp')]
@@ -0,0 +1,13 @@
+import pytest
+
+from content_reducer import BOILERPLATE_PATTERN
+
+
+@pytest.mark.parametrize("sentence", [
+    "© 2024 Reuters",
+    "Reuters © 2024",
+    "Photo: AFP ©",
+])
+def test_copyright_sign_is_boilerplate(sentence):
+    assert BOILERPLATE_PATTERN.search(sentence)
+
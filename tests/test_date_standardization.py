@@ -0,0 +1,151 @@
+import re
+from datetime import datetime, date
+
+import pandas as pd
+import pytest
+from babel.dates import parse_date
+from langchain.docstore.document import Document
+
+from utils import DataPreprocessor, Utils, DATE_FORMATS
+
+# DataPreprocessor.clean_date_string and standardize_date before the memoized rewrite,
+# as functions and without their comments and error logging
+LEGACY_FORMATS = [
+    "%d-%m-%Y",                # 25-12-2023
+    "%Y-%m-%d",                # 2023-12-25
+    "%d/%m/%Y",                # 25/12/2023
+    "%d.%m.%Y",                # 25.12.2023
+    "%d %B %Y",                # 25 December 2023
+    "%d %b %Y",                # 25 Dec 2023
+    "%d %b, %Y",               # 25 Dec, 2023
+    "%B %d %Y",                # December 25 2023
+    "%b %d %Y",                # Dec 25 2023
+    "%d-%b-%Y",                # 25-Dec-2023
+    "%d %m %Y",                # 25 12 2023
+    "%b-%d-%Y",                # Dec-25-2023
+    "%Y%m%d",                  # 20231225
+    "%d%m%Y",                  # 25122023
+    "%d %B, %Y",               # 25 December, 2023
+    "%B %d, %Y",               # December 25, 2023
+    "%d-%B-%Y"                 # 25-December-2023
+]
+
+
+def legacy_clean_date_string(date_str):
+    if not isinstance(date_str, str):
+        return None
+    date_str = date_str.strip()
+    if not date_str or date_str.lower() in ['', 'none', 'null']:
+        return None
+    if ' to ' in date_str:
+        date_str = date_str.split(' to ')[0]
+    date_str = re.sub(r'\s*\([^)]*\)', '', date_str)
+    date_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
+    date_str = date_str.lower()
+    date_str = date_str.replace('de ', '')
+    date_str = date_str.replace(',', '')
+    date_str = date_str.replace('lunes ', '')
+    date_str = date_str.replace('martes ', '')
+    date_str = date_str.replace('miércoles ', '')
+    date_str = date_str.replace('jueves ', '')
+    date_str = date_str.replace('viernes ', '')
+    date_str = date_str.replace('sábado ', '')
+    date_str = date_str.replace('domingo ', '')
+    if re.match(r'^\d{4}$', date_str):  # Just year
+        return f"01-01-{date_str}"
+    if re.match(r'^(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{4}$', date_str, re.I):
+        month, year = date_str.split()
+        return f"01-{datetime.strptime(month, '%B').month:02d}-{year}"
+    return date_str
+
+
+def legacy_standardize_date(date_str, source_locale='en'):
+    if not isinstance(date_str, str):
+        return None
+    date_str = legacy_clean_date_string(date_str)
+    if not date_str:
+        return None
+    special_cases = {
+        'last month': (datetime.now().replace(day=1) - pd.DateOffset(months=1)).strftime("%d-%m-%Y"),
+        'last year': (datetime.now() - pd.DateOffset(years=1)).strftime("%d-%m-%Y"),
+        '2020 to present': '01-01-2020',
+        '2019 - last year': '01-01-2019'
+    }
+    if date_str.lower() in special_cases:
+        return special_cases[date_str.lower()]
+    try:
+        month_translations = {
+            'enero': 'january', 'febrero': 'february', 'marzo': 'march',
+            'abril': 'april', 'mayo': 'may', 'junio': 'june',
+            'julio': 'july', 'agosto': 'august', 'septiembre': 'september',
+            'octubre': 'october', 'noviembre': 'november', 'diciembre': 'december',
+            'janeiro': 'january', 'fevereiro': 'february', 'março': 'march',
+            'abril': 'april', 'maio': 'may', 'junho': 'june',
+            'julho': 'july', 'agosto': 'august', 'setembro': 'september',
+            'outubro': 'october', 'novembro': 'november', 'dezembro': 'december'
+        }
+        for es_month, en_month in month_translations.items():
+            date_str = date_str.lower().replace(es_month, en_month)
+        for fmt in LEGACY_FORMATS:
+            try:
+                date_obj = datetime.strptime(date_str, fmt)
+                return date_obj.strftime("%d-%m-%Y")
+            except:
+                continue
+        try:
+            date_obj = parse_date(date_str, locale=source_locale)
+            return date_obj.strftime("%d-%m-%Y")
+        except:
+            pass
+        raise ValueError(f"Could not parse date: {date_str}")
+    except Exception as e:
+        return date_str
+
+
+# Every format of the old loop, on an unambiguous date and on one whose day could be a month
+FORMATTED_DATES = [datetime(2023, 12, 25).strftime(fmt) for fmt in LEGACY_FORMATS] + \
+                  [datetime(2024, 3, 5).strftime(fmt) for fmt in LEGACY_FORMATS]
+OTHER_DATES     = [
+    "25th December 2023", "March 1st, 2024", "12 March 2024 (EST)", "5 de marzo de 2024", "lunes 5 de marzo 2024",
+    "15 janeiro 2024", "3 março 2024", "2024", "March 2024", "last month", "last year", "2020 to present",
+    "2019 - last year", "1 May 2024 to 3 May 2024", "  25-12-2023  ", "DECEMBER 25, 2023", "31-02-2024",
+    "not a date", "Q3 2024", "", "   ", "None", "null", "2024/03/05", "05.03.24",
+]
+
+
+@pytest.fixture
+def data_preprocessor(logger):
+    return DataPreprocessor(logger)
+
+
+def test_format_list_is_unchanged():
+    assert list(DATE_FORMATS) == LEGACY_FORMATS
+
+
+@pytest.mark.parametrize("date_str", FORMATTED_DATES + OTHER_DATES)
+def test_same_date_as_the_format_loop(data_preprocessor, date_str):
+    assert data_preprocessor.standardize_date(date_str) == legacy_standardize_date(date_str)
+
+
+@pytest.mark.parametrize("value", [None, 20240305, 3.5, float('nan'), date(2024, 3, 5)])
+def test_non_string_dates_are_none(data_preprocessor, value):
+    assert data_preprocessor.standardize_date(value) is None
+    assert legacy_standardize_date(value) is None
+
+
+def test_column_matches_value_by_value(data_preprocessor):
+    column   = (FORMATTED_DATES + OTHER_DATES + [None, float('nan')]) * 3
+    expected = [legacy_standardize_date(value) for value in column]
+    assert data_preprocessor.standardize_dates(pd.Series(column)).tolist() == expected
+    assert data_preprocessor.standardize_dates(column).tolist() == expected
+
+
+def test_unparseable_dates_keep_the_selected_date_for_the_received_month(logger, data_preprocessor):
+    utils    = Utils(logger)
+    document = Document(page_content="Content", metadata={'source': "https://a.example", 'title': "A"})
+    for response in ({'article_date': "not a date", 'date': None}, {'article_date': "", 'date': "Q3 2024"}):
+        features = utils.postprocess_features(data_preprocessor, dict(response))
+        assert features['article_date'] == legacy_standardize_date(response['article_date'])
+        assert features['date'] == legacy_standardize_date(response['date'])
+        record   = utils.build_article_details(date(2024, 3, 12), "https://a.example", document, features)
+        assert record['article_received_month'] == "March 2024"
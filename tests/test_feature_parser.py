@@ -0,0 +1,43 @@
+import pytest
+
+from feature_parser import FeatureParseError, parse_features, repair_json
+
+
+def test_valid_json_is_parsed_as_is():
+    features = parse_features('{"country": "Kenya", "amount": "USD 668 million"}')
+    assert features['country'] == "Kenya"
+    assert features['amount'] == "USD 668 million"
+    assert features['project_title'] == ''
+
+
+def test_python_literals_outside_strings_are_repaired():
+    features = parse_features("{'country': 'Kenya', 'amount': None, 'sector': True,}")
+    assert features['amount'] == ''
+    assert features['sector'] == 'true'
+
+
+@pytest.mark.parametrize("value", ["None of the above", "True North", "False Bay Port", "Project None"])
+def test_literal_words_inside_strings_are_kept(value):
+    # Valid double quoted JSON except for the trailing comma, so it goes through the repair
+    features = parse_features(f'{{"project_title": "{value}", "country": "Kenya",}}')
+    assert features['project_title'] == value
+
+
+def test_literal_words_inside_single_quoted_strings_are_kept():
+    features = parse_features("{'project_title': 'None of the above', 'recipient': 'True North',}")
+    assert features['project_title'] == "None of the above"
+    assert features['recipient'] == "True North"
+
+
+def test_trailing_comma_inside_strings_is_kept():
+    assert repair_json('{"amount": "1, 2, ]", "country": "Kenya",}') == '{"amount": "1, 2, ]", "country": "Kenya"}'
+
+
+def test_apostrophes_in_double_quoted_strings_are_kept():
+    features = parse_features('```json\n{"project_title": "Kenya\'s Expressway", "country": "Kenya",}\n```')
+    assert features['project_title'] == "Kenya's Expressway"
+
+
+def test_unrepairable_output_raises():
+    with pytest.raises(FeatureParseError):
+        parse_features("no json here")
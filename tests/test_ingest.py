@@ -0,0 +1,45 @@
+import io
+from datetime import date
+from email.message import EmailMessage
+from urllib.parse import quote
+
+from ingest import ArticleIngestor
+
+ARTICLE_URLS = ["https://news.example.com/a/expressway-loan", "https://other.example.org/story?id=7"]
+
+
+def safelink(url):
+    return f"https://eur01.safelinks.protection.outlook.com/?url={quote(url, safe='')}&data=abc"
+
+
+def newsletter(text_urls, html_urls):
+    message            = EmailMessage()
+    message['Subject'] = "Daily news"
+    message['Date']    = "Tue, 12 Mar 2024 08:00:00 +0000"
+    message.set_content("Today:\n" + "\n".join(text_urls))
+    message.add_alternative("<html><body>" + "".join(f'<a href="{url}">Story</a>' for url in html_urls) + "</body></html>",
+                            subtype='html')
+    file      = io.BytesIO(message.as_bytes())
+    file.name = "newsletter.eml"
+    return file
+
+
+def test_alternative_bodies_yield_every_article_once(logger):
+    rows = list(ArticleIngestor(logger).iter_rows(newsletter(ARTICLE_URLS, ARTICLE_URLS)))
+
+    assert [url for url, _ in rows] == ARTICLE_URLS
+    assert all(received_date == date(2024, 3, 12) for _, received_date in rows)
+
+
+def test_links_are_deduplicated_on_the_normalized_url(logger):
+    # The HTML part wraps the links in safelinks and adds tracking parameters
+    html_urls = [safelink(ARTICLE_URLS[0]), ARTICLE_URLS[1] + "&utm_source=newsletter"]
+    rows      = list(ArticleIngestor(logger).iter_rows(newsletter(ARTICLE_URLS, html_urls)))
+
+    assert [url for url, _ in rows] == ARTICLE_URLS
+
+
+def test_text_body_redirects_are_unwrapped(logger):
+    rows = list(ArticleIngestor(logger).iter_rows(newsletter([safelink(ARTICLE_URLS[0])], [])))
+
+    assert [url for url, _ in rows] == [ARTICLE_URLS[0]]
@@ -0,0 +1,77 @@
+import os
+import sys
+import subprocess
+from datetime import date
+
+import pytest
+
+import job_runner
+import llm_router
+import metrics
+import scrapper
+from job_runner import JobStore, JobWorker, JOB_QUEUED, JOB_RUNNING, JOB_INTERRUPTED, JOB_COMPLETED, ITEM_DONE, ITEM_SKIPPED
+from result_store import ResultStore
+from stubs import StubScrapper, StubLLM
+
+ROWS = [(f"https://news.example.com/article/{index}", date(2024, 3, 12)) for index in range(5)]
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def store(logger, tmp_path):
+    return JobStore(logger, db_path=str(tmp_path / "jobs.sqlite3"))
+
+
+def set_pids(store, job_id, worker_pid=None, owner_pid=None):
+    with store._conn:
+        store._conn.execute("UPDATE jobs SET worker_pid = ?, owner_pid = ? WHERE job_id = ?", (worker_pid, owner_pid, job_id))
+
+
+def test_only_jobs_of_dead_processes_are_interrupted(store, dead_pid):
+    live_queued   = store.create_job(ROWS, {})
+    dead_queued   = store.create_job(ROWS, {})
+    live_running  = store.create_job(ROWS, {})
+    dead_running  = store.create_job(ROWS, {})
+    set_pids(store, dead_queued, owner_pid=dead_pid)
+    store.claim(live_running, os.getpid())
+    store.claim(dead_running, dead_pid)
+
+    assert sorted(store.mark_interrupted()) == sorted([dead_queued, dead_running])
+    assert store.get_job(live_queued)['status'] == JOB_QUEUED
+    assert store.get_job(live_running)['status'] == JOB_RUNNING
+    assert store.get_job(dead_queued)['status'] == JOB_INTERRUPTED
+    assert store.get_job(dead_running)['status'] == JOB_INTERRUPTED
+
+
+def test_resume_runs_only_pending_and_in_flight_articles(logger, store, tmp_path, monkeypatch):
+    job_id = store.create_job(ROWS, {'selected_llm': "OpenAI", 'llm_model': "stub", 'fetch_workers': 2, 'llm_workers': 2})
+    store.finish_item(job_id, 0, ITEM_DONE, article_details={'article_url': ROWS[0][0]})
+    store.finish_item(job_id, 1, ITEM_SKIPPED, article_details={'article_url': ROWS[1][0]})
+    # In flight when the previous worker died
+    store.start_item(job_id, 2)
+    set_pids(store, job_id, owner_pid=None)
+    assert store.mark_interrupted() == [job_id]
+    store.requeue(job_id)
+
+    stub_scrapper, stub_llm = StubScrapper(), StubLLM()
+    monkeypatch.setattr(llm_router, "build_llm", lambda *args, **kwargs: stub_llm)
+    monkeypatch.setattr(scrapper, "ArticleScrapper", lambda *args, **kwargs: stub_scrapper)
+    monkeypatch.setattr(job_runner, "OUTPUT_JSON_FILE", str(tmp_path / "output.json"))
+    monkeypatch.setattr(metrics, "DEFAULT_METRICS_DIR", str(tmp_path / "metrics"))
+    worker = JobWorker(logger, store)
+    worker._components = {'driver_pool': None, 'http_client': None, 'page_cache': None, 'llm_response_cache': None,
+                          'result_store': ResultStore(logger, db_path=str(tmp_path / "results.sqlite3"))}
+
+    worker.run_job(job_id, "test-key")
+
+    assert sorted(stub_scrapper.fetched) == [url for url, _ in ROWS[2:]]
+    job = store.get_job(job_id)
+    assert job['status'] == JOB_COMPLETED
+    assert job['counts'][ITEM_DONE] == 4
+    assert job['counts'][ITEM_SKIPPED] == 1
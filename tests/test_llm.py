@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+import llm as llm_module
+from cache import LLMResponseCache
+from llm import LLM, get_openai_client, get_gemini_model
+from local_servers import FakeLLMServer, FAKE_FEATURES
+
+ARTICLE_TEXT = " ".join(f"The {index}th tranche of the expressway loan was signed by the finance ministry today." for index in range(5))
+
+
+def test_gemini_back_ends_keep_their_own_endpoint(logger):
+    with FakeLLMServer(latency=0, per_1k_tokens=0) as first, FakeLLMServer(latency=0, per_1k_tokens=0) as second:
+        first_llm  = LLM(logger, "Gemini", "gemini-1.5-flash", "first-key", base_url=first.url)
+        second_llm = LLM(logger, "Gemini", "gemini-1.5-flash", "second-key", base_url=second.url)
+
+        # Creating the second model must not redirect the first one
+        assert first_llm.run_llm(ARTICLE_TEXT)['country'] == FAKE_FEATURES['country']
+        assert second_llm.run_llm(ARTICLE_TEXT + " Again.")['country'] == FAKE_FEATURES['country']
+        assert first_llm.run_llm(ARTICLE_TEXT + " Once more.")['country'] == FAKE_FEATURES['country']
+
+        assert (first.usage()['requests'], second.usage()['requests']) == (2, 1)
+
+
+def test_gemini_model_is_not_redirected_by_a_later_model(logger):
+    with FakeLLMServer(latency=0, per_1k_tokens=0) as first, FakeLLMServer(latency=0, per_1k_tokens=0) as second:
+        first_model = get_gemini_model("gemini-1.5-flash", "first-key", base_url=first.url)
+        # Another back end set up while the first model is in use
+        get_gemini_model("gemini-1.5-flash", "second-key", base_url=second.url)
+
+        first_model.generate_content("Extract the features.")
+
+        assert (first.usage()['requests'], second.usage()['requests']) == (1, 0)
+
+
+def test_async_openai_clients_are_not_reused_across_event_loops():
+    async def client():
+        return get_openai_client("key", use_async=True, base_url="http://127.0.0.1:9/v1")
+
+    first_client  = asyncio.run(client())
+    second_client = asyncio.run(client())
+
+    assert first_client is not second_client
+    # The closed loops are dropped, only clients of live loops are kept
+    asyncio.run(client())
+    assert all(not loop.is_closed() for loop in llm_module._async_clients)
+
+
+def test_async_openai_client_is_shared_within_a_loop():
+    async def clients():
+        return get_openai_client("key", use_async=True), get_openai_client("key", use_async=True)
+
+    first_client, second_client = asyncio.run(clients())
+    assert first_client is second_client
+
+
+def test_arun_llm_many_against_local_endpoint(logger):
+    with FakeLLMServer(latency=0, per_1k_tokens=0) as server:
+        llm      = LLM(logger, "OpenAI", "gpt-4o-mini", "key", base_url=f"{server.url}/v1")
+        contents = [f"{ARTICLE_TEXT} Article {index}." for index in range(3)]
+
+        results = asyncio.run(llm.arun_llm_many(contents))
+
+        assert [features['project_title'] for features in results] == [FAKE_FEATURES['project_title']] * 3
+        assert server.usage()['requests'] == 3
+
+
+def test_chunk_responses_share_one_preprocessor(logger, monkeypatch):
+    llm = LLM(logger, "OpenAI", "gpt-4o", "test-key")
+    monkeypatch.setattr(llm_module, "DataPreprocessor", None)
+    features = llm._reduce_responses(['{"country": "Kenya"}', '{"sector": "Economic"}'])
+    assert features["country"] == "Kenya"
+    assert features["sector"] == "Economic"
+
+
+def test_batched_responses_are_cached_like_single_ones(logger, tmp_path, monkeypatch):
+    response_cache = LLMResponseCache(logger, cache_dir=str(tmp_path))
+    llm = LLM(logger, "OpenAI", "gpt-4o", "test-key", response_cache=response_cache)
+    monkeypatch.setattr(llm, "complete", lambda prompt: '[{"id": "0", "country": "São Tomé and Príncipe"}]')
+    llm._run_batch([("0", ARTICLE_TEXT)])
+    cache_key = llm._cache_key(ARTICLE_TEXT)
+    assert "São Tomé and Príncipe" in response_cache.get(cache_key)
+
+
+def test_strict_batches_raise_provider_errors(logger, monkeypatch):
+    llm = LLM(logger, "OpenAI", "gpt-4o", "test-key")
+
+    def complete(prompt):
+        raise ConnectionError("provider is down")
+
+    monkeypatch.setattr(llm, "complete", complete)
+    contents = ["A short article about a port.", "A short article about a railway."]
+    assert llm.run_llm_batch(contents) == [llm.empty_features()] * 2
+    with pytest.raises(ConnectionError):
+        llm.run_llm_batch(contents, strict=True)
+
+
+def test_gemini_model_falls_back_to_the_configured_client(monkeypatch):
+    class PlainModel:
+        # An SDK version without the private per-model client
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+    configured = []
+    monkeypatch.setattr(llm_module.genai, "GenerativeModel", PlainModel)
+    monkeypatch.setattr(llm_module.genai, "configure", lambda **options: configured.append(options))
+
+    model = get_gemini_model("gemini-plain", "plain-key", base_url="http://127.0.0.1:9")
+
+    assert isinstance(model, PlainModel) and not hasattr(model, "_client")
+    assert configured == [{"api_key": "plain-key", "transport": "rest",
+                           "client_options": {"api_key": "plain-key", "api_endpoint": "http://127.0.0.1:9"}}]
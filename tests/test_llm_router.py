@@ -0,0 +1,92 @@
+import json
+import time
+import threading
+
+import llm_router
+from content_reducer import ContentReducer
+from llm_router import LLMBackend, LLMRouter, MAX_CONSECUTIVE_ERRORS, build_llm
+
+
+class FakeLLM:
+    def __init__(self, logger, model, delay=0.0, fails=False, token_budget=1000):
+        self.SELECTED_LLM    = "OpenAI"
+        self.LLM_MODEL       = model
+        self.content_reducer = ContentReducer(logger, model, token_budget=token_budget)
+        self.delay           = delay
+        self.fails           = fails
+        self.calls           = 0
+
+    def empty_features(self):
+        return {'project_title': ''}
+
+    def run_llm(self, news_page_content, strict=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fails:
+            raise ConnectionError(f"{self.LLM_MODEL} is down")
+        return {'project_title': self.LLM_MODEL}
+
+    def run_llm_batch(self, news_page_contents, max_articles=8, strict=False):
+        if self.fails:
+            if strict:
+                raise ConnectionError(f"{self.LLM_MODEL} is down")
+            return [self.empty_features() for _ in news_page_contents]
+        return [{'project_title': self.LLM_MODEL} for _ in news_page_contents]
+
+
+def router_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("llm-router")]
+
+
+def test_routers_share_one_thread_pool(logger):
+    for index in range(20):
+        router = LLMRouter(logger, [LLMBackend(FakeLLM(logger, f"model-{index}"))])
+        assert router.run_llm("Short article.") == {'project_title': f"model-{index}"}
+    # One pool for the process, not one per router
+    assert len({id(LLMRouter(logger, [LLMBackend(FakeLLM(logger, "a"))])._executor) for _ in range(3)}) == 1
+    assert len(router_threads()) <= 32
+
+
+def test_failed_back_end_fails_over(logger):
+    down, up = FakeLLM(logger, "down", fails=True), FakeLLM(logger, "up")
+    router   = LLMRouter(logger, [LLMBackend(down), LLMBackend(up)])
+
+    assert router.run_llm("Short article.") == {'project_title': "up"}
+    assert (down.calls, up.calls) == (1, 1)
+
+
+def test_slow_back_end_is_hedged(logger):
+    slow, fast = FakeLLM(logger, "slow", delay=1.0), FakeLLM(logger, "fast")
+    router     = LLMRouter(logger, [LLMBackend(slow), LLMBackend(fast)], hedge_after=0.1)
+
+    start = time.monotonic()
+    assert router.run_llm("Short article.") == {'project_title': "fast"}
+    assert time.monotonic() - start < 0.9
+
+
+def test_long_articles_go_to_the_long_context_back_end(logger):
+    short, long = FakeLLM(logger, "short", token_budget=10), FakeLLM(logger, "long", token_budget=10000)
+    router      = LLMRouter(logger, [LLMBackend(short), LLMBackend(long)])
+
+    assert router.run_llm("A long article sentence. " * 50) == {'project_title': "long"}
+    assert router.run_llm("Short.") == {'project_title': "short"}
+
+
+def test_failed_batch_fails_over_article_by_article(logger):
+    down, up = FakeLLM(logger, "down", fails=True), FakeLLM(logger, "up")
+    router   = LLMRouter(logger, [LLMBackend(down), LLMBackend(up)])
+
+    assert router.run_llm_batch(["First article.", "Second article."]) == [{'project_title': "up"}] * 2
+
+
+def test_routers_built_for_each_job_share_back_end_stats(logger, monkeypatch):
+    monkeypatch.setattr(llm_router, "_backend_stats", {})
+    monkeypatch.setenv("LLM_ROUTES", json.dumps([{"provider": "OpenAI", "model": "gpt-4o-mini"}]))
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    first, second = build_llm(logger, "OpenAI", "gpt-4o", "test-key"), build_llm(logger, "OpenAI", "gpt-4o", "test-key")
+
+    assert [backend.call_stats for backend in first.backends] == [backend.call_stats for backend in second.backends]
+    for _ in range(MAX_CONSECUTIVE_ERRORS):
+        first.backends[0].record(1.0, ok=False)
+    # The back end failing in one job is left out of the rotation of the next one
+    assert [backend.name for backend in second.route("Short article.")] == ["openai:gpt-4o", "openai:gpt-4o-mini"]
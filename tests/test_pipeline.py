@@ -0,0 +1,123 @@
+import threading
+from datetime import date
+
+import pytest
+
+from metrics import Metrics
+from pipeline import ExtractionPipeline
+from utils import DataPreprocessor
+from result_store import ResultStore
+from stubs import StubScrapper, StubLLM
+
+RECEIVED_DATE = date(2024, 3, 12)
+
+
+def rows(urls):
+    return [(url, RECEIVED_DATE) for url in urls]
+
+
+def make_pipeline(logger, scrapper, llm, **kwargs):
+    return ExtractionPipeline(logger, lambda: scrapper, llm, DataPreprocessor(logger), metrics=Metrics(), **kwargs)
+
+
+def run_with_timeout(pipeline, urls, timeout=30):
+    # A pipeline that does not shut its workers down hangs the test instead of failing it
+    results = []
+    runner  = threading.Thread(target=lambda: results.extend(pipeline.run(rows(urls))), daemon=True)
+    runner.start()
+    runner.join(timeout)
+    assert not runner.is_alive(), "the pipeline did not finish"
+    return results
+
+
+@pytest.mark.parametrize("llm_batch_size", [1, 3])
+def test_every_article_completes_in_any_order(logger, llm_batch_size):
+    urls     = [f"https://news.example.com/article/{index}" for index in range(12)]
+    llm      = StubLLM(delay=0.01)
+    pipeline = make_pipeline(logger, StubScrapper(delay=0.01), llm, fetch_workers=3, llm_workers=2, queue_size=2,
+                             llm_batch_size=llm_batch_size)
+
+    results = run_with_timeout(pipeline, urls)
+
+    assert sorted(result.index for result in results) == list(range(len(urls)))
+    assert all(result.ok and not result.skipped for result in results)
+    assert sorted(result.article_details['article_url'] for result in results) == sorted(urls)
+    assert all(result.article_details['article_received_month'] == "March 2024" for result in results)
+    assert len(llm.contents) == len(urls)
+    if llm_batch_size == 1:
+        assert not llm.batches
+    else:
+        assert all(len(batch) <= llm_batch_size for batch in llm.batches)
+
+
+def test_processed_articles_are_not_fetched_again(logger, tmp_path):
+    known        = "https://news.example.com/article/0"
+    result_store = ResultStore(logger, db_path=str(tmp_path / "results.sqlite3"))
+    result_store.append({'article_received_month': "March 2024", 'article_url': known, 'project_title': "Stored"})
+    scrapper     = StubScrapper()
+    llm          = StubLLM()
+    pipeline     = make_pipeline(logger, scrapper, llm, result_store=result_store)
+
+    results = run_with_timeout(pipeline, [f"{known}?utm_source=newsletter", "https://news.example.com/article/1"])
+
+    skipped = [result for result in results if result.skipped]
+    assert [result.article_details['project_title'] for result in skipped] == ["Stored"]
+    assert scrapper.fetched == ["https://news.example.com/article/1"]
+    assert len(llm.contents) == 1
+
+
+def test_refresh_processes_known_articles_again(logger, tmp_path):
+    known        = "https://news.example.com/article/0"
+    result_store = ResultStore(logger, db_path=str(tmp_path / "results.sqlite3"))
+    result_store.append({'article_received_month': "March 2024", 'article_url': known, 'project_title': "Stored"})
+    scrapper     = StubScrapper()
+    pipeline     = make_pipeline(logger, scrapper, StubLLM(), result_store=result_store, refresh=True)
+
+    results = run_with_timeout(pipeline, [known])
+
+    assert [result.skipped for result in results] == [False]
+    assert scrapper.fetched == [known]
+
+
+@pytest.mark.parametrize("llm_batch_size", [1, 4])
+def test_failed_fetches_are_reported_without_hanging(logger, llm_batch_size):
+    urls     = ["https://news.example.com/broken/0", "https://news.example.com/article/1", "https://news.example.com/broken/2"]
+    llm      = StubLLM()
+    pipeline = make_pipeline(logger, StubScrapper(), llm, fetch_workers=2, llm_workers=2, queue_size=1, llm_batch_size=llm_batch_size)
+
+    results = {result.article_url: result for result in run_with_timeout(pipeline, urls)}
+
+    assert sorted(results) == sorted(urls)
+    assert sorted(url for url, result in results.items() if not result.ok) == [urls[0], urls[2]]
+    assert "unreachable" in results[urls[0]].error
+    assert llm.contents == [f"Content of {urls[1]}"]
+
+
+@pytest.mark.parametrize("llm_batch_size", [1, 4])
+def test_llm_errors_are_reported_for_every_article(logger, llm_batch_size):
+    class FailingLLM(StubLLM):
+        def run_llm(self, news_page_content):
+            raise RuntimeError("provider down")
+
+    urls     = [f"https://news.example.com/article/{index}" for index in range(6)]
+    pipeline = make_pipeline(logger, StubScrapper(), FailingLLM(), fetch_workers=2, llm_workers=2, llm_batch_size=llm_batch_size)
+
+    results = run_with_timeout(pipeline, urls)
+
+    assert sorted(result.index for result in results) == list(range(len(urls)))
+    assert all(result.error == "provider down" for result in results)
+
+
+def test_consumer_leaving_early_stops_the_workers(logger):
+    urls     = [f"https://news.example.com/article/{index}" for index in range(50)]
+    pipeline = make_pipeline(logger, StubScrapper(delay=0.01), StubLLM(), fetch_workers=2, llm_workers=2, queue_size=1)
+    before   = {thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")}
+
+    results = pipeline.run(rows(urls))
+    next(results)
+    results.close()
+
+    for thread in threading.enumerate():
+        if thread.name.startswith("pipeline-") and thread not in before:
+            thread.join(5)
+            assert not thread.is_alive()
@@ -0,0 +1,140 @@
+import time
+import asyncio
+import threading
+import multiprocessing
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, get_rate_limiter
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": headers})()
+
+
+def drain(db_path, name, requests):
+    import logging
+    limiter = RateLimiter(logging.getLogger("tests"), name, rpm=60, tpm=100000, db_path=db_path)
+    for _ in range(requests):
+        limiter.acquire(1)
+
+
+def test_processes_share_the_request_budget(logger, tmp_path):
+    db_path = str(tmp_path / "limits.sqlite3")
+    limiter = RateLimiter(logger, "openai:test", rpm=60, tpm=100000, db_path=db_path)
+
+    # Another process spends the whole minute budget
+    process = multiprocessing.get_context("spawn").Process(target=drain, args=(db_path, "openai:test", 60))
+    process.start()
+    process.join(timeout=60)
+    assert process.exitcode == 0
+
+    start = time.monotonic()
+    limiter.acquire(1)
+    # One request per second is refilled
+    assert time.monotonic() - start >= 0.5
+
+
+def test_limiters_of_the_same_model_share_the_token_budget(logger, tmp_path):
+    db_path = str(tmp_path / "limits.sqlite3")
+    first   = RateLimiter(logger, "gemini:test", rpm=1000, tpm=600, db_path=db_path)
+    second  = RateLimiter(logger, "gemini:test", rpm=1000, tpm=600, db_path=db_path)
+    other   = RateLimiter(logger, "gemini:other", rpm=1000, tpm=600, db_path=db_path)
+
+    first.acquire(550)
+    assert second.budget()['tokens'] < 100
+    assert other.budget()['tokens'] == 600
+
+
+def test_a_429_slows_every_process_down(logger, tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: 0)
+    db_path = str(tmp_path / "limits.sqlite3")
+    first   = RateLimiter(logger, "openai:test", rpm=1000, tpm=100000, db_path=db_path, base_delay=0)
+    second  = RateLimiter(logger, "openai:test", rpm=1000, tpm=100000, db_path=db_path)
+    calls   = []
+
+    def call():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RateLimitError({"retry-after-ms": "200"})
+        return "ok"
+
+    assert first.call(call, 10) == "ok"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.15
+    # Halved, then recovered a little by the successful retry
+    assert second.budget()['rate_factor'] < 0.6
+
+
+def test_budgets_are_configured_per_provider(logger, tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_RATE_LIMIT_DB", str(tmp_path / "limits.sqlite3"))
+    monkeypatch.setenv("OPENAI_RPM", "42")
+    monkeypatch.setenv("OPENAI_TPM", "4200")
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+
+    openai = get_rate_limiter(logger, "OpenAI", "gpt-4o-mini").budget()
+    gemini = get_rate_limiter(logger, "Gemini", "gemini-1.5-flash").budget()
+
+    assert (openai['rpm'], openai['tpm']) == (42, 4200)
+    assert (gemini['rpm'], gemini['tpm']) == (rate_limiter.DEFAULT_LIMITS['gemini']['rpm'], rate_limiter.DEFAULT_LIMITS['gemini']['tpm'])
+
+
+def test_async_callers_do_not_block_the_event_loop(logger, tmp_path):
+    limiter = RateLimiter(logger, "openai:test", rpm=1000, tpm=100000, db_path=str(tmp_path / "limits.sqlite3"))
+    held    = threading.Event()
+    release = threading.Event()
+
+    def hold_the_limiter():
+        # Another thread of the process keeps the limiter busy, like a slow write transaction
+        with limiter._condition:
+            held.set()
+            release.wait(5)
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while not release.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker  = asyncio.create_task(tick())
+        acquire = asyncio.create_task(limiter.aacquire(1))
+        await asyncio.sleep(0.3)
+        ticks_while_held = ticks
+        release.set()
+        await asyncio.wait_for(acquire, 5)
+        await ticker
+        return ticks_while_held
+
+    holder = threading.Thread(target=hold_the_limiter)
+    holder.start()
+    held.wait(5)
+    try:
+        assert asyncio.run(main()) >= 10
+    finally:
+        release.set()
+        holder.join()
+    assert limiter.budget()['requests'] < 1000
+
+
+def test_cancelled_async_callers_leave_the_queue(logger, tmp_path):
+    limiter = RateLimiter(logger, "openai:test", rpm=60, tpm=100000, db_path=str(tmp_path / "limits.sqlite3"))
+    for _ in range(60):
+        limiter.acquire(1)
+
+    async def main():
+        waiting = asyncio.create_task(limiter.aacquire(1))
+        await asyncio.sleep(0.1)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(main())
+    assert not limiter._queue
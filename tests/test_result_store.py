@@ -0,0 +1,98 @@
+import json
+import sqlite3
+
+import pytest
+
+from result_store import ResultStore
+
+URL = "https://www.reuters.com/world/africa/expressway-loan"
+
+
+def record(article_url, project_title="Nairobi Expressway", received_month="March 2024"):
+    return {'article_received_month': received_month, 'article_url': article_url, 'page_title': "Expressway loan",
+            'page_content': "Kenya signed the loan.", 'country': "Kenya", 'project_title': project_title}
+
+
+@pytest.fixture
+def store(logger, tmp_path):
+    return ResultStore(logger, db_path=str(tmp_path / "results.sqlite3"))
+
+
+@pytest.mark.parametrize("variant", [
+    f"{URL}?utm_source=newsletter&utm_medium=email",
+    URL.replace("https://www.", "https://"),
+    URL.replace("https://", "http://"),
+    f"{URL}/",
+    f"https://nam02.safelinks.protection.outlook.com/?url={URL.replace(':', '%3A').replace('/', '%2F')}&data=05",
+])
+def test_upsert_replaces_the_spelling_variants_of_an_article(store, variant):
+    other = "https://apnews.com/article/port-deal"
+    store.upsert(record(URL, project_title="First extraction"))
+    store.upsert(record(other))
+
+    assert store.upsert(record(variant, project_title="Refreshed extraction")) is True
+
+    assert store.count() == 2
+    assert [item['project_title'] for item in store.iter_records()] == ["Nairobi Expressway", "Refreshed extraction"]
+    # Other articles are never touched by the dedup delete
+    assert store.latest_by_url(other)['article_url'] == other
+
+
+def test_upsert_of_an_unchanged_record_is_a_no_op(store):
+    assert store.upsert(record(URL)) is True
+    store.dirty = False
+
+    assert store.upsert(record(URL)) is False
+    assert store.dirty is False
+    assert store.count() == 1
+
+
+def test_latest_by_url_matches_other_spellings(store):
+    store.append(record(URL, project_title="Old"))
+    store.append(record(f"{URL}?utm_campaign=daily", project_title="New"))
+
+    assert store.latest_by_url("http://reuters.com/world/africa/expressway-loan/#top")['project_title'] == "New"
+    assert store.latest_by_url("https://www.reuters.com/world/africa/another-article") is None
+
+
+def test_import_export_round_trip(logger, store, tmp_path):
+    records   = [record(URL), record("https://apnews.com/article/port-deal", project_title="Mombasa Port – phase 2",
+                                     received_month="April 2024")]
+    json_file = tmp_path / "output.json"
+    # output.json as written before the store
+    json_file.write_text(json.dumps(records, indent=4), encoding='utf-8')
+
+    assert store.import_json(str(json_file)) == 2
+    assert store.dirty is False
+    exported = tmp_path / "exported.json"
+    store.export_json(str(exported))
+
+    assert exported.read_text(encoding='utf-8') == json_file.read_text(encoding='utf-8')
+    assert [item['project_title'] for item in store.iter_records(received_month="April 2024")] == ["Mombasa Port – phase 2"]
+
+
+def test_empty_store_exports_an_empty_list(store, tmp_path):
+    exported = tmp_path / "exported.json"
+    store.export_json(str(exported))
+    assert json.loads(exported.read_text(encoding='utf-8')) == []
+
+
+def test_legacy_json_is_only_imported_into_an_empty_store(logger, tmp_path):
+    json_file = tmp_path / "output.json"
+    json_file.write_text(json.dumps([record(URL)], indent=4), encoding='utf-8')
+    db_path   = str(tmp_path / "results.sqlite3")
+
+    assert ResultStore(logger, db_path=db_path, legacy_json_file=str(json_file)).count() == 1
+    assert ResultStore(logger, db_path=db_path, legacy_json_file=str(json_file)).count() == 1
+
+
+def test_stores_without_the_dedup_index_are_backfilled(logger, tmp_path):
+    db_path = str(tmp_path / "results.sqlite3")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, article_url TEXT NOT NULL, "
+                     "received_month TEXT, record TEXT NOT NULL, created_at REAL NOT NULL)")
+        conn.execute("INSERT INTO articles (article_url, received_month, record, created_at) VALUES (?, ?, ?, 0)",
+                     (f"{URL}?utm_source=x", "March 2024", json.dumps(record(f"{URL}?utm_source=x"))))
+
+    store = ResultStore(logger, db_path=db_path)
+    assert store.latest_by_url(URL)['article_url'] == f"{URL}?utm_source=x"
@@ -0,0 +1,67 @@
+import io
+
+import pymupdf
+import pytest
+
+import scrapper
+from scrapper import ArticleScrapper
+
+
+def make_pdf(pages, links_per_page=3):
+    document = pymupdf.open()
+    for page_number in range(pages):
+        page = document.new_page()
+        for index in range(links_per_page):
+            y   = 72 + 40 * index
+            url = f"https://news.example.com/{page_number}/{index}/story"
+            page.insert_text((72, y), f"Story {index}")
+            page.insert_link({"kind": pymupdf.LINK_URI, "from": pymupdf.Rect(72, y - 10, 300, y), "uri": url})
+        # The text layer repeats the first link, it is only yielded once
+        page.insert_text((72, 400), f"Read more at https://news.example.com/{page_number}/0/story")
+    return document.tobytes()
+
+
+def expected_urls(pages, links_per_page=3):
+    return [f"https://news.example.com/{page_number}/{index}/story" for page_number in range(pages) for index in range(links_per_page)]
+
+
+@pytest.fixture
+def article_scrapper(logger):
+    return ArticleScrapper(logger, driver_pool=object(), http_client=object(), page_cache=None)
+
+
+def test_small_pdf_urls_in_page_order(article_scrapper):
+    assert list(article_scrapper.iter_pdf_urls(make_pdf(5))) == expected_urls(5)
+
+
+def test_large_pdf_urls_in_page_order(article_scrapper, monkeypatch):
+    monkeypatch.setattr(scrapper, "PARALLEL_PDF_MIN_PAGES", 8)
+    monkeypatch.setattr(scrapper, "PDF_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(scrapper.os, "cpu_count", lambda: 4)
+
+    assert list(article_scrapper.iter_pdf_urls(make_pdf(12), max_workers=3)) == expected_urls(12)
+
+
+def test_scrape_pdf_streams_urls(article_scrapper):
+    urls = article_scrapper.scrape_pdf(io.BytesIO(make_pdf(3)))
+
+    assert next(iter(urls)) == expected_urls(3)[0]
+    assert list(urls) == expected_urls(3)[1:]
+
+
+def test_scrape_pdf_logs_unreadable_files(article_scrapper):
+    assert list(article_scrapper.scrape_pdf(io.BytesIO(b"not a pdf"))) == []
+
+
+@pytest.mark.parametrize("wrapper", [
+    "https://nam02.safelinks.protection.outlook.com/?url=https%3A%2F%2Fnews.example.com%2F0%2F0%2Fstory&data=05",
+    "https://www.google.com/url?q=https://news.example.com/0/0/story&sa=D",
+])
+def test_redirect_link_annotations_yield_their_target(article_scrapper, wrapper):
+    document = pymupdf.open()
+    page     = document.new_page()
+    page.insert_text((72, 72), "Story 0")
+    page.insert_link({"kind": pymupdf.LINK_URI, "from": pymupdf.Rect(72, 62, 300, 72), "uri": wrapper})
+    page.insert_text((20, 400), f"Read more at {wrapper}", fontsize=5)
+
+    assert list(article_scrapper.iter_pdf_urls(document.tobytes())) == ["https://news.example.com/0/0/story"]
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from bench_extract_urls import legacy_extract_urls, url_variants
+from utils import Utils, unique_normalized_urls
+
+URL = "https://www.reuters.com/world/article-1"
+
+
+@pytest.fixture
+def utils(logger):
+    return Utils(logger)
+
+
+def test_tracking_and_clean_spellings_are_both_kept(utils):
+    text = "https://example.com/a?utm_source=x and https://example.com/a"
+    assert utils.extract_urls(text, unwrap_redirects=False) == ["https://example.com/a?utm_source=x", "https://example.com/a"]
+
+
+def test_url_variants_match_the_original_extractor(utils):
+    text = "\n".join(f"[{variant}]({variant}) see ({variant}) \"{variant}\"" for variant in url_variants(URL))
+    assert utils.extract_urls(text, unwrap_redirects=False) == legacy_extract_urls(text)
+
+
+def test_random_text_matches_the_original_extractor(utils):
+    random.seed(11)
+    alphabet = "htps:/.w-_?=&%()[]\"' \nabcxyz019#~{}é"
+    for _ in range(2000):
+        text = "".join(random.choice(["https://", "http://", *alphabet]) for _ in range(random.randint(1, 60)))
+        assert utils.extract_urls(text, unwrap_redirects=False) == legacy_extract_urls(text), text
+
+
+def test_redirect_wrappers_are_unwrapped(utils):
+    safelink = "https://nam02.safelinks.protection.outlook.com/?url=https%3A%2F%2Fwww.reuters.com%2Fworld%2Farticle-1&data=05"
+    assert utils.extract_urls(f"{safelink} {URL}") == [URL]
+
+
+def test_near_duplicates_keep_the_first_spelling():
+    assert unique_normalized_urls(url_variants(URL) + ["https://apnews.com/b"]) == [URL, "https://apnews.com/b"]